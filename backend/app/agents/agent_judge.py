@@ -1,4 +1,6 @@
-from app.services.openai_client import ask_openai
+from app.services.async_runner import run_sync
+from app.services.metrics import stage
+from app.services.openai_client import ask_openai_async
 
 
 JUDGE_PROMPT = """
@@ -29,27 +31,37 @@ Return STRICT JSON only in this format:
 """
 
 
-def judge(user_message: str, answers: dict) -> dict:
-    combined_input = f"""
-USER QUESTION:
-{user_message}
-
-LAW AGENT ANSWER:
-{answers.get("law_agent")}
+AGENT_LABELS = {
+    "law_agent": "LAW AGENT ANSWER",
+    "police_agent": "POLICE AGENT ANSWER",
+    "press_agent": "PRESS AGENT ANSWER",
+}
 
-POLICE AGENT ANSWER:
-{answers.get("police_agent")}
 
-PRESS AGENT ANSWER:
-{answers.get("press_agent")}
+async def judge_async(user_message: str, answers: dict) -> dict:
+    # Only the agents that actually answered (voting mode may drop timeouts)
+    answer_blocks = "\n".join(
+        f"""
+{label}:
+{answers[key]}
 """
-
-    result = ask_openai(
-        system_prompt=JUDGE_PROMPT,
-        user_message=combined_input,
-        memory=[]
+        for key, label in AGENT_LABELS.items()
+        if answers.get(key) is not None
     )
 
+    combined_input = f"""
+USER QUESTION:
+{user_message}
+{answer_blocks}"""
+
+    with stage("judge"):
+        result = await ask_openai_async(
+            system_prompt=JUDGE_PROMPT,
+            user_message=combined_input,
+            memory=[],
+            route="judge"
+        )
+
     try:
         import json
         return json.loads(result)
@@ -59,3 +71,8 @@ PRESS AGENT ANSWER:
             "confidence": 60,
             "reason": "Fallback decision due to parsing issue"
         }
+
+
+def judge(user_message: str, answers: dict) -> dict:
+    # Sync wrapper (old API)
+    return run_sync(judge_async(user_message, answers))
@@ -1,16 +1,14 @@
-from app.services.openai_client import ask_openai
-from app.services.rag_retriever import retrieve_context
+from app.services.async_runner import run_sync
+from app.services.openai_client import ask_openai_async
+from app.services.prompt_builder import build_prompt
+from app.services.rag_retriever import retrieve_chunks_async
+from app.services.section_index import lookup_sections, merge_exact
+from app.services.vector_store import DOMAIN_DBS
 
+LAW_DB_PATH = DOMAIN_DBS["law"]
 
-def law_agent(message: str, memory=None) -> str:
-
-    # 🔍 Retrieve relevant law context from vector DB
-    law_context = retrieve_context(
-        query=message,
-        db_path="vectordb/law_db"
-    )
 
-    system_prompt = f"""
+LAW_PROMPT_TEMPLATE = """
 You are a LAW ASSISTANT AI designed for India.
 
 ROLE:
@@ -45,14 +43,46 @@ SAFETY:
 - No judgement prediction
 
 🧠 CONTEXT (Indian Law Documents):
-{law_context}
+{context}
 
 ENDING DISCLAIMER (COMPULSORY):
 "⚠️ Disclaimer: Ee information general awareness kosam maatrame. 
 Idhi legal advice kaadhu. Mee case specific guidance kosam qualified advocate ni consult cheyyandi."
 """
 
-    return ask_openai(system_prompt, message, memory)
+
+async def build_law_prompt(message: str, memory=None, chunks=None) -> dict:
+
+    # 📑 "IPC 420", "Sec 154 CrPC" → exact section text, no embedding / vector search
+    exact, complete = lookup_sections(message)
+
+    if complete:
+        law_chunks = exact
+    else:
+        # Voting mode hands in chunks from one shared multi-domain retrieval
+        law_chunks = chunks
+        if law_chunks is None:
+            # 🔍 Retrieve relevant law context from vector DB
+            law_chunks = await retrieve_chunks_async(
+                query=message,
+                db_path=LAW_DB_PATH
+            )
+
+        # Bare "section 154" (IPC or CrPC?) → exact guesses first, then the vector results
+        law_chunks = merge_exact(exact, law_chunks)
+
+    # ✂️ Fit prompt + context + memory into the token budget
+    return build_prompt(LAW_PROMPT_TEMPLATE, law_chunks, message, memory)
+
+
+async def law_agent_async(message: str, memory=None, chunks=None, route: str = "reply") -> str:
+    plan = await build_law_prompt(message, memory, chunks)
+    return await ask_openai_async(plan["system_prompt"], message, plan["memory"], route=route)
+
+
+def law_agent(message: str, memory=None) -> str:
+    # Sync wrapper (old API)
+    return run_sync(law_agent_async(message, memory))
 
 
 
@@ -1,16 +1,13 @@
-from app.services.openai_client import ask_openai
-from app.services.rag_retriever import retrieve_context
+from app.services.async_runner import run_sync
+from app.services.openai_client import ask_openai_async
+from app.services.prompt_builder import build_prompt
+from app.services.rag_retriever import retrieve_chunks_async
+from app.services.vector_store import DOMAIN_DBS
 
+POLICE_DB_PATH = DOMAIN_DBS["police"]
 
-def police_agent(message: str, memory=None) -> str:
-
-    # 🔍 Police vector DB nundi relevant context fetch
-    police_context = retrieve_context(
-        query=message,
-        db_path="vectordb/police_db"
-    )
 
-    system_prompt = f"""
+POLICE_PROMPT_TEMPLATE = """
 You are a POLICE ASSISTANT AI designed for India.
 
 ROLE:
@@ -48,14 +45,38 @@ SAFETY:
 - Neutral & procedural tone
 
 🧠 CONTEXT (Police Manuals / Scenarios):
-{police_context}
+{context}
 
 ENDING DISCLAIMER (COMPULSORY):
 "⚠️ Disclaimer: Ee information general awareness kosam maatrame. 
 Idhi police order kaadhu. Mee case specific help kosam nearest police station ni contact cheyyandi."
 """
 
-    return ask_openai(system_prompt, message, memory)
+
+async def build_police_prompt(message: str, memory=None, chunks=None) -> dict:
+
+    # Voting mode hands in chunks from one shared multi-domain retrieval
+    police_chunks = chunks
+
+    if police_chunks is None:
+        # 🔍 Police vector DB nundi relevant context fetch
+        police_chunks = await retrieve_chunks_async(
+            query=message,
+            db_path=POLICE_DB_PATH
+        )
+
+    # ✂️ Fit prompt + context + memory into the token budget
+    return build_prompt(POLICE_PROMPT_TEMPLATE, police_chunks, message, memory)
+
+
+async def police_agent_async(message: str, memory=None, chunks=None, route: str = "reply") -> str:
+    plan = await build_police_prompt(message, memory, chunks)
+    return await ask_openai_async(plan["system_prompt"], message, plan["memory"], route=route)
+
+
+def police_agent(message: str, memory=None) -> str:
+    # Sync wrapper (old API)
+    return run_sync(police_agent_async(message, memory))
 
 
 
@@ -1,16 +1,13 @@
-from app.services.openai_client import ask_openai
-from app.services.rag_retriever import retrieve_context
+from app.services.async_runner import run_sync
+from app.services.openai_client import ask_openai_async
+from app.services.prompt_builder import build_prompt
+from app.services.rag_retriever import retrieve_chunks_async
+from app.services.vector_store import DOMAIN_DBS
 
+PRESS_DB_PATH = DOMAIN_DBS["press"]
 
-def press_agent(message: str, memory=None) -> str:
-
-    # 🔍 Press vector DB nundi relevant context fetch
-    press_context = retrieve_context(
-        query=message,
-        db_path="vectordb/press_db"
-    )
 
-    system_prompt = f"""
+PRESS_PROMPT_TEMPLATE = """
 You are a PRESS / MEDIA ASSISTANT AI designed for Indian print and electronic media.
 
 ROLE:
@@ -50,7 +47,7 @@ SAFETY:
 - No hate or provocation
 
 🧠 CONTEXT (Press Council of India / PIB Releases):
-{press_context}
+{context}
 
 ENDING DISCLAIMER (COMPULSORY):
 "⚠️ Disclaimer: Ee report available information adharam gaa tayaaru chesindi.
@@ -58,7 +55,31 @@ Idhi investigation result kaadhu lekapothe court judgement kaadhu.
 Samayam tho information maaravachu."
 """
 
-    return ask_openai(system_prompt, message, memory)
+
+async def build_press_prompt(message: str, memory=None, chunks=None) -> dict:
+
+    # Voting mode hands in chunks from one shared multi-domain retrieval
+    press_chunks = chunks
+
+    if press_chunks is None:
+        # 🔍 Press vector DB nundi relevant context fetch
+        press_chunks = await retrieve_chunks_async(
+            query=message,
+            db_path=PRESS_DB_PATH
+        )
+
+    # ✂️ Fit prompt + context + memory into the token budget
+    return build_prompt(PRESS_PROMPT_TEMPLATE, press_chunks, message, memory)
+
+
+async def press_agent_async(message: str, memory=None, chunks=None, route: str = "reply") -> str:
+    plan = await build_press_prompt(message, memory, chunks)
+    return await ask_openai_async(plan["system_prompt"], message, plan["memory"], route=route)
+
+
+def press_agent(message: str, memory=None) -> str:
+    # Sync wrapper (old API)
+    return run_sync(press_agent_async(message, memory))
 
 
 
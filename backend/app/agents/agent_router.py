@@ -1,92 +1,453 @@
-from app.agents.agent_law import law_agent
-from app.agents.agent_police import police_agent
-from app.agents.agent_press import press_agent
-from app.agents.decide_agent import decide_agent
-from app.agents.agent_judge import judge
+import asyncio
+import os
+import time
+import uuid
+from contextlib import aclosing
 
+from app.agents.agent_law import law_agent_async, build_law_prompt
+from app.agents.agent_police import police_agent_async, build_police_prompt
+from app.agents.agent_press import press_agent_async, build_press_prompt
+from app.agents.decide_agent import classify_intent_async
+from app.agents.agent_judge import judge_async
+
+from app.services.async_runner import run_sync
 from app.services.memory_manager import get_memory, add_message
-from app.services.reflection import reflect
+from app.services.metrics import (
+    DEBUG_TIMINGS,
+    current_timings,
+    inc,
+    record_stage,
+    reset_timings,
+    start_timings,
+)
+from app.services.llm_client import LLM_FAILURE_REPLY, LLMError, degraded_reply
+from app.services.openai_client import ask_openai_async, ask_openai_stream
+from app.services.rag_retriever import retrieve_multi_async
+from app.services.reflection import (
+    REFLECTION_MODE,
+    get_reflection,
+    safe_reflect,
+    schedule_reflection,
+    should_reflect,
+)
+from app.services.semantic_cache import lookup_answer, remember_answer
+
+
+# ⏱️ Per-agent time limit in voting mode (seconds)
+AGENT_TIMEOUT_S = float(os.getenv("AGENT_TIMEOUT_S", "25"))
+
+VOTING_AGENTS = {
+    "law_agent": law_agent_async,
+    "police_agent": police_agent_async,
+    "press_agent": press_agent_async,
+}
+
+PROMPT_BUILDERS = {
+    "LAW": build_law_prompt,
+    "POLICE": build_police_prompt,
+    "PRESS": build_press_prompt,
+}
 
 
 # =====================================================
 # 🚀 MAIN ENTRY POINT (frontend calls ONLY this)
 # mode = "single" | "voting"
 # =====================================================
-def run_agent(chat_id: str, message: str, mode: str = "single") -> dict:
+async def run_agent_async(chat_id: str, message: str, mode: str = "single") -> dict:
     """
     Central agent router.
     Frontend must call ONLY this function.
     """
-    if mode == "voting":
-        return run_agent_with_voting(chat_id, message)
+    inc("lawai_requests_total", mode=mode)
 
-    return run_single_agent(chat_id, message)
+    # ⏱️ Stage timings of THIS request (stages record into the context)
+    token = start_timings() if DEBUG_TIMINGS else None
+    started = time.perf_counter()
+    stages = None
+    try:
+        if mode == "voting":
+            response = await run_agent_with_voting_async(chat_id, message)
+        else:
+            response = await run_single_agent_async(chat_id, message)
+    finally:
+        elapsed = time.perf_counter() - started
+        record_stage("run_agent", elapsed)
+        # Also on errors → no stale stages left for the next request in this context
+        if token is not None:
+            stages = list(current_timings())
+            reset_timings(token)
+
+    if stages is not None:
+        if mode == "voting":
+            response["timings"]["stages"] = stages
+        else:
+            response["timings"] = {"stages": stages, "total_ms": round(elapsed * 1000, 2)}
+
+    return response
+
+
+def run_agent(chat_id: str, message: str, mode: str = "single") -> dict:
+    # Sync wrapper (old API)
+    return run_sync(run_agent_async(chat_id, message, mode))
 
 
 # =====================================================
 # 1️⃣ SINGLE AGENT MODE (FAST / PRODUCTION DEFAULT)
 # =====================================================
-def run_single_agent(chat_id: str, message: str) -> dict:
+async def run_single_agent_async(chat_id: str, message: str) -> dict:
     # 🧠 Load conversation memory
     memory = get_memory(chat_id)
 
     # 🧠 Save user message FIRST
     add_message(chat_id, "user", message)
 
-    # 🚦 Decide which agent should answer
-    agent = decide_agent(message)
+    # 🚦 Decide which agent should answer (embedding router, keyword fallback)
+    route = await classify_intent_async(message)
+    agent = route["agent"]
+    domain = agent.lower()
 
-    # 🤖 Call selected agent
-    if agent == "PRESS":
-        reply = press_agent(message)
-    elif agent == "POLICE":
-        reply = police_agent(message)
-    else:
-        reply = law_agent(message)
+    # ♻️ Same question answered before? → skip retrieval + LLM (not for follow-ups)
+    cached = await lookup_answer(domain, message, memory)
+    if cached is not None:
+        add_message(chat_id, "assistant", cached["reply"])
+        return {
+            "mode": "single",
+            "agent_used": agent,
+            "message_id": cached["message_id"],
+            "reply": cached["reply"],
+            **_cached_reflection_fields(cached),
+            "cache": "hit",
+            "routing": _routing_fields(route)
+        }
+
+    # 🤖 Call selected agent (prompt fitted to the token budget)
+    plan = await PROMPT_BUILDERS[agent](message, memory)
+    message_id = uuid.uuid4().hex
 
-    # 🪞 Reflection (safe wrapper)
     try:
-        reflection = reflect(reply, memory)
-    except Exception:
-        reflection = {
-            "confidence": 0.7,
-            "notes": "Reflection skipped due to internal safety."
+        reply = await ask_openai_async(plan["system_prompt"], message, plan["memory"])
+    except LLMError as e:
+        # 🩹 No answer → tell the user to retry; nothing cached, reflected or remembered
+        return {
+            "mode": "single",
+            "agent_used": agent,
+            "message_id": message_id,
+            "reply": degraded_reply(e),
+            "confidence": None,
+            "notes": "",
+            "reflection_status": "skipped",
+            "cache": "miss",
+            **_degraded_fields(e),
+            "prompt_tokens": plan["token_report"],
+            "routing": _routing_fields(route)
         }
 
+    # 🪞 Reflection (inline, deferred or sampled out)
+    reflection = await _reflection_fields(message_id, reply, memory)
+
     # 🧠 Save assistant reply
     add_message(chat_id, "assistant", reply)
 
+    await remember_answer(
+        domain,
+        message,
+        reply,
+        reflection=_stored_reflection(reflection),
+        message_id=message_id,
+        memory=memory
+    )
+
     return {
         "mode": "single",
         "agent_used": agent,
+        "message_id": message_id,
         "reply": reply,
+        **reflection,
+        "cache": "miss",
+        "prompt_tokens": plan["token_report"],
+        "routing": _routing_fields(route)
+    }
+
+
+def _timings_fields(started: float) -> dict:
+    """{"timings": ...} for a stream's done event (DEBUG_TIMINGS only)"""
+    elapsed = time.perf_counter() - started
+    record_stage("run_agent_stream", elapsed)
+
+    if not DEBUG_TIMINGS:
+        return {}
+    return {"timings": {"stages": list(current_timings() or []), "total_ms": round(elapsed * 1000, 2)}}
+
+
+def _degraded_fields(error: LLMError) -> dict:
+    """Marks a response that carries no model answer (client may retry)"""
+    return {
+        "degraded": True,
+        "error": {"kind": error.kind, "retryable": error.retryable, "retry_after": error.retry_after},
+    }
+
+
+def _routing_fields(route: dict) -> dict:
+    return {"confidence": route["confidence"], "method": route["method"]}
+
+
+async def _reflection_fields(message_id: str, reply: str, memory: list) -> dict:
+    """confidence / notes / reflection_status for the response"""
+    if not should_reflect():
+        return {"confidence": None, "notes": "", "reflection_status": "skipped"}
+
+    if REFLECTION_MODE == "deferred":
+        # ⏳ Client polls GET /chat/reflection/{message_id}
+        schedule_reflection(message_id, reply, memory)
+        return {"confidence": None, "notes": "", "reflection_status": "pending"}
+
+    reflection = await safe_reflect(reply, memory)
+    return {
+        "confidence": reflection.get("confidence", 0.7),
+        "notes": reflection.get("notes", ""),
+        "reflection_status": "done"
+    }
+
+
+def _stored_reflection(fields: dict):
+    """Reflection worth caching next to the reply (only finished ones)"""
+    if fields.get("reflection_status") != "done":
+        return None
+    return {"confidence": fields["confidence"], "notes": fields["notes"]}
+
+
+def _cached_reflection_fields(cached: dict) -> dict:
+    reflection = cached.get("reflection")
+
+    # Deferred reflection of the original reply may have finished by now
+    if reflection is None and cached.get("message_id"):
+        deferred = get_reflection(cached["message_id"])
+        if deferred and deferred["status"] == "pending":
+            return {"confidence": None, "notes": "", "reflection_status": "pending"}
+        if deferred:
+            reflection = deferred
+
+    if reflection is None:
+        return {"confidence": None, "notes": "", "reflection_status": "skipped"}
+
+    return {
         "confidence": reflection.get("confidence", 0.7),
-        "notes": reflection.get("notes", "")
+        "notes": reflection.get("notes", ""),
+        "reflection_status": "done"
+    }
+
+
+def run_single_agent(chat_id: str, message: str) -> dict:
+    # Sync wrapper (old API)
+    return run_sync(run_single_agent_async(chat_id, message))
+
+
+# =====================================================
+# 📡 SINGLE AGENT MODE – STREAMING (SSE)
+# Yields {"event": ..., "data": {...}} dicts:
+#   meta → token (many) → done (full reply) → reflection (if sampled)
+# =====================================================
+async def run_single_agent_stream(chat_id: str, message: str):
+    inc("lawai_requests_total", mode="stream")
+
+    # The stream runs in its own task context → no reset needed
+    if DEBUG_TIMINGS:
+        start_timings()
+    started = time.perf_counter()
+
+    memory = get_memory(chat_id)
+    add_message(chat_id, "user", message)
+
+    route = await classify_intent_async(message)
+    agent = route["agent"]
+    domain = agent.lower()
+
+    # ♻️ Cache hit → whole reply as one token, reflection straight away
+    cached = await lookup_answer(domain, message, memory)
+    if cached is not None:
+        add_message(chat_id, "assistant", cached["reply"])
+        yield {
+            "event": "meta",
+            "data": {
+                "mode": "single",
+                "agent_used": agent,
+                "message_id": cached["message_id"],
+                "routing": _routing_fields(route)
+            }
+        }
+        yield {"event": "token", "data": {"text": cached["reply"]}}
+        yield {
+            "event": "done",
+            "data": {
+                "mode": "single",
+                "agent_used": agent,
+                "message_id": cached["message_id"],
+                "reply": cached["reply"],
+                **_cached_reflection_fields(cached),
+                "cache": "hit",
+                **_timings_fields(started)
+            }
+        }
+        return
+
+    message_id = uuid.uuid4().hex
+    yield {
+        "event": "meta",
+        "data": {
+            "mode": "single",
+            "agent_used": agent,
+            "message_id": message_id,
+            "routing": _routing_fields(route)
+        }
+    }
+
+    # 🤖 Stream tokens from the selected agent
+    plan = await PROMPT_BUILDERS[agent](message, memory)
+
+    parts = []
+    try:
+        async with aclosing(ask_openai_stream(plan["system_prompt"], message, plan["memory"])) as tokens:
+            async for token in tokens:
+                parts.append(token)
+                yield {"event": "token", "data": {"text": token}}
+    except LLMError as e:
+        # 🩹 Failed before / during the reply → notice as the last token, nothing stored
+        notice = ("\n\n" if parts else "") + degraded_reply(e)
+        yield {"event": "token", "data": {"text": notice}}
+        yield {
+            "event": "done",
+            "data": {
+                "mode": "single",
+                "agent_used": agent,
+                "message_id": message_id,
+                "reply": "".join(parts) + notice,
+                "reflection_status": "skipped",
+                "cache": "miss",
+                **_degraded_fields(e),
+                "prompt_tokens": plan["token_report"],
+                **_timings_fields(started)
+            }
+        }
+        return
+
+    reply = "".join(parts)
+    add_message(chat_id, "assistant", reply)
+
+    # 🪞 Reflection runs in background; reply is complete already
+    task = schedule_reflection(message_id, reply, memory) if should_reflect() else None
+
+    # Reflection is picked up later through message_id
+    await remember_answer(domain, message, reply, message_id=message_id, memory=memory)
+
+    yield {
+        "event": "done",
+        "data": {
+            "mode": "single",
+            "agent_used": agent,
+            "message_id": message_id,
+            "reply": reply,
+            "reflection_status": "pending" if task else "skipped",
+            "cache": "miss",
+            "prompt_tokens": plan["token_report"],
+            **_timings_fields(started)
+        }
     }
 
+    if task is not None:
+        # shield → a client disconnect doesn't cancel the reflection itself
+        reflection = await asyncio.shield(task)
+        yield {
+            "event": "reflection",
+            "data": {
+                "message_id": message_id,
+                "confidence": reflection.get("confidence", 0.7),
+                "notes": reflection.get("notes", "")
+            }
+        }
+
 
 # =====================================================
 # 2️⃣ MULTI-AGENT VOTING MODE (ADVANCED / AUDIT)
 # =====================================================
-def run_agent_with_voting(chat_id: str, message: str) -> dict:
+async def run_agent_with_voting_async(chat_id: str, message: str) -> dict:
     # 🧠 Load memory
     memory = get_memory(chat_id)
 
     # 🧠 Save user message
     add_message(chat_id, "user", message)
 
-    # 🤖 Run all agents independently
-    answers = {
-        "law_agent": law_agent(message),
-        "police_agent": police_agent(message),
-        "press_agent": press_agent(message),
-    }
+    # ♻️ Answer cache first → only the misses need retrieval + LLM
+    # (voting agents answer without chat memory → no memory check needed)
+    cached = dict(zip(VOTING_AGENTS, await asyncio.gather(*[
+        lookup_answer(_voting_domain(name), message) for name in VOTING_AGENTS
+    ])))
+
+    # 🔍 ONE retrieval for every agent that still has to answer
+    timings = {}
+    missing = [_voting_domain(name) for name, hit in cached.items() if hit is None]
+    retrieval = asyncio.ensure_future(_timed_retrieval(message, missing, timings)) if missing else None
+
+    # 🤖 Run all agents concurrently (slow ones get cancelled)
+    try:
+        results = await asyncio.gather(*[
+            _run_voting_agent(name, agent_fn, message, cached[name], retrieval)
+            for name, agent_fn in VOTING_AGENTS.items()
+        ])
+    finally:
+        if retrieval is not None:
+            _discard(retrieval)
 
-    # ⚖️ Judge decides best answer
-    verdict = judge(message, answers)
+    answers = {name: reply for name, reply, _, _ in results if reply is not None}
+    errors = [error for _, _, _, error in results if error is not None]
+    timings.update({name: timing for name, _, timing, _ in results})
+
+    # ⚖️ Judge decides best answer (only over answers that came back)
+    if len(answers) > 1:
+        started = time.perf_counter()
+        try:
+            verdict, status = await judge_async(message, answers), "ok"
+        except LLMError as e:
+            # Judge down → any answer beats none
+            verdict, status = {
+                "winner": next(iter(answers)),
+                "confidence": 60,
+                "reason": f"Judge unavailable ({e.kind})"
+            }, e.kind
+        timings["judge"] = {
+            "status": status,
+            "seconds": round(time.perf_counter() - started, 3)
+        }
+    elif answers:
+        verdict = {
+            "winner": next(iter(answers)),
+            "confidence": 60,
+            "reason": "Only one agent answered in time"
+        }
+    else:
+        verdict = {
+            "winner": None,
+            "confidence": 0,
+            "reason": "No agent answered (timeouts / errors)"
+        }
 
     winner_key = verdict.get("winner", "law_agent")
-    final_answer = answers.get(winner_key, answers["law_agent"])
+    if winner_key not in answers:
+        winner_key = next(iter(answers), None)
+
+    if winner_key is None:
+        # 🩹 Nobody answered → retry notice, not remembered as an answer
+        return {
+            "mode": "voting",
+            "final_answer": degraded_reply(errors[0]) if errors else LLM_FAILURE_REPLY,
+            "winner": None,
+            "confidence": verdict["confidence"],
+            "reason": verdict["reason"],
+            "all_answers": answers,
+            **(_degraded_fields(errors[0]) if errors else {"degraded": True}),
+            "timings": timings
+        }
+
+    final_answer = answers[winner_key]
 
     # 🧠 Save ONLY final answer
     add_message(chat_id, "assistant", final_answer)
@@ -97,5 +458,67 @@ def run_agent_with_voting(chat_id: str, message: str) -> dict:
         "winner": winner_key,
         "confidence": verdict.get("confidence", 0.6),
         "reason": verdict.get("reason", ""),
-        "all_answers": answers  # dev/debug only
+        "all_answers": answers,  # dev/debug only
+        "timings": timings
+    }
+
+
+def _voting_domain(name: str) -> str:
+    return name.replace("_agent", "")
+
+
+def _discard(future: asyncio.Future) -> None:
+    """Nobody waits for the shared retrieval any more → cancel it, or mark its error seen"""
+    if not future.done():
+        future.cancel()
+    elif not future.cancelled():
+        future.exception()
+
+
+async def _timed_retrieval(message: str, domains: list, timings: dict) -> dict:
+    started = time.perf_counter()
+    chunks = await retrieve_multi_async(message, domains)
+    timings["retrieval"] = {
+        "domains": domains,
+        "seconds": round(time.perf_counter() - started, 3)
     }
+    return chunks
+
+
+async def _run_voting_agent(name: str, agent_fn, message: str, cached, retrieval) -> tuple:
+    """Run one voting agent with a timeout → (name, reply or None, timing, LLMError or None)"""
+    started = time.perf_counter()
+    error = None
+
+    domain = _voting_domain(name)
+
+    async def answer() -> str:
+        # shield → one agent timing out doesn't cancel the shared retrieval
+        chunks = (await asyncio.shield(retrieval))[domain]
+        # "vote" → queued behind single-mode replies when the rate budget is tight
+        return await agent_fn(message, chunks=chunks, route="vote")
+
+    try:
+        if cached is not None:
+            reply, status = cached["reply"], "cached"
+        else:
+            reply = await asyncio.wait_for(answer(), timeout=AGENT_TIMEOUT_S)
+            status = "ok"
+            await remember_answer(domain, message, reply)
+    except LLMError as e:
+        reply, status, error = None, e.kind, e
+    except asyncio.TimeoutError:
+        reply, status = None, "timeout"
+    except Exception as e:
+        print("🔥 AGENT ERROR:", name, e)
+        reply, status = None, "error"
+
+    return name, reply, {
+        "status": status,
+        "seconds": round(time.perf_counter() - started, 3)
+    }, error
+
+
+def run_agent_with_voting(chat_id: str, message: str) -> dict:
+    # Sync wrapper (old API)
+    return run_sync(run_agent_with_voting_async(chat_id, message))
@@ -1,21 +1,243 @@
 # app/agents/decide_agent.py
+#
+# 🚦 Intent router: which agent (LAW / POLICE / PRESS) answers a message.
+# The query's MiniLM vector (the same one retrieval uses, so it's cached) is
+# compared with per-domain exemplar vectors computed once at warm-up.
+# Low-margin cases fall back to word-boundary keyword rules.
 
-def decide_agent(message: str) -> str:
-    msg = message.lower()
+import os
+import re
+import threading
+from typing import Dict, Optional
 
-    # 📰 PRESS priority
-    if any(word in msg for word in [
-        "news", "article", "press", "media",
-        "headline", "journalist", "report"
-    ]):
-        return "PRESS"
+import numpy as np
+
+from app.services.metrics import stage
+from app.services.rag_retriever import embed_query, embed_query_async
+from app.services.vector_store import get_embedding
+
+
+# "embedding" (exemplars + keyword fallback) or "keywords" (rules only)
+INTENT_ROUTER = os.getenv("INTENT_ROUTER", "embedding")
 
+# Best minus second-best similarity below this → ask the keyword rules
+INTENT_MIN_MARGIN = float(os.getenv("INTENT_MIN_MARGIN", "0.04"))
+
+# Softmax temperature for the reported confidence
+INTENT_TEMPERATURE = 0.05
+
+DEFAULT_AGENT = "LAW"
+
+INTENT_EXEMPLARS = {
+    "LAW": [
+        "What is the punishment for murder under IPC?",
+        "Explain section 420 IPC cheating",
+        "IPC 302 enti?",
+        "Is theft a bailable offence?",
+        "What is the difference between culpable homicide and murder?",
+        "What does the Code of Criminal Procedure say about anticipatory bail?",
+        "Dowry death law in India",
+        "What is the punishment for domestic violence and cruelty by husband?",
+        "Right of private defence under Indian Penal Code",
+        "Can a magistrate order maintenance for a wife?",
+        "Defamation case ante emi punishment untadi?",
+        "Which sections apply for criminal breach of trust?",
+        "Is abetment of suicide punishable?",
+        "What are my legal rights if I am a tenant and the owner threatens me?",
+        "Section 498A misuse and legal remedies",
+        "How long can a trial court keep an undertrial in jail?",
+        "What is the limitation period for filing a criminal case?",
+        "Is cognizable offence ante enti, non-cognizable ante enti?",
+    ],
+    "POLICE": [
+        "How do I file an FIR at the police station?",
+        "Police FIR register cheyyadaniki refuse chesthe emi cheyyali?",
+        "What is a zero FIR?",
+        "Police arrested my brother without a warrant, what should we do?",
+        "How to file a complaint for a missing person?",
+        "How do I report cyber fraud to the police?",
+        "Can police detain someone for more than 24 hours?",
+        "What happens during a police investigation after a complaint?",
+        "Police sent me a notice to appear for questioning",
+        "How to get a copy of the FIR online?",
+        "My phone was stolen, how do I lodge a police complaint?",
+        "What should I do if police refuse to register my complaint?",
+        "Procedure for police verification for a passport",
+        "Traffic police challan dispute",
+        "Can the accused get bail from the police station itself?",
+        "Police custody lo torture chesthe ekkada complain cheyyali?",
+        "How does the police chargesheet process work?",
+        "Delhi police procedure for arrest of a woman",
+    ],
+    "PRESS": [
+        "Is this news article fake?",
+        "What are the Press Council of India norms for journalists?",
+        "Can a newspaper publish my photo without consent?",
+        "What is paid news?",
+        "How do I complain against a newspaper for a false story?",
+        "Journalist ethics on reporting about minors",
+        "Latest PIB press release from the government",
+        "Media trial gurinchi PCI guidelines enti?",
+        "Can journalists record phone conversations without permission?",
+        "Rules for reporting communal clashes in the media",
+        "What does the government press release say about the new scheme?",
+        "Headline was misleading, what can I do?",
+        "Right of reply when a newspaper publishes wrong facts about me",
+        "Is plagiarism by a journalist punishable by the press council?",
+        "TV channel showed my private video in the news",
+        "Guidelines for media coverage of elections",
+        "Press freedom and restrictions on reporting court cases",
+        "Newspaper advertisement ethics for astrology and medicines",
+    ],
+}
+
+# Keyword fallback (whole words only → "fir" no longer matches "confirm")
+KEYWORD_RULES = [
+    # 📰 PRESS priority
+    ("PRESS", ["news", "article", "articles", "press", "media", "headline", "headlines",
+               "journalist", "journalists", "journalism", "newspaper", "newspapers",
+               "editor", "pib", "pci", "channel"]),
     # 🚓 POLICE priority
-    if any(word in msg for word in [
-        "fir", "complaint", "investigation",
-        "arrest", "accused", "police"
-    ]):
-        return "POLICE"
-
-    # ⚖️ default LAW
-    return "LAW"
+    ("POLICE", ["fir", "complaint", "investigation", "arrest", "arrested", "accused",
+                "police", "custody", "chargesheet", "challan"]),
+]
+
+_KEYWORD_PATTERNS = [
+    (agent, re.compile(r"\b(?:" + "|".join(map(re.escape, words)) + r")\b"))
+    for agent, words in KEYWORD_RULES
+]
+
+_AGENTS = list(INTENT_EXEMPLARS)
+
+# Exemplar matrix (unit rows), each row's agent index, per-agent centroids
+_EXEMPLARS: Optional[np.ndarray] = None
+_EXEMPLAR_AGENT: Optional[np.ndarray] = None
+_CENTROIDS: Optional[np.ndarray] = None
+_DISABLED: Optional[str] = None
+_LOCK = threading.Lock()
+
+_STATS = {"embedding": 0, "keywords": 0, "fallback_low_margin": 0}
+
+
+def keyword_agent(message: str) -> Optional[str]:
+    """First keyword rule that matches (None → no rule fired)"""
+    msg = message.lower()
+    for agent, pattern in _KEYWORD_PATTERNS:
+        if pattern.search(msg):
+            return agent
+    return None
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def warm_up_router() -> bool:
+    """Embed the exemplars once (shared MiniLM); False → keyword-only routing"""
+    global _EXEMPLARS, _EXEMPLAR_AGENT, _CENTROIDS, _DISABLED
+
+    if _EXEMPLARS is not None or _DISABLED is not None:
+        return _EXEMPLARS is not None
+
+    with _LOCK:
+        if _EXEMPLARS is None and _DISABLED is None:
+            try:
+                texts = [text for agent in _AGENTS for text in INTENT_EXEMPLARS[agent]]
+                owners = [i for i, agent in enumerate(_AGENTS) for _ in INTENT_EXEMPLARS[agent]]
+
+                vectors = _unit_rows(np.asarray(get_embedding().embed_documents(texts), dtype=np.float32))
+                owners = np.asarray(owners)
+
+                _CENTROIDS = _unit_rows(np.stack([
+                    vectors[owners == i].mean(axis=0) for i in range(len(_AGENTS))
+                ]))
+                _EXEMPLAR_AGENT = owners
+                _EXEMPLARS = vectors
+            except Exception as e:
+                # No embedding model → keyword rules still route
+                _DISABLED = str(e)
+                print(f"⚠️ Intent router falling back to keywords: {e}")
+
+    return _EXEMPLARS is not None
+
+
+def _agent_scores(query_vector) -> np.ndarray:
+    """Per-agent similarity: mean of centroid and nearest-exemplar cosine"""
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / (np.linalg.norm(query) or 1.0)
+
+    exemplar_sims = _EXEMPLARS @ query
+    nearest = np.array([
+        exemplar_sims[_EXEMPLAR_AGENT == i].max() for i in range(len(_AGENTS))
+    ])
+    return 0.5 * (_CENTROIDS @ query) + 0.5 * nearest
+
+
+def classify_vector(message: str, query_vector) -> Dict:
+    """Route from an already computed query vector (no model call)"""
+    scores = _agent_scores(query_vector)
+    order = np.argsort(-scores)
+    best, second = scores[order[0]], scores[order[1]]
+    margin = float(best - second)
+
+    probs = np.exp((scores - best) / INTENT_TEMPERATURE)
+    probs /= probs.sum()
+
+    agent, method = _AGENTS[order[0]], "embedding"
+    if margin < INTENT_MIN_MARGIN:
+        # 🤏 Too close to call → keyword rules break the tie (if any fire)
+        keyword = keyword_agent(message)
+        if keyword is not None:
+            agent, method = keyword, "keywords"
+            _STATS["fallback_low_margin"] += 1
+
+    _STATS[method] += 1
+    return {
+        "agent": agent,
+        "confidence": round(float(probs[_AGENTS.index(agent)]), 3),
+        "margin": round(margin, 4),
+        "method": method,
+        "scores": {name: round(float(score), 4) for name, score in zip(_AGENTS, scores)},
+    }
+
+
+def _keyword_route(message: str) -> Dict:
+    _STATS["keywords"] += 1
+    keyword = keyword_agent(message)
+    return {
+        "agent": keyword or DEFAULT_AGENT,
+        "confidence": None,
+        "margin": None,
+        "method": "keywords" if keyword else "default",
+        "scores": {},
+    }
+
+
+def classify_intent(message: str) -> Dict:
+    """{"agent", "confidence", "margin", "method", "scores"}"""
+    if INTENT_ROUTER != "embedding" or not warm_up_router():
+        return _keyword_route(message)
+    return classify_vector(message, embed_query(message))
+
+
+async def classify_intent_async(message: str) -> Dict:
+    """Same as classify_intent; the query embedding runs off the event loop"""
+    with stage("route"):
+        if INTENT_ROUTER != "embedding" or not warm_up_router():
+            return _keyword_route(message)
+        return classify_vector(message, await embed_query_async(message))
+
+
+def decide_agent(message: str) -> str:
+    return classify_intent(message)["agent"]
+
+
+def get_router_stats() -> dict:
+    return {
+        "mode": INTENT_ROUTER,
+        "ready": _EXEMPLARS is not None,
+        "error": _DISABLED,
+        **_STATS,
+    }
@@ -1,22 +1,61 @@
+import json
+from contextlib import aclosing
+from typing import Literal
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.agents.agent_router import run_agent
+from app.agents.agent_router import run_agent_async, run_single_agent_stream
+from app.services.reflection import get_reflection
 
 router = APIRouter()
 
 class ChatRequest(BaseModel):
     chat_id: str
     message: str
+    mode: Literal["single", "voting"] = "single"
 
 @router.post("/chat")
-def chat_endpoint(payload: ChatRequest):
+async def chat_endpoint(payload: ChatRequest):
     try:
-        return run_agent(payload.chat_id, payload.message)
+        return await run_agent_async(payload.chat_id, payload.message, payload.mode)
     except Exception as e:
         print("🔥 ERROR INSIDE /chat:", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/chat/reflection/{message_id}")
+async def reflection_endpoint(message_id: str):
+    reflection = get_reflection(message_id)
+    if reflection is None:
+        raise HTTPException(status_code=404, detail="Unknown message_id")
+
+    return {"message_id": message_id, **reflection}
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(payload: ChatRequest):
+    async def event_source():
+        try:
+            # aclosing → a client disconnect closes the LLM stream right away
+            async with aclosing(run_single_agent_stream(payload.chat_id, payload.message)) as items:
+                async for item in items:
+                    yield _sse(item["event"], item["data"])
+        except Exception as e:
+            print("🔥 ERROR INSIDE /chat/stream:", e)
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 
 
 
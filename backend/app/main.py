@@ -1,6 +1,18 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.api.chat import router as chat_router
+from app.agents.decide_agent import get_router_stats, warm_up_router
+from app.services.vector_store import warm_up, get_registry_stats
+from app.services.semantic_cache import get_cache_stats
+from app.services.rag_retriever import get_retrieval_cache_stats
+from app.services.llm_client import get_llm_stats
+from app.services.memory_manager import get_memory_stats
+from app.services.metrics import render_prometheus
+from app.services.bm25_index import get_bm25_stats
+from app.services.flat_index import get_flat_stats
+from app.services.reranker import get_reranker_stats, warm_up_reranker
+from app.services.section_index import get_section_index_stats, load_index
 from dotenv import load_dotenv
 import os
 
@@ -22,8 +34,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.on_event("startup")
+def load_vector_stores():
+    # 🔥 Embedding model + all domain DBs ready before first request
+    warm_up()
+    load_index()
+    warm_up_reranker()
+    warm_up_router()
+
+
 @app.get("/")
 def root():
     return {"status": "Backend running 🚀"}
 
+
+@app.get("/stats")
+def stats():
+    return {
+        "retrieval": get_registry_stats(),
+        "answer_cache": get_cache_stats(),
+        "retrieval_cache": get_retrieval_cache_stats(),
+        "memory": get_memory_stats(),
+        "section_index": get_section_index_stats(),
+        "bm25": get_bm25_stats(),
+        "flat_index": get_flat_stats(),
+        "reranker": get_reranker_stats(),
+        "intent_router": get_router_stats(),
+        "llm": get_llm_stats(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # 📈 Prometheus scrape target (stage latency histograms + counters)
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
 app.include_router(chat_router)
@@ -0,0 +1,37 @@
+# Run coroutines from plain sync code
+# Old sync API (ask_openai, law_agent, run_agent ...) wraps the async path through this
+
+import asyncio
+import threading
+from typing import Any, Awaitable
+
+_LOOP = None
+_THREAD = None
+_LOCK = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Background event loop shared by all sync callers"""
+    global _LOOP, _THREAD
+
+    with _LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            _THREAD = threading.Thread(
+                target=_LOOP.run_forever,
+                name="async-runner",
+                daemon=True
+            )
+            _THREAD.start()
+
+    return _LOOP
+
+
+def run_sync(coro: Awaitable[Any]) -> Any:
+    """Block until a coroutine finishes on the background loop"""
+    loop = _get_loop()
+
+    if threading.current_thread() is _THREAD:
+        raise RuntimeError("run_sync() called from inside the async runner loop; await instead")
+
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
@@ -0,0 +1,184 @@
+# In-process BM25 index over the same chunks as each domain's Chroma DB
+# Built at ingestion time and stored as flat NumPy arrays (CSR postings):
+#
+#   bm25.npz        vocab, term_offsets, postings_doc, postings_tf, doc_len
+#   bm25_docs.json  [{"text", "metadata"}, ...] in doc-id order
+#
+# Exact legal terms ("cognizable", "culpable homicide", "498A") score on
+# term overlap, which MiniLM similarity often misses.
+
+import json
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+BM25_FILE = "bm25.npz"
+BM25_DOCS_FILE = "bm25_docs.json"
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have he her his in is it its of on or
+shall she that the their this to was were which who whom will with
+""".split())
+
+_INDEXES: Dict[str, "BM25Index"] = {}
+_VERSIONS: Dict[str, int] = {}
+_LOCK = threading.Lock()
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def build_arrays(texts: List[str]) -> Dict[str, np.ndarray]:
+    """BM25 postings for texts (doc id = position in the list)"""
+    term_docs: Dict[str, List[tuple]] = {}
+    doc_len = np.zeros(len(texts), dtype=np.int32)
+
+    for doc_id, text in enumerate(texts):
+        counts = Counter(tokenize(text))
+        doc_len[doc_id] = sum(counts.values())
+        for term, tf in counts.items():
+            term_docs.setdefault(term, []).append((doc_id, tf))
+
+    vocab = sorted(term_docs)
+    term_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    for i, term in enumerate(vocab):
+        term_offsets[i + 1] = term_offsets[i] + len(term_docs[term])
+
+    postings_doc = np.empty(term_offsets[-1], dtype=np.int32)
+    postings_tf = np.empty(term_offsets[-1], dtype=np.uint16)
+    for i, term in enumerate(vocab):
+        start, end = term_offsets[i], term_offsets[i + 1]
+        docs = term_docs[term]
+        postings_doc[start:end] = [doc_id for doc_id, _ in docs]
+        postings_tf[start:end] = [min(tf, 65535) for _, tf in docs]
+
+    return {
+        "vocab": np.array(vocab, dtype=np.str_),
+        "term_offsets": term_offsets,
+        "postings_doc": postings_doc,
+        "postings_tf": postings_tf,
+        "doc_len": doc_len,
+    }
+
+
+def save_index(db_path: str, texts: List[str], metadatas: List[dict]) -> None:
+    """Write bm25.npz + bm25_docs.json next to the Chroma files"""
+    directory = Path(db_path)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    docs_tmp = directory / (BM25_DOCS_FILE + ".tmp")
+    docs_tmp.write_text(
+        json.dumps([{"text": t, "metadata": m} for t, m in zip(texts, metadatas)], ensure_ascii=False),
+        encoding="utf-8"
+    )
+    os.replace(docs_tmp, directory / BM25_DOCS_FILE)
+
+    # Arrays last → their mtime is the index version the readers watch
+    arrays_tmp = directory / "bm25.tmp.npz"
+    np.savez_compressed(arrays_tmp, **build_arrays(texts))
+    os.replace(arrays_tmp, directory / BM25_FILE)
+
+
+class BM25Index:
+    """Loaded index for one domain DB (read-only, thread safe)"""
+
+    def __init__(self, db_path: str):
+        directory = Path(db_path)
+
+        with np.load(directory / BM25_FILE) as arrays:
+            vocab = arrays["vocab"]
+            self.term_offsets = arrays["term_offsets"]
+            self.postings_doc = arrays["postings_doc"]
+            self.postings_tf = arrays["postings_tf"].astype(np.float32)
+            doc_len = arrays["doc_len"].astype(np.float32)
+
+        self.docs = json.loads((directory / BM25_DOCS_FILE).read_text(encoding="utf-8"))
+        self.term_ids = {term: i for i, term in enumerate(vocab.tolist())}
+
+        n_docs = len(doc_len)
+        doc_freq = np.diff(self.term_offsets).astype(np.float32)
+        self.idf = np.log(1.0 + (n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+        # Per-doc length normalisation, precomputed once
+        avgdl = float(doc_len.mean()) if n_docs else 1.0
+        self.norm = BM25_K1 * (1.0 - BM25_B + BM25_B * doc_len / max(avgdl, 1e-9))
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def search(self, query: str, k: int = 4) -> List[dict]:
+        """Top-k docs by BM25: {"text", "score", "metadata"}"""
+        scores = np.zeros(len(self.docs), dtype=np.float32)
+
+        for term in set(tokenize(query)):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            docs = self.postings_doc[start:end]
+            tf = self.postings_tf[start:end]
+            # doc ids are unique within one posting list → plain fancy-index add
+            scores[docs] += self.idf[term_id] * tf * (BM25_K1 + 1.0) / (tf + self.norm[docs])
+
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+
+        k = min(k, len(matched))
+        top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        return [
+            {
+                "text": self.docs[i]["text"],
+                "score": round(float(scores[i]), 4),
+                "metadata": dict(self.docs[i]["metadata"] or {}),
+            }
+            for i in top
+        ]
+
+
+def index_version(db_path: str) -> int:
+    try:
+        return os.stat(os.path.join(db_path, BM25_FILE)).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def get_index(db_path: str) -> Optional[BM25Index]:
+    """Shared BM25 index for a DB (None until ingestion has built one)"""
+    version = index_version(db_path)
+    if not version:
+        return None
+
+    index = _INDEXES.get(db_path)
+    if index is not None and _VERSIONS.get(db_path) == version:
+        return index
+
+    with _LOCK:
+        if db_path not in _INDEXES or _VERSIONS.get(db_path) != version:
+            _INDEXES[db_path] = BM25Index(db_path)
+            _VERSIONS[db_path] = version
+
+    return _INDEXES[db_path]
+
+
+def bm25_search(query: str, db_path: str, k: int = 4) -> List[dict]:
+    index = get_index(db_path)
+    return index.search(query, k) if index is not None else []
+
+
+def get_bm25_stats() -> dict:
+    return {db_path: {"docs": len(index), "terms": len(index.term_ids)} for db_path, index in _INDEXES.items()}
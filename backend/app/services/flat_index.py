@@ -0,0 +1,193 @@
+# Quantized, memory-mapped flat vector index (alternative to Chroma HNSW)
+# Written next to each Chroma DB at ingestion time:
+#
+#   flat_vectors.npy   n × dim, int8 (per-vector scale) or float16
+#   flat_scales.npy    n float32 (int8 only)
+#   flat_text.bin      UTF-8 chunk texts, back to back
+#   flat_offsets.npy   n + 1 int64 byte offsets into flat_text.bin
+#   flat_meta.json     [metadata, ...]
+#
+# Everything big is opened with mmap → every uvicorn worker shares the same
+# page-cache pages instead of holding its own float32 copy. Search is a
+# blocked NumPy dot product (exact over the quantized vectors).
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+FLAT_VECTORS_FILE = "flat_vectors.npy"
+FLAT_SCALES_FILE = "flat_scales.npy"
+FLAT_TEXT_FILE = "flat_text.bin"
+FLAT_OFFSETS_FILE = "flat_offsets.npy"
+FLAT_META_FILE = "flat_meta.json"
+
+# "int8" (4× smaller than float32) or "float16" (2×, near-lossless)
+FLAT_INDEX_DTYPE = os.getenv("FLAT_INDEX_DTYPE", "int8")
+
+# Rows scored per step → bounds the float32 temporary during search
+SEARCH_BLOCK_ROWS = 65536
+
+_INDEXES: Dict[str, "FlatIndex"] = {}
+_VERSIONS: Dict[str, int] = {}
+_LOCK = threading.Lock()
+
+
+def quantize(vectors: np.ndarray, dtype: str = FLAT_INDEX_DTYPE):
+    """float32 matrix → (stored matrix, per-row scales or None)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype != "int8":
+        raise ValueError(f"Unknown flat index dtype: {dtype}")
+
+    # Symmetric per-vector scale: max |x| ↦ 127
+    scales = np.abs(vectors).max(axis=1, initial=0.0) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def _save_npy(path: Path, array: np.ndarray) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def save_index(db_path: str, vectors, texts: List[str], metadatas: List[dict],
+               dtype: str = FLAT_INDEX_DTYPE) -> None:
+    """Write the flat index files next to the Chroma files"""
+    directory = Path(db_path)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    # No chunks (empty / filtered-out sources) → an empty index, searches return []
+    matrix = (
+        np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+        if texts else np.zeros((0, 0), dtype=np.float32)
+    )
+    stored, scales = quantize(matrix, dtype)
+
+    encoded = [text.encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(blob) for blob in encoded])
+
+    text_tmp = directory / (FLAT_TEXT_FILE + ".tmp")
+    text_tmp.write_bytes(b"".join(encoded))
+    os.replace(text_tmp, directory / FLAT_TEXT_FILE)
+    _save_npy(directory / FLAT_OFFSETS_FILE, offsets)
+
+    meta_tmp = directory / (FLAT_META_FILE + ".tmp")
+    meta_tmp.write_text(json.dumps(metadatas, ensure_ascii=False), encoding="utf-8")
+    os.replace(meta_tmp, directory / FLAT_META_FILE)
+
+    if scales is not None:
+        _save_npy(directory / FLAT_SCALES_FILE, scales)
+    else:
+        (directory / FLAT_SCALES_FILE).unlink(missing_ok=True)
+
+    # Vectors last → their mtime is the index version the readers watch
+    _save_npy(directory / FLAT_VECTORS_FILE, stored)
+
+
+class FlatIndex:
+    """Read-only mmapped index for one domain DB"""
+
+    def __init__(self, db_path: str):
+        directory = Path(db_path)
+
+        self.vectors = np.load(directory / FLAT_VECTORS_FILE, mmap_mode="r")
+        self.scales = (
+            np.load(directory / FLAT_SCALES_FILE, mmap_mode="r")
+            if self.vectors.dtype == np.int8 else None
+        )
+        self.offsets = np.load(directory / FLAT_OFFSETS_FILE, mmap_mode="r")
+        # np.memmap can't map an empty file
+        if self.offsets[-1]:
+            self.text = np.memmap(directory / FLAT_TEXT_FILE, dtype=np.uint8, mode="r")
+        else:
+            self.text = np.zeros(0, dtype=np.uint8)
+        self.metadatas = json.loads((directory / FLAT_META_FILE).read_text(encoding="utf-8"))
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def dtype(self) -> str:
+        return str(self.vectors.dtype)
+
+    def nbytes(self) -> int:
+        scales = self.scales.nbytes if self.scales is not None else 0
+        return int(self.vectors.nbytes + scales)
+
+    def chunk_text(self, i: int) -> str:
+        return bytes(self.text[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def scores(self, query) -> np.ndarray:
+        """Approximate cosine similarity of the query to every stored vector"""
+        query = np.asarray(query, dtype=np.float32)
+        out = np.empty(len(self.vectors), dtype=np.float32)
+
+        for start in range(0, len(self.vectors), SEARCH_BLOCK_ROWS):
+            block = self.vectors[start:start + SEARCH_BLOCK_ROWS]
+            out[start:start + len(block)] = block.astype(np.float32) @ query
+
+        if self.scales is not None:
+            out *= self.scales
+        return out
+
+    def search(self, query, k: int = 4) -> List[dict]:
+        """Top-k chunks, same shape as the Chroma path: {"text", "score", "metadata"}"""
+        if not len(self.vectors):
+            return []
+
+        scores = self.scores(query)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        return [
+            {
+                "text": self.chunk_text(i),
+                "score": round(float(scores[i]), 4),
+                "metadata": dict(self.metadatas[i] or {}),
+            }
+            for i in top
+        ]
+
+
+def index_version(db_path: str) -> int:
+    try:
+        return os.stat(os.path.join(db_path, FLAT_VECTORS_FILE)).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def get_index(db_path: str) -> Optional[FlatIndex]:
+    """Shared flat index for a DB (None until ingestion has built one)"""
+    version = index_version(db_path)
+    if not version:
+        return None
+
+    index = _INDEXES.get(db_path)
+    if index is not None and _VERSIONS.get(db_path) == version:
+        return index
+
+    with _LOCK:
+        if db_path not in _INDEXES or _VERSIONS.get(db_path) != version:
+            _INDEXES[db_path] = FlatIndex(db_path)
+            _VERSIONS[db_path] = version
+
+    return _INDEXES[db_path]
+
+
+def get_flat_stats() -> dict:
+    return {
+        db_path: {"vectors": len(index), "dtype": index.dtype, "bytes": index.nbytes()}
+        for db_path, index in _INDEXES.items()
+    }
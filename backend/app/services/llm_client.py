@@ -0,0 +1,456 @@
+# Resilience layer for every LLM call: limits, retries, hedging, breaker
+#
+#   call(route, request, tokens)  → result of `await request()`, or a typed LLMError
+#   stream(route, open_stream, tokens) → async iterator; retried only until it opens
+#
+# route ("reply", "vote", "judge", "reflect") picks a per-route concurrency cap
+# on top of the global one and the call's place in the rate limiter's queue
+# (tokens = estimated prompt + completion). Failures surface as LLMError subclasses so callers can
+# degrade (skip caching / reflection, tell the user to retry) instead of
+# treating an error string as an answer.
+
+import asyncio
+import email.utils
+import os
+import random
+import time
+import weakref
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+
+import openai
+
+from app.services import rate_limiter
+from app.services.metrics import inc
+
+
+# ⏱️ Per-attempt limits (seconds); the read timeout is per received chunk
+LLM_CONNECT_TIMEOUT_S = float(os.getenv("LLM_CONNECT_TIMEOUT_S", "5"))
+LLM_READ_TIMEOUT_S = float(os.getenv("LLM_READ_TIMEOUT_S", "30"))
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "60"))
+
+# 🔁 Retries on 429 / 5xx / timeouts / connection errors (full jitter backoff)
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_S = float(os.getenv("LLM_RETRY_BASE_S", "0.5"))
+LLM_RETRY_MAX_S = float(os.getenv("LLM_RETRY_MAX_S", "8"))
+
+# Retry-After longer than this → give up now rather than hold the request
+LLM_RETRY_AFTER_MAX_S = float(os.getenv("LLM_RETRY_AFTER_MAX_S", "20"))
+
+# 🚦 In-flight calls: all routes together, and per route ("reply=32,judge=16")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_ROUTE_LIMITS = {
+    route: int(limit)
+    for route, limit in (
+        item.split("=") for item in os.getenv("LLM_ROUTE_LIMITS", "judge=16,reflect=16").split(",") if item
+    )
+}
+
+# 🐇 Hedging: no answer after this long → fire a 2nd identical request, first wins (0 = off)
+LLM_HEDGE_AFTER_MS = float(os.getenv("LLM_HEDGE_AFTER_MS", "0"))
+
+# 🔌 Circuit breaker: this many upstream failures in a row → fail fast for the cooldown
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN_S = float(os.getenv("LLM_BREAKER_COOLDOWN_S", "30"))
+
+# Half-open probe with no outcome after this long → presumed lost, next call probes
+LLM_BREAKER_PROBE_TIMEOUT_S = float(os.getenv("LLM_BREAKER_PROBE_TIMEOUT_S", str(LLM_TIMEOUT_S)))
+
+# User-facing text when no answer could be produced
+LLM_FAILURE_REPLY = "⚠️ AI response failed. Please try again."
+LLM_BUSY_REPLY = "⚠️ The assistant is busy right now. Please try again in a moment."
+
+
+# =====================================================
+# ❌ TYPED ERRORS
+# =====================================================
+class LLMError(Exception):
+    """Base class: the LLM call produced no usable answer"""
+    kind = "error"
+    retryable = False
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMTimeoutError(LLMError):
+    kind = "timeout"
+    retryable = True
+
+
+class LLMRateLimitError(LLMError):
+    kind = "rate_limited"
+    retryable = True
+
+
+class LLMShedError(LLMRateLimitError):
+    """Dropped by our own rate limiter (queue too deep / waited too long)"""
+    kind = "shed"
+    retryable = False
+
+
+class LLMUnavailableError(LLMError):
+    """5xx or connection failure"""
+    kind = "unavailable"
+    retryable = True
+
+
+class LLMCircuitOpenError(LLMUnavailableError):
+    """Breaker open → not even attempted"""
+    kind = "circuit_open"
+    retryable = False
+
+
+class LLMRequestError(LLMError):
+    """4xx other than 429 (bad request, auth, ...) → retrying won't help"""
+    kind = "bad_request"
+
+
+def degraded_reply(error: LLMError) -> str:
+    if isinstance(error, (LLMRateLimitError, LLMCircuitOpenError)):
+        return LLM_BUSY_REPLY
+    return LLM_FAILURE_REPLY
+
+
+def _retry_after(response) -> Optional[float]:
+    """Seconds from Retry-After / retry-after-ms (None if absent)"""
+    if response is None:
+        return None
+
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            # HTTP-date form
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def to_llm_error(exc: BaseException) -> LLMError:
+    """OpenAI SDK / asyncio exception → typed LLMError"""
+    if isinstance(exc, LLMError):
+        return exc
+    if isinstance(exc, (openai.APITimeoutError, asyncio.TimeoutError)):
+        return LLMTimeoutError(str(exc) or "LLM call timed out")
+    if isinstance(exc, openai.RateLimitError):
+        return LLMRateLimitError(str(exc), retry_after=_retry_after(exc.response))
+    if isinstance(exc, openai.APIConnectionError):
+        return LLMUnavailableError(str(exc))
+    if isinstance(exc, openai.APIStatusError):
+        if exc.status_code >= 500:
+            return LLMUnavailableError(str(exc), retry_after=_retry_after(exc.response))
+        return LLMRequestError(str(exc))
+    return LLMError(f"{type(exc).__name__}: {exc}")
+
+
+# =====================================================
+# 🔌 CIRCUIT BREAKER
+# =====================================================
+class CircuitBreaker:
+    """closed → (N upstream failures) → open → (cooldown) → half-open: one probe"""
+
+    def __init__(self, failures: int = LLM_BREAKER_FAILURES, cooldown_s: float = LLM_BREAKER_COOLDOWN_S,
+                 probe_timeout_s: float = LLM_BREAKER_PROBE_TIMEOUT_S):
+        self.threshold = failures
+        self.cooldown_s = cooldown_s
+        self.probe_timeout_s = probe_timeout_s
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.probe_started = 0.0
+        self.opened_count = 0
+
+    def allow(self) -> Optional[float]:
+        """None → rejected; else a token, non-zero when this call is the probe"""
+        if self.state == "closed":
+            return 0.0
+
+        now = time.monotonic()
+        if self.state == "open":
+            if now - self.opened_at < self.cooldown_s:
+                return None
+            self.state = "half_open"
+
+        # half-open: exactly one request tests the upstream (a stale probe is given up)
+        if self.probing and now - self.probe_started < self.probe_timeout_s:
+            return None
+        self.probing = True
+        self.probe_started = now
+        return now
+
+    def abandon(self, token: Optional[float]) -> None:
+        """The probe was cancelled before it had an outcome → open again"""
+        if token and self.probing and token == self.probe_started:
+            self.probing = False
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self.probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.probing = False
+        if self.state == "half_open" or self.failures >= self.threshold:
+            if self.state != "open":
+                self.opened_count += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def record_neutral(self) -> None:
+        """Rate limited / bad request: says nothing about upstream health"""
+        self.probing = False
+        if self.state == "half_open":
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+_BREAKER = CircuitBreaker()
+
+# Semaphores are bound to the loop they're used on (same as the pooled clients)
+_LIMITS = weakref.WeakKeyDictionary()
+
+_STATS = {"calls": 0, "retries": 0, "hedged": 0, "hedge_wins": 0, "breaker_rejected": 0}
+
+
+def _limits() -> Dict[str, asyncio.Semaphore]:
+    loop = asyncio.get_running_loop()
+    limits = _LIMITS.get(loop)
+
+    if limits is None:
+        limits = {"*": asyncio.Semaphore(LLM_MAX_CONCURRENCY)}
+        limits.update({route: asyncio.Semaphore(limit) for route, limit in LLM_ROUTE_LIMITS.items()})
+        _LIMITS[loop] = limits
+
+    return limits
+
+
+class _Slot:
+    """Global + per-route concurrency slot (async context manager)"""
+
+    def __init__(self, route: str):
+        limits = _limits()
+        self.semaphores = [limits[route]] if route in limits else []
+        # Route first, global last → a saturated route doesn't hold global slots
+        self.semaphores.append(limits["*"])
+
+    async def __aenter__(self):
+        acquired = []
+        try:
+            for semaphore in self.semaphores:
+                await semaphore.acquire()
+                acquired.append(semaphore)
+        except BaseException:
+            for semaphore in acquired:
+                semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        for semaphore in self.semaphores:
+            semaphore.release()
+
+
+async def _admit(route: str, tokens: float) -> None:
+    """Wait for RPM / TPM budget (priority queue) or raise LLMShedError"""
+    if not await rate_limiter.acquire(route, tokens):
+        raise LLMShedError(f"LLM {route} call shed by the rate limiter",
+                           retry_after=rate_limiter.max_wait(route))
+
+
+def _check_breaker() -> float:
+    """Probe token for _BREAKER.abandon (0.0 → not the probe)"""
+    token = _BREAKER.allow()
+    if token is None:
+        _STATS["breaker_rejected"] += 1
+        raise LLMCircuitOpenError("LLM circuit breaker open", retry_after=LLM_BREAKER_COOLDOWN_S)
+    return token
+
+
+def _record(error: Optional[LLMError]) -> None:
+    if error is None:
+        _BREAKER.record_success()
+    elif isinstance(error, (LLMUnavailableError, LLMTimeoutError)):
+        _BREAKER.record_failure()
+    else:
+        _BREAKER.record_neutral()
+
+
+def _backoff(attempt: int, error: LLMError) -> Optional[float]:
+    """Seconds to wait before the next attempt (None → don't retry)"""
+    if not error.retryable or attempt >= LLM_MAX_RETRIES:
+        return None
+
+    # Full jitter: uniform(0, min(cap, base · 2^attempt))
+    delay = random.uniform(0, min(LLM_RETRY_MAX_S, LLM_RETRY_BASE_S * 2 ** attempt))
+
+    if error.retry_after is not None:
+        if error.retry_after > LLM_RETRY_AFTER_MAX_S:
+            return None
+        # Server told us when → never earlier, small jitter so retries don't align
+        delay = error.retry_after + random.uniform(0, LLM_RETRY_BASE_S)
+
+    return delay
+
+
+async def _hedged(request: Callable[[], Awaitable], tokens: float) -> object:
+    """First successful result of request() and, if it's slow, one duplicate"""
+    first = asyncio.ensure_future(request())
+    tasks = [first]
+
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=LLM_HEDGE_AFTER_MS / 1000)
+        if not done:
+            global_slot = _limits()["*"]
+            # Only hedge with spare capacity, spare budget and a healthy upstream
+            if (not global_slot.locked() and _BREAKER.state == "closed"
+                    and rate_limiter.try_acquire(tokens)):
+                await global_slot.acquire()
+                second = asyncio.ensure_future(request())
+                second.add_done_callback(lambda _: global_slot.release())
+                tasks.append(second)
+                _STATS["hedged"] += 1
+
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None:
+                    if task is not first:
+                        _STATS["hedge_wins"] += 1
+                    return task.result()
+
+        # Every attempt failed → report the original one
+        return first.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _failed(route: str, attempt: int, exc: Exception) -> float:
+    """Account for a failed attempt → seconds to wait, or raise the typed error"""
+    error = to_llm_error(exc)
+    if not isinstance(error, (LLMCircuitOpenError, LLMShedError)):
+        _record(error)
+
+    if type(error) is LLMRateLimitError and (error.retry_after or 0) <= LLM_RETRY_AFTER_MAX_S:
+        # Upstream 429 → hold every queued call, not just this one's retry
+        rate_limiter.pause(error.retry_after or LLM_RETRY_BASE_S)
+
+    delay = _backoff(attempt, error)
+    if delay is None:
+        inc("lawai_llm_calls_total", route=route, outcome=error.kind)
+        raise error from exc
+
+    _STATS["retries"] += 1
+    inc("lawai_llm_retries_total", route=route, reason=error.kind)
+    print(f"🔁 LLM {route} retry {attempt + 1}/{LLM_MAX_RETRIES} in {delay:.2f}s: {error.kind}")
+    return delay
+
+
+async def call(route: str, request: Callable[[], Awaitable], tokens: float = 0) -> object:
+    """Run request() under the limits, with timeout, retries, hedging, breaker"""
+    _STATS["calls"] += 1
+    attempt = 0
+
+    while True:
+        probe = 0.0
+        try:
+            # Every attempt is a request against the account's RPM / TPM
+            await _admit(route, tokens)
+            probe = _check_breaker()
+            # Slot held per attempt → backoff sleeps don't block other calls
+            async with _Slot(route):
+                if LLM_HEDGE_AFTER_MS > 0:
+                    result = await asyncio.wait_for(_hedged(request, tokens), LLM_TIMEOUT_S)
+                else:
+                    result = await asyncio.wait_for(request(), LLM_TIMEOUT_S)
+        except Exception as exc:
+            await asyncio.sleep(_failed(route, attempt, exc))
+            attempt += 1
+            continue
+        except BaseException:
+            # Cancelled by the caller (agent timeout, client gone) → no outcome
+            _BREAKER.abandon(probe)
+            raise
+
+        _record(None)
+        inc("lawai_llm_calls_total", route=route, outcome="ok")
+        return result
+
+
+async def stream(route: str, open_stream: Callable[[], Awaitable], tokens: float = 0) -> AsyncIterator:
+    """Items of the stream; opening is retried, a failure mid-stream raises LLMError"""
+    _STATS["calls"] += 1
+    attempt = 0
+
+    while True:
+        slot = _Slot(route)
+        probe = 0.0
+        try:
+            await _admit(route, tokens)
+            probe = _check_breaker()
+            await slot.__aenter__()
+        except Exception as exc:
+            await asyncio.sleep(_failed(route, attempt, exc))
+            attempt += 1
+            continue
+        except BaseException:
+            _BREAKER.abandon(probe)
+            raise
+
+        # The slot stays taken until the last chunk has been read
+        try:
+            try:
+                response = await asyncio.wait_for(open_stream(), LLM_TIMEOUT_S)
+            except Exception as exc:
+                delay = _failed(route, attempt, exc)
+            else:
+                try:
+                    async for item in response:
+                        yield item
+                except Exception as exc:
+                    # Tokens may already be out → no retry from here
+                    error = to_llm_error(exc)
+                    _record(error)
+                    inc("lawai_llm_calls_total", route=route, outcome=error.kind)
+                    raise error from exc
+
+                _record(None)
+                inc("lawai_llm_calls_total", route=route, outcome="ok")
+                return
+        except BaseException:
+            # Cancelled / generator closed (client disconnected) mid-call;
+            # no-op when the outcome was already recorded
+            _BREAKER.abandon(probe)
+            raise
+        finally:
+            await slot.__aexit__(None, None, None)
+
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+def get_llm_stats() -> dict:
+    return {
+        **_STATS,
+        "breaker": {
+            "state": _BREAKER.state,
+            "consecutive_failures": _BREAKER.failures,
+            "times_opened": _BREAKER.opened_count,
+        },
+        "max_concurrency": LLM_MAX_CONCURRENCY,
+        "route_limits": LLM_ROUTE_LIMITS,
+        "hedge_after_ms": LLM_HEDGE_AFTER_MS,
+        "rate_limit": rate_limiter.get_rate_limit_stats(),
+    }
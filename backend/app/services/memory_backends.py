@@ -0,0 +1,418 @@
+# Storage backends for conversation memory
+# Every backend stores per chat: a rolling summary + the recent messages
+#
+#   InMemoryBackend → process-local, LRU + idle TTL (default, dev)
+#   SQLiteBackend   → one file, WAL mode, shared by all uvicorn workers on a box
+#   RedisBackend    → any Redis-protocol server (redis, valkey, local stand-in)
+
+import json
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+
+Message = Dict[str, str]
+
+# (old summary, messages folded out) → new summary
+Fold = Callable[[str, List[Message]], str]
+
+
+def _split(messages: List[Message], keep_recent: int) -> int:
+    """How many of the oldest messages fold away (keep_recent=0 → all of them)"""
+    return max(0, len(messages) - max(0, keep_recent))
+
+
+# =====================================================
+# 🧠 IN-PROCESS
+# =====================================================
+class InMemoryBackend:
+    def __init__(self, ttl: float, max_chats: int):
+        self.ttl = ttl
+        self.max_chats = max_chats
+        self._chats: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self) -> None:
+        now = time.time()
+
+        # Oldest-touched first → stop at the first chat still alive
+        while self._chats:
+            chat_id, chat = next(iter(self._chats.items()))
+            if now - chat["touched"] <= self.ttl and len(self._chats) <= self.max_chats:
+                break
+            del self._chats[chat_id]
+
+    def load(self, chat_id: str) -> Tuple[str, List[Message]]:
+        with self._lock:
+            self._evict()
+            chat = self._chats.get(chat_id)
+            if chat is None:
+                return "", []
+            return chat["summary"], list(chat["messages"])
+
+    def append(self, chat_id: str, message: Message) -> int:
+        with self._lock:
+            chat = self._chats.setdefault(chat_id, {"summary": "", "messages": []})
+            chat["messages"].append(message)
+            chat["touched"] = time.time()
+            self._chats.move_to_end(chat_id)
+            self._evict()
+            return len(chat["messages"])
+
+    def compact(self, chat_id: str, keep_recent: int, fold: Fold) -> None:
+        with self._lock:
+            chat = self._chats.get(chat_id)
+            if chat is None:
+                return
+            split = _split(chat["messages"], keep_recent)
+            if split:
+                chat["summary"] = fold(chat["summary"], chat["messages"][:split])
+                del chat["messages"][:split]
+
+    def delete(self, chat_id: str) -> None:
+        with self._lock:
+            self._chats.pop(chat_id, None)
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "chats": len(self._chats)}
+
+
+# =====================================================
+# 🗄️ SQLITE (WAL)
+# =====================================================
+class SQLiteBackend:
+    # Run the idle-chat sweep once every N writes
+    SWEEP_EVERY = 200
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chat_meta (
+                chat_id TEXT PRIMARY KEY,
+                summary TEXT NOT NULL DEFAULT '',
+                touched REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS chat_messages (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                chat_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_chat_messages_chat
+                ON chat_messages (chat_id, seq);
+            CREATE INDEX IF NOT EXISTS idx_chat_meta_touched
+                ON chat_meta (touched);
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread (sqlite3 connections aren't thread-safe)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, chat_id: str) -> Tuple[str, List[Message]]:
+        conn = self._conn()
+
+        row = conn.execute(
+            "SELECT summary, touched FROM chat_meta WHERE chat_id = ?",
+            (chat_id,)
+        ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return "", []
+
+        messages = [
+            {"role": role, "content": content}
+            for role, content in conn.execute(
+                "SELECT role, content FROM chat_messages WHERE chat_id = ? ORDER BY seq",
+                (chat_id,)
+            )
+        ]
+        return row[0], messages
+
+    def append(self, chat_id: str, message: Message) -> int:
+        conn = self._conn()
+        now = time.time()
+
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+
+            # Expired but not swept yet → start the chat fresh
+            row = conn.execute(
+                "SELECT touched FROM chat_meta WHERE chat_id = ?",
+                (chat_id,)
+            ).fetchone()
+            if row is not None and now - row[0] > self.ttl:
+                conn.execute("DELETE FROM chat_messages WHERE chat_id = ?", (chat_id,))
+                conn.execute("UPDATE chat_meta SET summary = '' WHERE chat_id = ?", (chat_id,))
+
+            conn.execute(
+                """INSERT INTO chat_meta (chat_id, touched) VALUES (?, ?)
+                   ON CONFLICT(chat_id) DO UPDATE SET touched = excluded.touched""",
+                (chat_id, now)
+            )
+            conn.execute(
+                "INSERT INTO chat_messages (chat_id, role, content) VALUES (?, ?, ?)",
+                (chat_id, message["role"], message["content"])
+            )
+            count = conn.execute(
+                "SELECT COUNT(*) FROM chat_messages WHERE chat_id = ?",
+                (chat_id,)
+            ).fetchone()[0]
+
+        self._writes += 1
+        if self._writes % self.SWEEP_EVERY == 0:
+            self.sweep()
+
+        return count
+
+    def compact(self, chat_id: str, keep_recent: int, fold: Fold) -> None:
+        conn = self._conn()
+
+        # Read + rewrite under one write lock → no append lands in between
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+
+            row = conn.execute(
+                "SELECT summary FROM chat_meta WHERE chat_id = ?",
+                (chat_id,)
+            ).fetchone()
+            if row is None:
+                return
+
+            rows = conn.execute(
+                "SELECT seq, role, content FROM chat_messages WHERE chat_id = ? ORDER BY seq",
+                (chat_id,)
+            ).fetchall()
+            split = _split(rows, keep_recent)
+            if not split:
+                return
+
+            overflow = [{"role": role, "content": content} for _, role, content in rows[:split]]
+            conn.execute(
+                "DELETE FROM chat_messages WHERE chat_id = ? AND seq <= ?",
+                (chat_id, rows[split - 1][0])
+            )
+            conn.execute(
+                "UPDATE chat_meta SET summary = ? WHERE chat_id = ?",
+                (fold(row[0], overflow), chat_id)
+            )
+
+    def delete(self, chat_id: str) -> None:
+        conn = self._conn()
+
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM chat_messages WHERE chat_id = ?", (chat_id,))
+            conn.execute("DELETE FROM chat_meta WHERE chat_id = ?", (chat_id,))
+
+    def sweep(self) -> None:
+        """Delete chats idle for longer than the TTL"""
+        conn = self._conn()
+        cutoff = time.time() - self.ttl
+
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                """DELETE FROM chat_messages WHERE chat_id IN
+                   (SELECT chat_id FROM chat_meta WHERE touched < ?)""",
+                (cutoff,)
+            )
+            conn.execute("DELETE FROM chat_meta WHERE touched < ?", (cutoff,))
+
+    def stats(self) -> dict:
+        chats = self._conn().execute("SELECT COUNT(*) FROM chat_meta").fetchone()[0]
+        return {"backend": "sqlite", "path": self.path, "chats": chats}
+
+
+# =====================================================
+# 🔴 REDIS PROTOCOL (RESP2, no client library needed)
+# =====================================================
+class _RespClient:
+    def __init__(self, url: str, timeout: float = 5.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int((parsed.path or "/0").lstrip("/") or 0)
+        self.password = parsed.password
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._file = self._sock.makefile("rb")
+
+        if self.password:
+            self._call("AUTH", self.password)
+        if self.db:
+            self._call("SELECT", self.db)
+
+    def _send(self, *args) -> None:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._sock.sendall(b"".join(out))
+
+    def _read(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RuntimeError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            size = int(rest)
+            if size == -1:
+                return None
+            data = self._file.read(size + 2)
+            return data[:-2].decode("utf-8")
+        if kind == b"*":
+            size = int(rest)
+            return None if size == -1 else [self._read() for _ in range(size)]
+
+        raise RuntimeError(f"Unexpected Redis reply: {line!r}")
+
+    def _call(self, *args):
+        self._send(*args)
+        return self._read()
+
+    def _exchange(self, commands) -> list:
+        if self._sock is None:
+            self._connect()
+        try:
+            for command in commands:
+                self._send(*command)
+            return [self._read() for _ in commands]
+        except Exception:
+            # Replies may be left unread → the socket is out of step, drop it
+            self.close()
+            raise
+
+    def pipeline(self, *commands) -> list:
+        """Send several commands in one round-trip, return all replies"""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    return self._exchange(commands)
+                except (ConnectionError, OSError):
+                    # Stale socket → reconnect once
+                    if attempt:
+                        raise
+
+    def transaction(self, watch, reads, build, retries: int = 5):
+        """WATCH `watch`, run `reads`, then MULTI + build(replies) + EXEC
+
+        Retried from the WATCH when another client changed a watched key in
+        between; build returning None → nothing to write. Holds the lock
+        throughout: WATCH state belongs to the connection.
+        """
+        with self._lock:
+            for attempt in range(retries):
+                try:
+                    replies = self._exchange([("WATCH", *watch), *reads])[1:]
+                    commands = build(replies)
+                    if commands is None:
+                        self._exchange([("UNWATCH",)])
+                        return None
+                    result = self._exchange([("MULTI",), *commands, ("EXEC",)])[-1]
+                except (ConnectionError, OSError):
+                    # Reconnecting drops the WATCH → start over, not mid-way
+                    if attempt == retries - 1:
+                        raise
+                    continue
+                if result is not None:
+                    return result
+            raise RuntimeError(f"Redis transaction on {watch} kept conflicting")
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+                self._file = None
+
+
+class RedisBackend:
+    def __init__(self, url: str, ttl: float, prefix: str = "lawai:mem"):
+        self.ttl = int(ttl)
+        self.prefix = prefix
+        self._client = _RespClient(url)
+
+    def _keys(self, chat_id: str) -> Tuple[str, str]:
+        return f"{self.prefix}:{chat_id}:messages", f"{self.prefix}:{chat_id}:summary"
+
+    def load(self, chat_id: str) -> Tuple[str, List[Message]]:
+        messages_key, summary_key = self._keys(chat_id)
+        raw_messages, summary = self._client.pipeline(
+            ("LRANGE", messages_key, 0, -1),
+            ("GET", summary_key),
+        )
+        return summary or "", [json.loads(item) for item in raw_messages or []]
+
+    def append(self, chat_id: str, message: Message) -> int:
+        messages_key, summary_key = self._keys(chat_id)
+        # Idle TTL: every write pushes expiry forward for both keys
+        count, _, _ = self._client.pipeline(
+            ("RPUSH", messages_key, json.dumps(message, ensure_ascii=False)),
+            ("EXPIRE", messages_key, self.ttl),
+            ("EXPIRE", summary_key, self.ttl),
+        )
+        return count
+
+    def compact(self, chat_id: str, keep_recent: int, fold: Fold) -> None:
+        messages_key, summary_key = self._keys(chat_id)
+
+        def build(replies):
+            raw_messages, summary = replies
+            raw_messages = raw_messages or []
+            split = _split(raw_messages, keep_recent)
+            if not split:
+                return None
+            overflow = [json.loads(item) for item in raw_messages[:split]]
+            # Appends only add to the tail → LTRIM drops exactly what was folded
+            return [
+                ("LTRIM", messages_key, split, -1),
+                ("SET", summary_key, fold(summary or "", overflow), "EX", self.ttl),
+            ]
+
+        self._client.transaction(
+            (messages_key, summary_key),
+            [("LRANGE", messages_key, 0, -1), ("GET", summary_key)],
+            build,
+        )
+
+    def delete(self, chat_id: str) -> None:
+        self._client.pipeline(("DEL", *self._keys(chat_id)))
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "host": self._client.host, "port": self._client.port}
+
+
+def create_backend(kind: str, ttl: float, max_chats: int,
+                   sqlite_path: str, redis_url: Optional[str]):
+    if kind == "sqlite":
+        return SQLiteBackend(sqlite_path, ttl)
+    if kind == "redis":
+        return RedisBackend(redis_url, ttl)
+    return InMemoryBackend(ttl, max_chats)
@@ -1,36 +1,100 @@
-# Simple in-memory conversation store
-# Later we can replace with Redis / DB / Vector DB
+# Conversation memory store
+# Backend is pluggable (MEMORY_BACKEND = memory | sqlite | redis), see memory_backends.py
+# Each chat keeps at most MEMORY_MAX_MESSAGES; older turns fold into a rolling summary
 
+import os
 from typing import List, Dict
 
-# Structure:
-# {
-#   "chat_id_1": [
-#       {"role": "user", "content": "..."},
-#       {"role": "assistant", "content": "..."}
-#   ]
-# }
+from app.services.memory_backends import create_backend
 
-_MEMORY_STORE: Dict[str, List[Dict[str, str]]] = {}
+# Structure returned by get_memory():
+# [
+#   {"role": "system", "content": "Earlier conversation summary: ..."},   (only once compacted)
+#   {"role": "user", "content": "..."},
+#   {"role": "assistant", "content": "..."}
+# ]
+
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "memory")
+MEMORY_SQLITE_PATH = os.getenv("MEMORY_SQLITE_PATH", "memory.sqlite3")
+MEMORY_REDIS_URL = os.getenv("MEMORY_REDIS_URL", "redis://localhost:6379/0")
+
+# Idle chats expire after this many seconds; in-process backend also caps chat count
+MEMORY_TTL_S = float(os.getenv("MEMORY_TTL_S", "86400"))
+MEMORY_MAX_CHATS = int(os.getenv("MEMORY_MAX_CHATS", "10000"))
+
+# Compaction: above MAX messages, keep the KEEP_RECENT newest verbatim (0 → summary only)
+MEMORY_MAX_MESSAGES = int(os.getenv("MEMORY_MAX_MESSAGES", "20"))
+MEMORY_KEEP_RECENT = max(0, int(os.getenv("MEMORY_KEEP_RECENT", "10")))
+
+# Rolling summary size cap (characters) + per-message snippet length
+MEMORY_SUMMARY_MAX_CHARS = int(os.getenv("MEMORY_SUMMARY_MAX_CHARS", "2000"))
+MEMORY_SNIPPET_CHARS = 200
+
+SUMMARY_PREFIX = "Earlier conversation summary:\n"
+
+_BACKEND = create_backend(
+    MEMORY_BACKEND,
+    ttl=MEMORY_TTL_S,
+    max_chats=MEMORY_MAX_CHATS,
+    sqlite_path=MEMORY_SQLITE_PATH,
+    redis_url=MEMORY_REDIS_URL
+)
 
 
 def get_memory(chat_id: str) -> List[Dict[str, str]]:
-    """Get full conversation memory for a chat"""
-    return _MEMORY_STORE.get(chat_id, [])
+    """Get conversation memory for a chat (summary + recent messages)"""
+    summary, messages = _BACKEND.load(chat_id)
+
+    if summary:
+        return [{"role": "system", "content": SUMMARY_PREFIX + summary}] + messages
+
+    return messages
 
 
 def add_message(chat_id: str, role: str, content: str) -> None:
     """Add a message to chat memory"""
-    if chat_id not in _MEMORY_STORE:
-        _MEMORY_STORE[chat_id] = []
-
-    _MEMORY_STORE[chat_id].append({
+    count = _BACKEND.append(chat_id, {
         "role": role,
         "content": content
     })
 
+    if count > MEMORY_MAX_MESSAGES:
+        _compact(chat_id)
+
 
 def clear_memory(chat_id: str) -> None:
     """Clear memory for a chat"""
-    if chat_id in _MEMORY_STORE:
-        del _MEMORY_STORE[chat_id]
+    _BACKEND.delete(chat_id)
+
+
+def _compact(chat_id: str) -> None:
+    """Fold the oldest messages into the rolling summary (atomic per backend)"""
+    _BACKEND.compact(chat_id, MEMORY_KEEP_RECENT, summarize)
+
+
+def summarize(summary: str, messages: List[Dict[str, str]]) -> str:
+    """Cheap extractive summary – no extra LLM call on the hot path"""
+    lines = [summary] if summary else []
+
+    for message in messages:
+        snippet = " ".join(message["content"].split())
+        if len(snippet) > MEMORY_SNIPPET_CHARS:
+            snippet = snippet[:MEMORY_SNIPPET_CHARS].rstrip() + "…"
+        lines.append(f"- {message['role']}: {snippet}")
+
+    text = "\n".join(lines)
+
+    # Keep the most recent part when the summary itself gets too long
+    if len(text) > MEMORY_SUMMARY_MAX_CHARS:
+        text = "…" + text[-MEMORY_SUMMARY_MAX_CHARS:]
+
+    return text
+
+
+def get_memory_stats() -> dict:
+    return {
+        **_BACKEND.stats(),
+        "max_messages": MEMORY_MAX_MESSAGES,
+        "keep_recent": MEMORY_KEEP_RECENT,
+        "ttl_s": MEMORY_TTL_S,
+    }
@@ -0,0 +1,155 @@
+# In-process metrics: latency histograms, counters, per-request stage timings
+# Rendered in Prometheus text format on GET /metrics (no client library).
+#
+#   with stage("embed"):            → lawai_stage_seconds{stage="embed"} histogram
+#       ...                           + a {"stage", "ms"} entry in the request's
+#                                       timings block (DEBUG_TIMINGS=1)
+#   inc("lawai_cache_requests_total", cache="answer", result="hit")
+#   set_gauge("lawai_llm_queue_depth", 3, route="judge")
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+
+# Adds a "timings" block (stage → ms, in order) to /chat responses
+DEBUG_TIMINGS = os.getenv("DEBUG_TIMINGS", "0") == "1"
+
+# Seconds; covers sub-ms cache hits up to slow LLM calls
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+STAGE_METRIC = "lawai_stage_seconds"
+
+_HELP = {
+    STAGE_METRIC: "Latency of one pipeline stage",
+    "lawai_requests_total": "Chat requests by mode (single / voting / stream)",
+    "lawai_llm_tokens_total": "LLM tokens by kind (prompt / completion)",
+    "lawai_llm_calls_total": "LLM calls by route and outcome (ok or error kind)",
+    "lawai_llm_retries_total": "LLM retry attempts by route and error kind",
+    "lawai_cache_requests_total": "Cache lookups by cache and result",
+    "lawai_llm_queue_depth": "LLM calls waiting for rate-limit budget, by route",
+    "lawai_llm_queue_wait_seconds": "Time an LLM call waited for rate-limit budget",
+    "lawai_llm_shed_total": "LLM calls dropped by the rate limiter, by route and reason",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_COUNTERS: Dict[str, Dict[LabelKey, float]] = {}
+_HISTOGRAMS: Dict[str, Dict[LabelKey, list]] = {}
+_GAUGES: Dict[str, Dict[LabelKey, float]] = {}
+_LOCK = threading.Lock()
+
+# Per-request timings list (None → not collecting); mutable, so tasks and
+# executor threads that copied the context append to the same list
+_TIMINGS: contextvars.ContextVar[Optional[List[dict]]] = contextvars.ContextVar(
+    "lawai_timings", default=None
+)
+
+
+def _key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def inc(name: str, value: float = 1.0, **labels) -> None:
+    key = _key(labels)
+    with _LOCK:
+        series = _COUNTERS.setdefault(name, {})
+        series[key] = series.get(key, 0.0) + value
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    key = _key(labels)
+    with _LOCK:
+        _GAUGES.setdefault(name, {})[key] = value
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    key = _key(labels)
+    with _LOCK:
+        series = _HISTOGRAMS.setdefault(name, {})
+        # [bucket counts..., +Inf count, sum]
+        state = series.get(key)
+        if state is None:
+            state = series[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                state[i] += 1
+        state[len(LATENCY_BUCKETS)] += 1
+        state[-1] += seconds
+
+
+def record_stage(name: str, seconds: float) -> None:
+    observe(STAGE_METRIC, seconds, stage=name)
+
+    timings = _TIMINGS.get()
+    if timings is not None:
+        timings.append({"stage": name, "ms": round(seconds * 1000, 2)})
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block → stage histogram + request timings (sync or async code)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def start_timings() -> contextvars.Token:
+    """Begin collecting this request's stage timings (call reset_timings after)"""
+    return _TIMINGS.set([])
+
+
+def current_timings() -> Optional[List[dict]]:
+    return _TIMINGS.get()
+
+
+def reset_timings(token: contextvars.Token) -> None:
+    _TIMINGS.reset(token)
+
+
+def _labels_text(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{value}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+def render_prometheus() -> str:
+    """Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+
+    with _LOCK:
+        for name in sorted(_COUNTERS):
+            lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+            for key, value in sorted(_COUNTERS[name].items()):
+                lines.append(f"{name}{_labels_text(key)} {value:g}")
+
+        for name in sorted(_GAUGES):
+            lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} gauge")
+            for key, value in sorted(_GAUGES[name].items()):
+                lines.append(f"{name}{_labels_text(key)} {value:g}")
+
+        for name in sorted(_HISTOGRAMS):
+            lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, state in sorted(_HISTOGRAMS[name].items()):
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    lines.append(f"{name}_bucket{_labels_text(key, (('le', f'{bound:g}'),))} {state[i]}")
+                total = state[len(LATENCY_BUCKETS)]
+                lines.append(f"{name}_bucket{_labels_text(key, (('le', '+Inf'),))} {total}")
+                lines.append(f"{name}_sum{_labels_text(key)} {state[-1]:.6f}")
+                lines.append(f"{name}_count{_labels_text(key)} {total}")
+
+    return "\n".join(lines) + "\n"
@@ -1,34 +1,152 @@
+import asyncio
 import os
+import time
+import weakref
+from contextlib import aclosing
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+import httpx
+
+from app.services import llm_client, rate_limiter
+from app.services.async_runner import run_sync
+from app.services.llm_client import (
+    LLM_CONNECT_TIMEOUT_S,
+    LLM_READ_TIMEOUT_S,
+    LLMError,
+)
+from app.services.metrics import inc, record_stage, stage
 
 load_dotenv()
 
-client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY")
-)
+LLM_MODEL = "gpt-4o-mini"
+
+# 🔌 Connection pool size for the shared async client
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "50"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+
+# Any OpenAI-compatible endpoint (bench/fake_openai.py for load tests)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+# One AsyncOpenAI client per event loop (pooled connections can't cross loops)
+_ASYNC_CLIENTS = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> AsyncOpenAI:
+    """Shared pooled AsyncOpenAI client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+
+    if client is None:
+        client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=OPENAI_BASE_URL,
+            # Retries + backoff live in llm_client (Retry-After, breaker, metrics)
+            max_retries=0,
+            timeout=httpx.Timeout(
+                LLM_READ_TIMEOUT_S,
+                connect=LLM_CONNECT_TIMEOUT_S
+            ),
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_KEEPALIVE
+                )
+            )
+        )
+        _ASYNC_CLIENTS[loop] = client
 
-def ask_openai(system_prompt, user_message, memory=None):
-    try:
-        messages = []
+    return client
+
+
+def build_messages(system_prompt, user_message, memory=None):
+    # system → (budgeted) memory → current question
+    messages = [{"role": "system", "content": system_prompt}]
+
+    if memory:
+        messages.extend(memory)
+
+    messages.append({"role": "user", "content": user_message})
+
+    return messages
 
-        if memory:
-            messages.extend(memory)
 
-        messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": user_message})
+def _count_usage(usage, estimated: int) -> None:
+    if usage is not None:
+        inc("lawai_llm_tokens_total", usage.prompt_tokens or 0, kind="prompt")
+        inc("lawai_llm_tokens_total", usage.completion_tokens or 0, kind="completion")
+        # 🪣 Real usage replaces the TPM estimate the call was admitted with
+        rate_limiter.settle(estimated, usage.total_tokens)
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+
+async def ask_openai_async(system_prompt, user_message, memory=None, route="reply"):
+    """Reply text; raises an LLMError subclass when no answer could be produced
+
+    route: "reply" (user-facing answer), "vote" (voting agent), "judge" or
+    "reflect" → concurrency caps and rate-limit priority (reply first).
+    """
+    messages = build_messages(system_prompt, user_message, memory)
+    tokens = rate_limiter.estimate_tokens(messages)
+
+    def request():
+        return get_async_client().chat.completions.create(
+            model=LLM_MODEL,
             messages=messages,
             temperature=0.4
         )
 
-        return response.choices[0].message.content
+    try:
+        with stage("llm"):
+            response = await llm_client.call(route, request, tokens)
+    except LLMError as e:
+        print(f"🔥 OpenAI ERROR ({route}, {e.kind}):", e)
+        raise
+
+    _count_usage(getattr(response, "usage", None), tokens)
+    return response.choices[0].message.content
+
+
+async def ask_openai_stream(system_prompt, user_message, memory=None, route="reply"):
+    """Yield reply tokens as they arrive; raises LLMError (possibly mid-reply)"""
+    messages = build_messages(system_prompt, user_message, memory)
+    tokens = rate_limiter.estimate_tokens(messages)
+    started = time.perf_counter()
+    first_token = True
+
+    def open_stream():
+        return get_async_client().chat.completions.create(
+            model=LLM_MODEL,
+            messages=messages,
+            temperature=0.4,
+            stream=True,
+            # Token counts arrive on one final chunk with no choices
+            stream_options={"include_usage": True}
+        )
+
+    try:
+        # aclosing → closing this generator closes the call too (slot, breaker probe)
+        async with aclosing(llm_client.stream(route, open_stream, tokens)) as chunks:
+            async for chunk in chunks:
+                if not chunk.choices:
+                    _count_usage(getattr(chunk, "usage", None), tokens)
+                    continue
+
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if first_token:
+                        # ⏱️ Time to first token = what the user waits for
+                        record_stage("llm_first_token", time.perf_counter() - started)
+                        first_token = False
+                    yield delta
+    except LLMError as e:
+        print(f"🔥 OpenAI STREAM ERROR ({route}, {e.kind}):", e)
+        raise
+
+    record_stage("llm_stream", time.perf_counter() - started)
 
-    except Exception as e:
-        print("🔥 OpenAI ERROR:", e)
-        return "⚠️ AI response failed. Please try again."
+
+def ask_openai(system_prompt, user_message, memory=None):
+    # Sync wrapper (old API)
+    return run_sync(ask_openai_async(system_prompt, user_message, memory))
 
 
 
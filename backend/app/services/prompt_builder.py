@@ -0,0 +1,126 @@
+# Token-budgeted prompt assembly
+# system prompt + retrieved chunks + recent memory must fit PROMPT_TOKEN_BUDGET
+# Lowest-ranked chunks and oldest turns are dropped / trimmed first
+
+import math
+import os
+from typing import Dict, List, Optional
+
+from app.services.metrics import stage
+
+try:
+    import tiktoken
+    # gpt-4o / gpt-4o-mini tokenizer
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except ImportError:
+    _ENCODING = None
+
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+
+# Share of what's left (after system + user message) reserved for memory
+PROMPT_MEMORY_SHARE = float(os.getenv("PROMPT_MEMORY_SHARE", "0.3"))
+
+# Don't bother trimming a chunk down to fewer tokens than this
+MIN_TRIMMED_CHUNK_TOKENS = 64
+
+# Per-message overhead in the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+CONTEXT_SEPARATOR = "\n\n"
+
+
+def count_tokens(text: str) -> int:
+    """tiktoken count when available, else ~4 chars per token"""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    if max_tokens <= 0:
+        return ""
+    if _ENCODING is not None:
+        tokens = _ENCODING.encode(text)
+        return text if len(tokens) <= max_tokens else _ENCODING.decode(tokens[:max_tokens])
+    return text[:max_tokens * 4]
+
+
+def _message_tokens(message: Dict[str, str]) -> int:
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+@stage("prompt_build")
+def build_prompt(
+    template: str,
+    chunks: List[dict],
+    user_message: str,
+    memory: Optional[List[Dict[str, str]]] = None,
+    budget: Optional[int] = None
+) -> dict:
+    """
+    template → system prompt with a single "{context}" slot
+    chunks   → retrieval results, best first ({"text": ..., ...})
+    Returns {"system_prompt", "memory", "token_report"}
+    """
+    budget = budget or PROMPT_TOKEN_BUDGET
+    memory = memory or []
+
+    system_tokens = count_tokens(template.replace("{context}", "")) + MESSAGE_OVERHEAD_TOKENS
+    user_tokens = count_tokens(user_message) + MESSAGE_OVERHEAD_TOKENS
+
+    remaining = max(budget - system_tokens - user_tokens, 0)
+    memory_reserve = int(remaining * PROMPT_MEMORY_SHARE) if memory else 0
+    context_budget = remaining - memory_reserve
+
+    # 📄 Chunks in rank order until the context budget runs out
+    kept, context_tokens, trimmed = [], 0, 0
+    separator_tokens = count_tokens(CONTEXT_SEPARATOR)
+
+    for chunk in chunks:
+        cost = count_tokens(chunk["text"]) + (separator_tokens if kept else 0)
+
+        if context_tokens + cost <= context_budget:
+            kept.append(chunk["text"])
+            context_tokens += cost
+            continue
+
+        room = context_budget - context_tokens - (separator_tokens if kept else 0)
+        if room >= MIN_TRIMMED_CHUNK_TOKENS:
+            kept.append(trim_to_tokens(chunk["text"], room))
+            context_tokens += count_tokens(kept[-1]) + (separator_tokens if len(kept) > 1 else 0)
+            trimmed += 1
+        break
+
+    # 🧠 Memory gets its reserve + whatever context didn't use; newest first
+    memory_budget = remaining - context_tokens
+    kept_memory, memory_tokens = [], 0
+
+    for message in reversed(memory):
+        cost = _message_tokens(message)
+        if memory_tokens + cost > memory_budget:
+            break
+        kept_memory.append(message)
+        memory_tokens += cost
+
+    kept_memory.reverse()
+
+    return {
+        "system_prompt": template.replace("{context}", CONTEXT_SEPARATOR.join(kept)),
+        "memory": kept_memory,
+        "token_report": {
+            "budget": budget,
+            "system": system_tokens,
+            "context": context_tokens,
+            "memory": memory_tokens,
+            "user": user_tokens,
+            "total": system_tokens + context_tokens + memory_tokens + user_tokens,
+            "chunks_used": len(kept),
+            "chunks_trimmed": trimmed,
+            "chunks_dropped": len(chunks) - len(kept),
+            "memory_messages_dropped": len(memory) - len(kept_memory),
+            "tokenizer": "tiktoken" if _ENCODING is not None else "approx",
+        }
+    }
@@ -1,21 +1,265 @@
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
+import asyncio
+import contextvars
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
 
+import numpy as np
 
-def retrieve_context(query: str, db_path: str, k: int = 4) -> str:
-    embedding = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2"
-    )
+from app.services import flat_index
+from app.services.bm25_index import bm25_search, index_version
+from app.services.lru_cache import LRUCache
+from app.services.metrics import inc, stage
+from app.services.reranker import (
+    RERANK_BUDGET_MS,
+    RERANK_CANDIDATES,
+    RERANK_ENABLED,
+    RERANK_TOP_K,
+    rerank_chunks,
+)
+from app.services.vector_store import (
+    DOMAIN_DBS,
+    VECTOR_BACKEND,
+    collection_version,
+    get_embedding,
+    get_store,
+    reset_store,
+)
+
+
+# 🧵 Bounded pool for blocking embedding + HNSW search
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "4"))
+
+# ♻️ Exact-match caches: normalized query → vector, (vector, db, k) → chunks
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "2048"))
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+
+# 🔀 "vector" (MiniLM only) or "hybrid" (MiniLM + BM25, reciprocal rank fusion)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector")
+
+# Hybrid: candidates pulled from each retriever before fusing down to k
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=RETRIEVAL_WORKERS,
+    thread_name_prefix="retrieval"
+)
 
-    vectordb = Chroma(
-        persist_directory=db_path,
-        embedding_function=embedding
+_EMBED_CACHE = LRUCache(maxsize=EMBED_CACHE_SIZE)
+_RESULT_CACHES: Dict[str, LRUCache] = {}
+_RESULT_VERSIONS: Dict[str, int] = {}
+_LOCK = threading.Lock()
+
+
+def _normalize(query: str) -> str:
+    # MiniLM is uncased → lower() doesn't change the vector
+    return " ".join(query.lower().split())
+
+
+def _vector_key(embedding) -> str:
+    data = np.asarray(embedding, dtype=np.float32).tobytes()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _result_cache(db_path: str) -> LRUCache:
+    """Per-DB result cache, cleared when the persisted collection changes"""
+    version = (
+        collection_version(db_path),
+        index_version(db_path),
+        flat_index.index_version(db_path),
     )
 
-    retriever = vectordb.as_retriever(search_kwargs={"k": k})
+    with _LOCK:
+        cache = _RESULT_CACHES.get(db_path)
+        if cache is None:
+            cache = LRUCache(maxsize=RESULT_CACHE_SIZE)
+            _RESULT_CACHES[db_path] = cache
+            _RESULT_VERSIONS[db_path] = version
+        elif _RESULT_VERSIONS.get(db_path) != version:
+            # 🔄 Re-ingested → stale chunks + stale store handle
+            cache.clear()
+            reset_store(db_path)
+            _RESULT_VERSIONS[db_path] = version
+
+    return cache
+
+
+def embed_query(query: str) -> tuple:
+    """MiniLM vector for a query (shared model, LRU cached)"""
+    key = _normalize(query)
+
+    embedding = _EMBED_CACHE.get(key)
+    inc("lawai_cache_requests_total", cache="embedding", result="miss" if embedding is None else "hit")
+
+    if embedding is None:
+        with stage("embed"):
+            embedding = tuple(get_embedding().embed_query(key))
+        _EMBED_CACHE.put(key, embedding)
+
+    return embedding
+
+
+def _vector_search(embedding: tuple, db_path: str, k: int) -> List[dict]:
+    if VECTOR_BACKEND == "flat":
+        # 🗜️ Quantized mmap index (shared pages across workers)
+        index = flat_index.get_index(db_path)
+        if index is not None:
+            return index.search(embedding, k)
+
+    # ♻️ Shared store + embedding model (loaded once per worker)
+    vectordb = get_store(db_path)
+    results = vectordb.similarity_search_by_vector_with_relevance_scores(list(embedding), k=k)
+
+    # MiniLM vectors are unit length → squared L2 distance d ⇔ cosine 1 - d/2
+    return [
+        {
+            "text": doc.page_content,
+            "score": round(1.0 - float(distance) / 2.0, 4),
+            "metadata": dict(doc.metadata or {}),
+        }
+        for doc, distance in results
+    ]
+
+
+def rrf_fuse(rankings: List[List[dict]], k: int) -> List[dict]:
+    """Reciprocal rank fusion: score = Σ 1 / (RRF_K + rank) over the rankings"""
+    fused: Dict[str, dict] = {}
+    scores: Dict[str, float] = {}
+
+    for ranking in rankings:
+        for rank, chunk in enumerate(ranking, start=1):
+            # Same chunk text ⇔ same chunk (both indexes hold the ingested chunks)
+            key = chunk["text"]
+            fused.setdefault(key, chunk)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (RRF_K + rank)
+
+    best = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [{**fused[key], "score": round(scores[key], 5)} for key in best]
+
+
+def retrieve_chunks(query: str, db_path: str, k: int = 4, mode: str = None,
+                    rerank: bool = None) -> List[dict]:
+    """Top-k chunks for a query, best first: {"text", "score", "metadata"}
+
+    mode: "vector", "bm25" or "hybrid" (default RETRIEVAL_MODE).
+    rerank: over-fetch + cross-encoder rerank (default RERANK_ENABLED); keeps
+    at most RERANK_TOP_K chunks.
+    """
+    if not (RERANK_ENABLED if rerank is None else rerank):
+        return _ranked_chunks(query, db_path, k, mode)
 
-    # docs = retriever.get_relevant_documents(query)
-    docs = retriever.invoke(query)
+    started = time.perf_counter()
+    candidates = _ranked_chunks(query, db_path, max(k, RERANK_CANDIDATES), mode)
+    elapsed_ms = (time.perf_counter() - started) * 1000
 
-    context = "\n\n".join([doc.page_content for doc in docs])
+    with stage("rerank"):
+        return rerank_chunks(
+            query,
+            candidates,
+            top_k=min(k, RERANK_TOP_K),
+            budget_ms=RERANK_BUDGET_MS - elapsed_ms
+        )
+
+
+def _ranked_chunks(query: str, db_path: str, k: int, mode: str = None) -> List[dict]:
+    mode = mode or RETRIEVAL_MODE
+
+    if mode == "bm25":
+        with stage("search"):
+            return bm25_search(query, db_path, k)
+
+    embedding = embed_query(query)
+
+    cache = _result_cache(db_path)
+    key = (_vector_key(embedding), k, mode)
+
+    chunks = cache.get(key)
+    inc("lawai_cache_requests_total", cache="retrieval", result="miss" if chunks is None else "hit")
+
+    if chunks is None:
+        with stage("search"):
+            chunks = _search(query, embedding, db_path, k, mode)
+        cache.put(key, chunks)
+
+    return [dict(chunk) for chunk in chunks]
+
+
+def _search(query: str, embedding: tuple, db_path: str, k: int, mode: str) -> tuple:
+    if mode == "hybrid":
+        dense = _vector_search(embedding, db_path, max(k, HYBRID_CANDIDATES))
+        sparse = bm25_search(query, db_path, max(k, HYBRID_CANDIDATES))
+        # No BM25 index yet (not re-ingested) → plain vector ranking
+        return tuple(rrf_fuse([dense, sparse], k) if sparse else dense[:k])
+
+    return tuple(_vector_search(embedding, db_path, k))
+
+
+def _in_executor(fn, *args):
+    """Run fn on the retrieval pool, carrying the caller's contextvars along
+    (→ stage timings recorded in the worker land in the request's timings)"""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return loop.run_in_executor(_EXECUTOR, ctx.run, fn, *args)
+
+
+def retrieve_context(query: str, db_path: str, k: int = 4) -> str:
+    context = "\n\n".join(chunk["text"] for chunk in retrieve_chunks(query, db_path, k))
     return context
+
+
+async def retrieve_chunks_async(query: str, db_path: str, k: int = 4, mode: str = None,
+                                rerank: bool = None) -> List[dict]:
+    """Run retrieval on the bounded executor without blocking the event loop"""
+    return await _in_executor(retrieve_chunks, query, db_path, k, mode, rerank)
+
+
+async def retrieve_context_async(query: str, db_path: str, k: int = 4) -> str:
+    return await _in_executor(retrieve_context, query, db_path, k)
+
+
+async def embed_query_async(query: str) -> tuple:
+    return await _in_executor(embed_query, query)
+
+
+async def retrieve_multi_async(query: str, domains: List[str], k: int = 4,
+                               mode: str = None) -> Dict[str, List[dict]]:
+    """Top-k chunks from several domain DBs in one call: {domain: chunks}
+
+    The query is embedded ONCE (every per-domain search then hits the
+    embedding cache) and the domain searches run concurrently.
+    """
+    if (mode or RETRIEVAL_MODE) != "bm25":
+        await embed_query_async(query)
+
+    searches = [
+        asyncio.ensure_future(retrieve_chunks_async(query, DOMAIN_DBS[domain], k, mode))
+        for domain in domains
+    ]
+    try:
+        results = await asyncio.gather(*searches)
+    finally:
+        # One domain failed / caller gave up → don't leave the other searches running
+        for search in searches:
+            if not search.done():
+                search.cancel()
+    return dict(zip(domains, results))
+
+
+def clear_result_caches() -> None:
+    """Drop cached top-k results (benchmarks measure uncached search)"""
+    with _LOCK:
+        for cache in _RESULT_CACHES.values():
+            cache.clear()
+
+
+def get_retrieval_cache_stats() -> dict:
+    return {
+        "embeddings": _EMBED_CACHE.stats(),
+        "results": {
+            db_path: cache.stats() for db_path, cache in _RESULT_CACHES.items()
+        },
+    }
@@ -0,0 +1,324 @@
+# Client-side RPM / TPM budget for LLM calls + priority queue in front of it
+#
+#   granted = await acquire(route, tokens)   → True once the budget allows the
+#                                              call, False → shed (don't call)
+#   settle(estimated, actual)                → correct the token estimate
+#
+# Two token buckets (requests, tokens) refill continuously at the account
+# limits. When they run dry, calls queue by route priority (user reply first,
+# then voting agents / judge, then reflection); low-priority calls are shed
+# instead of queued once the queue is deep or the projected wait too long.
+
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional
+
+from app.services.metrics import inc, observe, set_gauge
+from app.services.prompt_builder import MESSAGE_OVERHEAD_TOKENS, count_tokens
+
+
+def _route_map(value: str, cast) -> Dict[str, float]:
+    return {route: cast(item) for route, item in (pair.split("=") for pair in value.split(",") if pair)}
+
+
+# 🪣 Account limits for this process (split the account's limits across workers; 0 = off)
+LLM_RPM_LIMIT = int(os.getenv("LLM_RPM_LIMIT", "500"))
+LLM_TPM_LIMIT = int(os.getenv("LLM_TPM_LIMIT", "200000"))
+
+# Bucket size in seconds of refill (60 → a full minute's budget can go at once)
+LLM_RATE_BURST_S = float(os.getenv("LLM_RATE_BURST_S", "60"))
+
+# Completion tokens reserved per call until the real usage is known
+LLM_COMPLETION_ESTIMATE = int(os.getenv("LLM_COMPLETION_ESTIMATE", "500"))
+
+# 🥇 Lower runs first; unknown routes get the lowest priority listed
+LLM_ROUTE_PRIORITY = _route_map(os.getenv("LLM_ROUTE_PRIORITY", "reply=0,vote=1,judge=1,reflect=2"), int)
+
+# ⏳ Longest a call may queue before it's shed (also the projected wait that sheds it on arrival)
+LLM_QUEUE_MAX_WAIT_S = _route_map(os.getenv("LLM_QUEUE_MAX_WAIT_S", "reply=30,vote=10,judge=10,reflect=2"), float)
+
+# 🗑️ Queue this deep → calls below top priority are shed on arrival
+LLM_SHED_QUEUE_DEPTH = int(os.getenv("LLM_SHED_QUEUE_DEPTH", "64"))
+
+_LOWEST_PRIORITY = max(LLM_ROUTE_PRIORITY.values(), default=0)
+_DEFAULT_MAX_WAIT_S = min(LLM_QUEUE_MAX_WAIT_S.values(), default=10.0)
+
+_STATS = {"queued": 0, "shed": 0, "settled_tokens": 0}
+
+
+def estimate_tokens(messages: List[Dict[str, str]], completion: int = LLM_COMPLETION_ESTIMATE) -> int:
+    """Prompt tokens of a chat request + the completion we expect back"""
+    prompt = sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+    return prompt + completion
+
+
+class TokenBucket:
+    """Refills at per_minute / 60 per second up to per_minute · burst_s / 60"""
+
+    def __init__(self, per_minute: float, burst_s: float = LLM_RATE_BURST_S):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_s)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (call refill first)"""
+        # Bigger than the bucket → wait for a full one instead of forever
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+
+class Budget:
+    """Requests + tokens buckets shared by every loop in the process"""
+
+    def __init__(self, rpm: int = LLM_RPM_LIMIT, tpm: int = LLM_TPM_LIMIT):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.requests is not None or self.tokens is not None
+
+    def _buckets(self, tokens: float):
+        if self.requests is not None:
+            yield self.requests, 1
+        if self.tokens is not None:
+            yield self.tokens, tokens
+
+    def eta(self, requests: int, tokens: float) -> float:
+        """Seconds until `requests` calls worth `tokens` in total could start"""
+        now = time.monotonic()
+        with self.lock:
+            wait = max(0.0, self.paused_until - now)
+            # Unlike wait_time: the totals may span several bucket-fulls
+            for bucket, amount in ((self.requests, requests), (self.tokens, tokens)):
+                if bucket is not None:
+                    bucket.refill(now)
+                    wait = max(wait, (amount - bucket.level) / bucket.rate)
+        return wait
+
+    def try_take(self, tokens: float) -> float:
+        """Take one call's budget → 0.0, else seconds to wait (nothing taken)"""
+        now = time.monotonic()
+        with self.lock:
+            wait = max(0.0, self.paused_until - now)
+            for bucket, amount in self._buckets(tokens):
+                bucket.refill(now)
+                wait = max(wait, bucket.wait_time(amount))
+            if wait > 0:
+                return wait
+
+            for bucket, amount in self._buckets(tokens):
+                bucket.level -= min(amount, bucket.capacity)
+        return 0.0
+
+    def give_back(self, tokens: float) -> None:
+        """Return unused tokens (negative → charge extra, the bucket goes into debt)"""
+        if self.tokens is None:
+            return
+        with self.lock:
+            self.tokens.refill(time.monotonic())
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + tokens)
+
+    def pause(self, seconds: float) -> None:
+        """Upstream said 429 → nobody starts for a while"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+_BUDGET = Budget()
+
+
+def priority(route: str) -> int:
+    return LLM_ROUTE_PRIORITY.get(route, _LOWEST_PRIORITY)
+
+
+def max_wait(route: str) -> float:
+    return LLM_QUEUE_MAX_WAIT_S.get(route, _DEFAULT_MAX_WAIT_S)
+
+
+class _Waiter:
+    __slots__ = ("priority", "tokens", "future")
+
+    def __init__(self, priority: int, tokens: float, future: asyncio.Future):
+        self.priority = priority
+        self.tokens = tokens
+        self.future = future
+
+
+class Scheduler:
+    """Priority queue of calls waiting for budget (one per event loop)"""
+
+    def __init__(self, budget: Budget):
+        self.budget = budget
+        self.heap: list = []
+        self.order = itertools.count()
+        self.depths: Dict[str, int] = {}
+        self.changed = asyncio.Event()
+        self.pump: Optional[asyncio.Task] = None
+
+    def _waiting(self) -> List[_Waiter]:
+        return [waiter for _, _, waiter in self.heap if not waiter.future.done()]
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._waiting())
+
+    def projected_wait(self, rank: int, tokens: float) -> float:
+        """Wait for a new call: everything queued at its priority or better goes first"""
+        ahead = [waiter for waiter in self._waiting() if waiter.priority <= rank]
+        return self.budget.eta(len(ahead) + 1, tokens + sum(waiter.tokens for waiter in ahead))
+
+    def _set_depth(self, route: str, delta: int) -> None:
+        self.depths[route] = self.depths.get(route, 0) + delta
+        set_gauge("lawai_llm_queue_depth", self.depths[route], route=route)
+
+    async def acquire(self, route: str, tokens: float) -> bool:
+        rank = priority(route)
+        started = time.monotonic()
+
+        # Nobody queued → no overtaking, start right away if the budget allows
+        if not self.busy and self.budget.try_take(tokens) == 0.0:
+            observe("lawai_llm_queue_wait_seconds", 0.0, route=route)
+            return True
+
+        limit = max_wait(route)
+        if rank > 0:
+            if len(self._waiting()) >= LLM_SHED_QUEUE_DEPTH:
+                return self._shed(route, "queue_full")
+            if self.projected_wait(rank, tokens) > limit:
+                return self._shed(route, "wait")
+
+        waiter = _Waiter(rank, tokens, asyncio.get_running_loop().create_future())
+        heapq.heappush(self.heap, (rank, next(self.order), waiter))
+        _STATS["queued"] += 1
+        self._set_depth(route, 1)
+        self._wake()
+
+        try:
+            await asyncio.wait([waiter.future], timeout=limit)
+        except BaseException:
+            # Caller cancelled while queued → hand back budget granted meanwhile
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.budget.give_back(tokens)
+            waiter.future.cancel()
+            raise
+        finally:
+            self._set_depth(route, -1)
+
+        if not waiter.future.done():
+            waiter.future.cancel()
+            self._wake()
+            return self._shed(route, "timeout")
+
+        observe("lawai_llm_queue_wait_seconds", time.monotonic() - started, route=route)
+        return True
+
+    def _shed(self, route: str, reason: str) -> bool:
+        _STATS["shed"] += 1
+        inc("lawai_llm_shed_total", route=route, reason=reason)
+        return False
+
+    def _wake(self) -> None:
+        self.changed.set()
+        if self.pump is None or self.pump.done():
+            self.pump = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> None:
+        """Grant the head of the queue whenever the budget allows it"""
+        while True:
+            self.changed.clear()
+            while self.heap and self.heap[0][2].future.done():
+                heapq.heappop(self.heap)
+            if not self.heap:
+                return
+
+            waiter = self.heap[0][2]
+            wait = self.budget.try_take(waiter.tokens)
+            if wait == 0.0:
+                heapq.heappop(self.heap)
+                waiter.future.set_result(None)
+                continue
+
+            # Refill, or a new / better-placed call arrived → look again
+            try:
+                await asyncio.wait_for(self.changed.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Futures + the pump task belong to one loop (same as the LLM client pool)
+_SCHEDULERS = weakref.WeakKeyDictionary()
+
+
+def _scheduler() -> Scheduler:
+    loop = asyncio.get_running_loop()
+    scheduler = _SCHEDULERS.get(loop)
+
+    if scheduler is None:
+        scheduler = Scheduler(_BUDGET)
+        _SCHEDULERS[loop] = scheduler
+
+    return scheduler
+
+
+async def acquire(route: str, tokens: float) -> bool:
+    """Wait for budget for one call → False if it was shed instead"""
+    if not _BUDGET.enabled:
+        return True
+    return await _scheduler().acquire(route, tokens)
+
+
+def try_acquire(tokens: float) -> bool:
+    """Take budget only if it's there right now (hedged duplicates)"""
+    if not _BUDGET.enabled:
+        return True
+    # Never ahead of calls that are already queued
+    return not _scheduler().busy and _BUDGET.try_take(tokens) == 0.0
+
+
+def settle(estimated: float, actual: Optional[int]) -> None:
+    """Real usage is in → return / charge the difference to the estimate"""
+    if actual is None or not _BUDGET.enabled:
+        return
+    _STATS["settled_tokens"] += actual
+    _BUDGET.give_back(estimated - actual)
+
+
+def pause(seconds: float) -> None:
+    _BUDGET.pause(seconds)
+
+
+def get_rate_limit_stats() -> dict:
+    queued = {}
+    for scheduler in list(_SCHEDULERS.values()):
+        for route, depth in scheduler.depths.items():
+            queued[route] = queued.get(route, 0) + depth
+
+    with _BUDGET.lock:
+        buckets = {
+            name: {"available": round(bucket.level, 1), "capacity": round(bucket.capacity, 1)}
+            for name, bucket in (("requests", _BUDGET.requests), ("tokens", _BUDGET.tokens))
+            if bucket is not None
+        }
+
+    return {
+        **_STATS,
+        "rpm_limit": LLM_RPM_LIMIT,
+        "tpm_limit": LLM_TPM_LIMIT,
+        "queue_depth": queued,
+        "buckets": buckets,
+        "paused_s": round(max(0.0, _BUDGET.paused_until - time.monotonic()), 2),
+        "route_priority": LLM_ROUTE_PRIORITY,
+    }
@@ -1,4 +1,31 @@
-from app.services.openai_client import ask_openai
+import asyncio
+import os
+import random
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.services.async_runner import run_sync
+from app.services.metrics import stage
+from app.services.openai_client import ask_openai_async
+
+
+# 🪞 "inline"   → reply waits for reflection (old behaviour)
+#    "deferred" → reply returns first, reflection runs in background
+REFLECTION_MODE = os.getenv("REFLECTION_MODE", "inline")
+
+# Fraction of replies that get reflected at all (0.0 – 1.0)
+REFLECTION_SAMPLE_RATE = float(os.getenv("REFLECTION_SAMPLE_RATE", "1.0"))
+
+# How many finished reflections we keep for the follow-up endpoint
+REFLECTION_RESULTS_MAX = int(os.getenv("REFLECTION_RESULTS_MAX", "1000"))
+
+FALLBACK_REFLECTION = {
+    "confidence": 0.7,
+    "notes": "Reflection skipped due to internal safety."
+}
+
+_RESULTS: "OrderedDict[str, dict]" = OrderedDict()
+_TASKS: Dict[str, asyncio.Task] = {}
 
 
 REFLECTION_PROMPT = """
@@ -23,12 +50,14 @@ Rules:
 """
 
 
-def reflect(answer: str, memory: list) -> dict:
-    review = ask_openai(
-        REFLECTION_PROMPT,
-        answer,
-        memory=[]
-    )
+async def reflect_async(answer: str, memory: list) -> dict:
+    with stage("reflect"):
+        review = await ask_openai_async(
+            REFLECTION_PROMPT,
+            answer,
+            memory=[],
+            route="reflect"
+        )
 
     # Fallback safety
     try:
@@ -39,3 +68,62 @@ def reflect(answer: str, memory: list) -> dict:
             "confidence": 60,
             "notes": "Automatic confidence assigned due to parsing issue"
         }
+
+
+def reflect(answer: str, memory: list) -> dict:
+    # Sync wrapper (old API)
+    return run_sync(reflect_async(answer, memory))
+
+
+# =====================================================
+# ⏳ DEFERRED REFLECTION (off the critical path)
+# =====================================================
+def should_reflect() -> bool:
+    """Sampling gate – reflect on only REFLECTION_SAMPLE_RATE of traffic"""
+    return random.random() < REFLECTION_SAMPLE_RATE
+
+
+async def safe_reflect(answer: str, memory: list) -> dict:
+    try:
+        return await reflect_async(answer, memory)
+    except Exception:
+        return dict(FALLBACK_REFLECTION)
+
+
+def schedule_reflection(message_id: str, answer: str, memory: list) -> asyncio.Task:
+    """Start reflection in the background; result lands in get_reflection()"""
+    task = asyncio.create_task(safe_reflect(answer, memory))
+    _TASKS[message_id] = task
+    task.add_done_callback(lambda t: _store_result(message_id, t))
+    return task
+
+
+def _store_result(message_id: str, task: asyncio.Task) -> None:
+    _TASKS.pop(message_id, None)
+
+    if task.cancelled():
+        result = dict(FALLBACK_REFLECTION)
+    else:
+        result = task.result()
+
+    _RESULTS[message_id] = result
+    _RESULTS.move_to_end(message_id)
+
+    while len(_RESULTS) > REFLECTION_RESULTS_MAX:
+        _RESULTS.popitem(last=False)
+
+
+def get_reflection(message_id: str) -> Optional[dict]:
+    """Status of a deferred reflection: pending / done (None if unknown)"""
+    if message_id in _TASKS:
+        return {"status": "pending"}
+
+    result = _RESULTS.get(message_id)
+    if result is None:
+        return None
+
+    return {
+        "status": "done",
+        "confidence": result.get("confidence", 0.7),
+        "notes": result.get("notes", "")
+    }
@@ -0,0 +1,171 @@
+# Optional CPU cross-encoder rerank stage for retrieval
+# Over-fetch candidates, score every (query, chunk) pair in ONE batched
+# forward pass, keep only the best few for the prompt. Scores are cached per
+# (query hash, chunk hash), and the stage is skipped when its predicted cost
+# doesn't fit the remaining latency budget (re-measured every
+# RERANK_PROBE_INTERVAL_S so one slow batch can't switch it off for good).
+
+import hashlib
+import os
+import threading
+import time
+from typing import List, Optional
+
+from app.services.lru_cache import LRUCache
+
+
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "0") == "1"
+RERANK_MODEL_NAME = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+
+# Candidates fetched for reranking → chunks kept for the prompt
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_TOP_K = int(os.getenv("RERANK_TOP_K", "3"))
+
+# Tokens per pair (query + chunk); longer chunks are truncated by the model
+RERANK_MAX_LENGTH = int(os.getenv("RERANK_MAX_LENGTH", "256"))
+
+# ⏱️ Retrieval + rerank must fit here, else the vector order is used as-is
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))
+
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "8192"))
+
+# Skipped on budget this long since the model last ran → run anyway to re-measure
+RERANK_PROBE_INTERVAL_S = float(os.getenv("RERANK_PROBE_INTERVAL_S", "30"))
+
+_MODEL = None
+_MODEL_ERROR: Optional[str] = None
+_LOCK = threading.Lock()
+
+_SCORE_CACHE = LRUCache(maxsize=RERANK_CACHE_SIZE)
+
+# Moving average of model cost per uncached pair (predicts the next batch)
+_EWMA_ALPHA = 0.2
+_MS_PER_PAIR: Optional[float] = None
+
+# First batch pays lazy init / allocator warm-up → not representative
+_WARMED = False
+_LAST_RUN = 0.0
+
+_STATS = {
+    "calls": 0,
+    "reranked": 0,
+    "skipped_budget": 0,
+    "skipped_unavailable": 0,
+    "probes": 0,
+    "pairs_scored": 0,
+    "model_ms": 0.0,
+}
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def get_reranker():
+    """Shared CrossEncoder (None when sentence-transformers isn't installed)"""
+    global _MODEL, _MODEL_ERROR
+
+    if _MODEL is not None or _MODEL_ERROR is not None:
+        return _MODEL
+
+    with _LOCK:
+        if _MODEL is None and _MODEL_ERROR is None:
+            try:
+                from sentence_transformers import CrossEncoder
+                _MODEL = CrossEncoder(RERANK_MODEL_NAME, max_length=RERANK_MAX_LENGTH, device="cpu")
+            except Exception as e:
+                # Rerank is an optimisation → fall back to vector order, don't fail requests
+                _MODEL_ERROR = str(e)
+                print(f"⚠️ Reranker unavailable: {e}")
+
+    return _MODEL
+
+
+def warm_up_reranker() -> None:
+    global _WARMED
+
+    if RERANK_ENABLED:
+        model = get_reranker()
+        if model is not None:
+            # One throwaway batch → the first real one is measured warm
+            model.predict([("warm up", "warm up")], show_progress_bar=False)
+            _WARMED = True
+
+
+def _probe_due() -> bool:
+    """Claim the periodic over-budget run that re-measures the model's cost"""
+    global _LAST_RUN
+
+    with _LOCK:
+        if time.monotonic() - _LAST_RUN < RERANK_PROBE_INTERVAL_S:
+            return False
+        _LAST_RUN = time.monotonic()
+    return True
+
+
+def rerank_chunks(query: str, chunks: List[dict], top_k: int = RERANK_TOP_K,
+                  budget_ms: float = RERANK_BUDGET_MS) -> List[dict]:
+    """Best top_k chunks by cross-encoder score (input order if skipped)"""
+    global _MS_PER_PAIR, _WARMED, _LAST_RUN
+
+    _STATS["calls"] += 1
+    if len(chunks) <= 1:
+        return chunks[:top_k]
+
+    query_key = _digest(" ".join(query.lower().split()))
+    keys = [(query_key, _digest(chunk["text"])) for chunk in chunks]
+    scores = [_SCORE_CACHE.get(key) for key in keys]
+    missing = [i for i, score in enumerate(scores) if score is None]
+
+    if missing:
+        # ⏱️ Predicted model time must fit what's left of the budget
+        predicted_ms = (_MS_PER_PAIR or 0.0) * len(missing)
+        probe = False
+        if budget_ms <= 0 or predicted_ms > budget_ms:
+            # Estimate only moves when the model runs → probe now and then
+            if budget_ms <= 0 or not _probe_due():
+                _STATS["skipped_budget"] += 1
+                return chunks[:top_k]
+            _STATS["probes"] += 1
+            probe = True
+
+        model = get_reranker()
+        if model is None:
+            _STATS["skipped_unavailable"] += 1
+            return chunks[:top_k]
+
+        started = time.perf_counter()
+        pairs = [(query, chunks[i]["text"]) for i in missing]
+        predicted = model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        _LAST_RUN = time.monotonic()
+
+        per_pair = elapsed_ms / len(missing)
+        if _WARMED:
+            # A probe replaces the stale estimate outright (averaging would
+            # keep one old slow batch over budget for several more probes)
+            _MS_PER_PAIR = per_pair if _MS_PER_PAIR is None or probe else (
+                _EWMA_ALPHA * per_pair + (1 - _EWMA_ALPHA) * _MS_PER_PAIR
+            )
+        _WARMED = True
+        _STATS["pairs_scored"] += len(missing)
+        _STATS["model_ms"] += elapsed_ms
+
+        for i, score in zip(missing, predicted):
+            scores[i] = float(score)
+            _SCORE_CACHE.put(keys[i], scores[i])
+
+    _STATS["reranked"] += 1
+    order = sorted(range(len(chunks)), key=lambda i: scores[i], reverse=True)[:top_k]
+    return [{**chunks[i], "rerank_score": round(scores[i], 4)} for i in order]
+
+
+def get_reranker_stats() -> dict:
+    return {
+        "enabled": RERANK_ENABLED,
+        "model": RERANK_MODEL_NAME,
+        "error": _MODEL_ERROR,
+        **{key: round(value, 1) if isinstance(value, float) else value for key, value in _STATS.items()},
+        "ms_per_pair": round(_MS_PER_PAIR, 3) if _MS_PER_PAIR is not None else None,
+        "score_cache": _SCORE_CACHE.stats(),
+    }
@@ -0,0 +1,243 @@
+# Exact (act, section number) → section text lookup for the law agent
+# "IPC 420 enti?" doesn't need an embedding + HNSW search that may land on
+# section 419 or 421: the index is built at ingestion time (ingest.py law).
+
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from app.services.metrics import inc
+
+
+SECTION_INDEX_PATH = os.getenv("SECTION_INDEX_PATH", "vectordb/law_sections.json")
+
+# Max sections pulled into one prompt ("compare 323, 324 and 325 IPC")
+MAX_SECTION_REFS = 4
+
+_ACT_PATTERN = (
+    r"\b(?P<{name}>i\.?\s?p\.?\s?c\.?|indian\s+penal\s+code"
+    r"|cr\.?\s?p\.?\s?c\.?|code\s+of\s+criminal\s+procedure)"
+)
+_SECTION_WORD = r"\b(?:sections?|secs?\.?|s\.|u/s\.?)"
+
+# "2 years", "7 days", "10 lakh" → a quantity, not a section number
+_NOT_A_SECTION = (
+    r"(?!\s*(?:years?|yrs?|months?|weeks?|days?|hours?|hrs?|minutes?|mins?"
+    r"|lakhs?|crores?|rupees|rs\b|%|percent|times|persons?|people|members?))"
+)
+# "498A", "498-A", "41a"
+_NUMBER = r"\d{1,3}(?:-?[a-z]{1,2})?\b" + _NOT_A_SECTION
+
+# "323, 324 and 325", "41 / 41A", "302 or 304"
+_NUMBER_LIST = rf"(?P<numbers>{_NUMBER}(?:\s*(?:,|&|/|\band\b|\bor\b)\s*{_NUMBER})*)"
+
+_REFERENCES = [
+    # "IPC 420", "IPC section 420", "CrPC sec 41A", "IPC sections 323 and 324"
+    re.compile(
+        _ACT_PATTERN.format(name="act") + rf"\s*(?:{_SECTION_WORD}\s*)?"
+        + _NUMBER_LIST,
+        re.IGNORECASE
+    ),
+    # "section 302", "sec 154 CrPC", "u/s 420 of the IPC", "sections 41 and 41A of Code of Criminal Procedure"
+    re.compile(
+        rf"{_SECTION_WORD}\s*" + _NUMBER_LIST
+        + r"(?:\s*(?:of\s+)?(?:the\s+)?" + _ACT_PATTERN.format(name="act") + ")?",
+        re.IGNORECASE
+    ),
+    # "420 IPC", "498a ipc lo", "323, 324 and 325 IPC"
+    re.compile(
+        _NUMBER_LIST + r"\s*" + _ACT_PATTERN.format(name="act"),
+        re.IGNORECASE
+    ),
+]
+
+_ONE_NUMBER = re.compile(r"\d{1,3}(?:-?[a-z]{1,2})?\b", re.IGNORECASE)
+
+_ACT_ANYWHERE = re.compile(_ACT_PATTERN.format(name="act"), re.IGNORECASE)
+
+# "section 3 of IT act", "sec 9 CPC", "POCSO section 4" → another statute, not IPC / CrPC
+_OTHER_ACT = (
+    r"(?:(?:it|information\s+technology|motor\s+vehicles?|mv|evidence|arms|dowry\s+prohibition"
+    r"|sc\s?/?\s?st|juvenile\s+justice|domestic\s+violence|ndps|pocso)\s+act\b"
+    r"|c\.?p\.?c\b\.?|ndps\b|pocso\b|bnss?\b|constitution\b|article\b)"
+)
+_OTHER_ACT_ANYWHERE = re.compile(r"\b" + _OTHER_ACT, re.IGNORECASE)
+# Right after the numbers: "of the <any name> Act" counts too
+_OTHER_ACT_AFTER = re.compile(
+    r"\s*(?:of\s+)?(?:the\s+)?(?:" + _OTHER_ACT + r"|(?:[a-z][\w.]*\s+){1,4}act\b)",
+    re.IGNORECASE
+)
+
+# "section 154" with no act named: procedure words → CrPC, otherwise unsure → both acts
+_PROCEDURE_TERMS = re.compile(
+    r"\b(?:fir|f\.i\.r|bail|anticipatory|arrest\w*|magistrate|warrant|summons|remand"
+    r"|charge\s?sheet|investigation|cognizable|custody|complaint)\b",
+    re.IGNORECASE
+)
+
+_INDEX: Optional[Dict[str, Dict[str, dict]]] = None
+_INDEX_VERSION: Optional[int] = None
+_LOCK = threading.Lock()
+
+_STATS = {"lookups": 0, "hits": 0, "misses": 0}
+
+
+def normalize_act(raw: str) -> str:
+    letters = re.sub(r"[^a-z]", "", raw.lower())
+    if letters in ("crpc", "codeofcriminalprocedure"):
+        return "CrPC"
+    return "IPC"
+
+
+def _fallback_acts(message: str) -> Tuple[str, ...]:
+    """Acts a bare "section N" may refer to (none → it's another statute's section)"""
+    named = {normalize_act(match.group("act")) for match in _ACT_ANYWHERE.finditer(message)}
+    if len(named) == 1:
+        return tuple(named)
+    if not named and _OTHER_ACT_ANYWHERE.search(message):
+        return ()
+    if not named and _PROCEDURE_TERMS.search(message):
+        return ("CrPC",)
+    return ("IPC", "CrPC")
+
+
+def _find_refs(message: str) -> List[Tuple[Tuple[str, ...], str]]:
+    """[(candidate acts, section), ...] in order of appearance"""
+    fallback = _fallback_acts(message)
+
+    # number position → (acts, section); an explicitly named act wins over the fallback
+    found: Dict[int, Tuple[Tuple[str, ...], str]] = {}
+    explicit = set()
+    for pattern in _REFERENCES:
+        for match in pattern.finditer(message):
+            act = match.group("act")
+            if not act and _OTHER_ACT_AFTER.match(message, match.end()):
+                continue
+            offset = match.start("numbers")
+            for number in _ONE_NUMBER.finditer(match.group("numbers")):
+                position = offset + number.start()
+                if position in explicit:
+                    continue
+                if act:
+                    explicit.add(position)
+                section = number.group().replace("-", "").upper()
+                found[position] = ((normalize_act(act),) if act else fallback, section)
+
+    return [ref for _, ref in sorted(found.items()) if ref[0]]
+
+
+def find_section_refs(message: str) -> List[Tuple[str, str]]:
+    """[(act, section), ...] referenced in a message, in order of appearance
+
+    A number counts only next to a section word or an act name. When the act
+    can't be told, both IPC and CrPC are returned for that number; a section
+    of another Act ("section 66 of IT act") isn't returned at all.
+    """
+    refs = []
+    for acts, section in _find_refs(message):
+        for act in acts:
+            if (act, section) not in refs:
+                refs.append((act, section))
+
+    return refs[:MAX_SECTION_REFS]
+
+
+def _index_version() -> int:
+    try:
+        return os.stat(SECTION_INDEX_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def load_index() -> Dict[str, Dict[str, dict]]:
+    """act → section → entry; reloaded when ingestion rewrites the file"""
+    global _INDEX, _INDEX_VERSION
+
+    version = _index_version()
+    if _INDEX is not None and _INDEX_VERSION == version:
+        return _INDEX
+
+    with _LOCK:
+        if _INDEX is None or _INDEX_VERSION != version:
+            if version:
+                with open(SECTION_INDEX_PATH, encoding="utf-8") as f:
+                    _INDEX = json.load(f)["acts"]
+            else:
+                # Not ingested yet → every lookup falls back to vector search
+                _INDEX = {}
+            _INDEX_VERSION = version
+
+    return _INDEX
+
+
+def lookup_sections(message: str) -> Tuple[List[dict], bool]:
+    """Exact section chunks for the references in a message → (chunks, complete)
+
+    Chunks have the shape of rag_retriever.retrieve_chunks: {"text", "score",
+    "metadata"}. complete → every reference named its act and was found, so
+    the chunks answer the question without a vector search; otherwise they
+    go ahead of the vector results (merge_exact).
+    """
+    found = _find_refs(message)
+    refs = find_section_refs(message)
+    if not refs:
+        return [], False
+
+    index = load_index()
+    _STATS["lookups"] += 1
+
+    chunks = []
+    for act, section in refs:
+        entry = index.get(act, {}).get(section)
+        if entry is None:
+            continue
+
+        header = f"{act} Section {section}"
+        if entry.get("chapter"):
+            header += f" (Chapter {entry['chapter']}"
+            header += f": {entry['chapter_title']})" if entry.get("chapter_title") else ")"
+
+        chunks.append({
+            "text": f"{header}\n{entry['text']}",
+            "score": 1.0,
+            "metadata": {
+                "source": entry.get("source", ""),
+                "act": act,
+                "section": section,
+                "title": entry.get("title", ""),
+                "chapter": entry.get("chapter", ""),
+                "page": entry.get("page", 0),
+                "match": "exact",
+            },
+        })
+
+    _STATS["hits" if chunks else "misses"] += 1
+    inc("lawai_cache_requests_total", cache="section_index", result="hit" if chunks else "miss")
+
+    # Only when the message names the act (a CrPC guess from "bail" could be wrong)
+    # and nothing was cut by MAX_SECTION_REFS or missing from the index
+    complete = (
+        bool(_ACT_ANYWHERE.search(message))
+        and all(len(acts) == 1 for acts, _ in found)
+        and len(chunks) == len(refs) == len(found)
+    )
+    return chunks, complete
+
+
+def merge_exact(exact: List[dict], chunks: List[dict]) -> List[dict]:
+    """Exact hits first, then the retrieved chunks that aren't the same section"""
+    seen = {(chunk["metadata"]["act"], chunk["metadata"]["section"]) for chunk in exact}
+    return exact + [
+        chunk for chunk in chunks
+        if (chunk.get("metadata", {}).get("act"), chunk.get("metadata", {}).get("section")) not in seen
+    ]
+
+
+def get_section_index_stats() -> dict:
+    index = load_index()
+    return {
+        **_STATS,
+        "sections": {act: len(sections) for act, sections in index.items()},
+    }
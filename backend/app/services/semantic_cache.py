@@ -0,0 +1,187 @@
+# Semantic answer cache (one per agent domain)
+# Near-duplicate questions ("what is Section 302", "section 302 enti?")
+# reuse the stored reply + reflection instead of retrieval + LLM calls.
+# Section numbers are part of the key: "section 302" and "section 304" embed
+# almost identically but never share an answer. Follow-ups that lean on the
+# chat memory ("what's the punishment for that?") are neither served from nor
+# stored in the cache: they depend on that one conversation. Standalone
+# questions stay cacheable in a chat with history.
+
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services.lru_cache import LRUCache
+from app.services.metrics import inc
+from app.services.rag_retriever import embed_query_async
+from app.services.section_index import find_section_refs
+from app.services.vector_store import DOMAIN_DBS, collection_version
+
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "1"
+
+# Cosine similarity needed to count as the "same" question
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+
+# Entries per domain + time-to-live (seconds)
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "512"))
+SEMANTIC_CACHE_TTL_S = float(os.getenv("SEMANTIC_CACHE_TTL_S", "86400"))
+
+# With chat memory, questions this short (in words) count as follow-ups
+SEMANTIC_CACHE_FOLLOWUP_WORDS = int(os.getenv("SEMANTIC_CACHE_FOLLOWUP_WORDS", "4"))
+
+# "what about that", "adhi bailable aa?", "same case lo" → refers back to earlier turns
+_ANAPHORA = re.compile(
+    r"\b(?:that|this|it|its|those|these|he|she|him|her|they|them|their|same|above|previous|earlier"
+    r"|again|also|then|what\s+about|adhi|idhi|dani|daani|deeni|vaadu|vaadi|aame|valla)\b",
+    re.IGNORECASE
+)
+
+_CACHES: Dict[str, LRUCache] = {}
+_VERSIONS: Dict[str, int] = {}
+_INVALIDATIONS: Dict[str, int] = {}
+_HITS: Dict[str, int] = {}
+_MISSES: Dict[str, int] = {}
+_BYPASSES: Dict[str, int] = {}
+_LOCK = threading.Lock()
+
+
+def _normalize(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+def _unit(vector) -> np.ndarray:
+    vec = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def depends_on_memory(question: str, memory: Optional[List[dict]]) -> bool:
+    """Follow-up whose answer depends on earlier turns → not cacheable
+
+    A section reference makes a question standalone ("section 302 enti?");
+    otherwise a very short or anaphoric question in a chat with history is
+    treated as a follow-up.
+    """
+    if not memory or find_section_refs(question):
+        return False
+    return len(question.split()) <= SEMANTIC_CACHE_FOLLOWUP_WORDS or bool(_ANAPHORA.search(question))
+
+
+def _get_cache(domain: str) -> LRUCache:
+    """Domain cache, cleared automatically when its vector DB is re-ingested"""
+    version = collection_version(DOMAIN_DBS[domain])
+
+    with _LOCK:
+        cache = _CACHES.get(domain)
+        if cache is None:
+            cache = LRUCache(maxsize=SEMANTIC_CACHE_SIZE, ttl=SEMANTIC_CACHE_TTL_S)
+            _CACHES[domain] = cache
+            _VERSIONS[domain] = version
+        elif _VERSIONS.get(domain) != version:
+            cache.clear()
+            _VERSIONS[domain] = version
+            _INVALIDATIONS[domain] = _INVALIDATIONS.get(domain, 0) + 1
+
+    return cache
+
+
+async def lookup_answer(domain: str, question: str, memory: Optional[List[dict]] = None) -> Optional[dict]:
+    """Stored {"reply", "reflection", "message_id", "similarity"} or None
+
+    memory: the chat history the reply would be built with (follow-ups → no lookup).
+    """
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+
+    if depends_on_memory(question, memory):
+        _BYPASSES[domain] = _BYPASSES.get(domain, 0) + 1
+        inc("lawai_cache_requests_total", cache="answer", result="bypass")
+        return None
+
+    cache = _get_cache(domain)
+    entry = await _find(cache, question)
+
+    counter = _HITS if entry is not None else _MISSES
+    counter[domain] = counter.get(domain, 0) + 1
+    inc("lawai_cache_requests_total", cache="answer", result="hit" if entry is not None else "miss")
+    return entry
+
+
+async def _find(cache: LRUCache, question: str) -> Optional[dict]:
+    # ⚡ Exact repeat → no embedding needed
+    entry = cache.get(_normalize(question))
+    if entry is not None:
+        return {**entry, "similarity": 1.0}
+
+    # Only questions about the same sections (or none) can match
+    sections = tuple(find_section_refs(question))
+    entries = [(key, value) for key, value in cache.items() if value["sections"] == sections]
+    if not entries:
+        return None
+
+    query_vec = _unit(await embed_query_async(question))
+    matrix = np.stack([value["vector"] for _, value in entries])
+    scores = matrix @ query_vec
+
+    best = int(np.argmax(scores))
+    if scores[best] < SEMANTIC_CACHE_THRESHOLD:
+        return None
+
+    key, entry = entries[best]
+    cache.get(key)  # refresh LRU position
+    return {**entry, "similarity": round(float(scores[best]), 4)}
+
+
+async def remember_answer(
+    domain: str,
+    question: str,
+    reply: str,
+    reflection: Optional[dict] = None,
+    message_id: Optional[str] = None,
+    memory: Optional[List[dict]] = None
+) -> None:
+    """Store a fresh reply (+ reflection if we already have it)"""
+    if not SEMANTIC_CACHE_ENABLED or depends_on_memory(question, memory):
+        return
+
+    vector = _unit(await embed_query_async(question))
+
+    _get_cache(domain).put(_normalize(question), {
+        "vector": vector,
+        "sections": tuple(find_section_refs(question)),
+        "reply": reply,
+        "reflection": reflection,
+        "message_id": message_id,
+    })
+
+
+def invalidate_domain(domain: str) -> None:
+    """Drop every cached answer for a domain (call after re-ingest)"""
+    cache = _CACHES.get(domain)
+    if cache is not None:
+        cache.clear()
+        _INVALIDATIONS[domain] = _INVALIDATIONS.get(domain, 0) + 1
+
+
+def get_cache_stats() -> dict:
+    stats = {}
+
+    for domain, cache in _CACHES.items():
+        hits = _HITS.get(domain, 0)
+        lookups = hits + _MISSES.get(domain, 0)
+        stats[domain] = {
+            "size": len(cache),
+            "maxsize": cache.maxsize,
+            "evictions": cache.evictions,
+            "hits": hits,
+            "misses": _MISSES.get(domain, 0),
+            "bypassed_followups": _BYPASSES.get(domain, 0),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "invalidations": _INVALIDATIONS.get(domain, 0),
+        }
+
+    return stats
@@ -0,0 +1,124 @@
+# Process-wide registry for the embedding model and Chroma stores
+# Model weights load ONCE per worker, each domain DB opens ONCE
+
+import os
+import threading
+import time
+from typing import Dict
+
+from langchain_community.vectorstores import Chroma
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Domain → persisted Chroma directory
+DOMAIN_DBS: Dict[str, str] = {
+    "law": "vectordb/law_db",
+    "police": "vectordb/police_db",
+    "press": "vectordb/press_db",
+}
+
+# "chroma" (HNSW, float32 per worker) or "flat" (quantized mmap, see flat_index.py)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+
+_EMBEDDING = None
+_STORES: Dict[str, Chroma] = {}
+_LOCK = threading.Lock()
+
+# One lock per DB → different domain stores can open in parallel
+_STORE_LOCKS: Dict[str, threading.Lock] = {}
+
+_STATS = {
+    "embedding_loads": 0,
+    "embedding_hits": 0,
+    "embedding_load_seconds": 0.0,
+    "store_loads": 0,
+    "store_hits": 0,
+    "store_load_seconds": 0.0,
+}
+
+
+def get_embedding() -> HuggingFaceEmbeddings:
+    """Get the shared MiniLM embedding model (loaded on first use)"""
+    global _EMBEDDING
+
+    if _EMBEDDING is not None:
+        _STATS["embedding_hits"] += 1
+        return _EMBEDDING
+
+    with _LOCK:
+        # Another thread may have loaded it while we waited
+        if _EMBEDDING is None:
+            started = time.perf_counter()
+            _EMBEDDING = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+            _STATS["embedding_loads"] += 1
+            _STATS["embedding_load_seconds"] += time.perf_counter() - started
+        else:
+            _STATS["embedding_hits"] += 1
+
+    return _EMBEDDING
+
+
+def get_store(db_path: str) -> Chroma:
+    """Get the opened Chroma store for a persist directory"""
+    store = _STORES.get(db_path)
+    if store is not None:
+        _STATS["store_hits"] += 1
+        return store
+
+    embedding = get_embedding()
+
+    with _LOCK:
+        store_lock = _STORE_LOCKS.setdefault(db_path, threading.Lock())
+
+    with store_lock:
+        store = _STORES.get(db_path)
+        if store is None:
+            started = time.perf_counter()
+            store = Chroma(
+                persist_directory=db_path,
+                embedding_function=embedding
+            )
+            _STORES[db_path] = store
+            _STATS["store_loads"] += 1
+            _STATS["store_load_seconds"] += time.perf_counter() - started
+        else:
+            _STATS["store_hits"] += 1
+
+    return store
+
+
+def warm_up() -> None:
+    """Load the embedding model and open every domain DB"""
+    get_embedding()
+
+    # Flat backend → Chroma only opens lazily for DBs without a flat index
+    if VECTOR_BACKEND == "flat":
+        return
+
+    for db_path in DOMAIN_DBS.values():
+        get_store(db_path)
+
+
+def reset_store(db_path: str) -> None:
+    """Drop a cached store so the next call reopens it (after re-ingest)"""
+    with _LOCK:
+        _STORES.pop(db_path, None)
+
+
+def collection_version(db_path: str) -> int:
+    """Changes whenever the persisted collection is rewritten (re-ingest)"""
+    try:
+        return os.stat(os.path.join(db_path, "chroma.sqlite3")).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def get_registry_stats() -> dict:
+    """Load / hit counters for the registry"""
+    return {
+        **_STATS,
+        "embedding_loaded": _EMBEDDING is not None,
+        "open_stores": sorted(_STORES.keys()),
+    }
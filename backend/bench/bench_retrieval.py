@@ -0,0 +1,104 @@
+# 📊 Retrieval benchmark: vector vs BM25 vs hybrid (RRF) on a labelled query set
+#
+#   python -m bench.bench_retrieval
+#   python -m bench.bench_retrieval --k 2 4 8 --modes vector hybrid --json out.json
+#   python -m bench.bench_retrieval --rerank        → also each mode + cross-encoder
+#
+# A retrieved chunk is relevant when it contains one of the query's
+# "relevant" snippets (whitespace / case-insensitive), so labels survive
+# re-chunking. Latency is per uncached search; query vectors are warmed first.
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import List
+
+from app.services.rag_retriever import clear_result_caches, embed_query, retrieve_chunks
+from app.services.vector_store import DOMAIN_DBS
+from bench.stats import percentile
+
+
+QUERIES_PATH = Path(__file__).with_name("retrieval_queries.json")
+MODES = ["vector", "bm25", "hybrid"]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def first_relevant_rank(chunks: List[dict], relevant: List[str]) -> int:
+    """1-based rank of the first relevant chunk, 0 if none"""
+    snippets = [_normalize(snippet) for snippet in relevant]
+    for rank, chunk in enumerate(chunks, start=1):
+        text = _normalize(chunk["text"])
+        if any(snippet in text for snippet in snippets):
+            return rank
+    return 0
+
+
+def run_mode(queries: List[dict], mode: str, k: int, rerank: bool = False) -> dict:
+    ranks, latencies, context_chars = [], [], []
+
+    for item in queries:
+        clear_result_caches()
+        started = time.perf_counter()
+        chunks = retrieve_chunks(item["query"], DOMAIN_DBS[item["domain"]], k=k, mode=mode, rerank=rerank)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        ranks.append(first_relevant_rank(chunks, item["relevant"]))
+        context_chars.append(sum(len(chunk["text"]) for chunk in chunks))
+
+    return {
+        "mode": f"{mode}+rerank" if rerank else mode,
+        "k": k,
+        "queries": len(queries),
+        f"recall@{k}": round(sum(1 for r in ranks if r) / len(ranks), 3),
+        "mrr": round(sum(1 / r for r in ranks if r) / len(ranks), 3),
+        "avg_context_chars": round(statistics.mean(context_chars)),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare vector / BM25 / hybrid retrieval")
+    parser.add_argument("--queries", type=Path, default=QUERIES_PATH)
+    parser.add_argument("--modes", nargs="+", default=MODES)
+    parser.add_argument("--k", nargs="+", type=int, default=[4])
+    parser.add_argument("--domain", help="only queries of this domain")
+    parser.add_argument("--rerank", action="store_true", help="also run every mode with reranking")
+    parser.add_argument("--json", type=Path, help="also write the results here")
+    args = parser.parse_args()
+
+    unknown = [mode for mode in args.modes if mode not in MODES]
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(unknown)}")
+
+    queries = json.loads(args.queries.read_text(encoding="utf-8"))
+    if args.domain:
+        queries = [item for item in queries if item["domain"] == args.domain]
+
+    # 🔥 Model load + query vectors out of the timed loop
+    for item in queries:
+        embed_query(item["query"])
+
+    results = []
+    for k in args.k:
+        for mode in args.modes:
+            for rerank in ([False, True] if args.rerank else [False]):
+                result = run_mode(queries, mode, k, rerank)
+                results.append(result)
+                print(
+                    f"{result['mode']:>14} k={k:<3} recall={result[f'recall@{k}']:.3f} "
+                    f"mrr={result['mrr']:.3f} ctx={result['avg_context_chars']:>6} chars "
+                    f"p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms"
+                )
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=1), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
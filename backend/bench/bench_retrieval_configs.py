@@ -0,0 +1,338 @@
+# 🧪 Retrieval configuration benchmark: chunker × backend × k, per domain DB
+#
+#   python -m bench.bench_retrieval_configs
+#   python -m bench.bench_retrieval_configs --chunkers stored statute recursive --domains law
+#   python -m bench.bench_retrieval_configs --backends chroma flat-int8 bm25 --k 2 4 8 --json out.json
+#
+# Every configuration is built from scratch in a temp dir (the live DBs are
+# never opened for writing) and scored on bench/retrieval_queries.json:
+# recall@k, MRR, query-embedding time, search time, index size and the RSS
+# the build added. "stored" = the chunks + vectors already in vectordb/<domain>_db;
+# any other name re-chunks the domain's sources with ingestion.chunkers.CHUNKERS.
+#
+# New backend → one builder in BACKENDS: (corpus, workdir) → (search, nbytes),
+# search(query, query_vector, k) returning chunks best first.
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import chromadb
+import numpy as np
+
+from app.services.bm25_index import BM25Index, save_index as save_bm25_index
+from app.services.flat_index import FlatIndex, save_index as save_flat_index
+from app.services.rag_retriever import HYBRID_CANDIDATES, rrf_fuse
+from app.services.vector_store import DOMAIN_DBS, get_embedding
+from bench.bench_retrieval import QUERIES_PATH, first_relevant_rank
+from bench.stats import percentile
+from ingestion.chunkers import CHUNKERS
+from ingestion.pipeline import COLLECTION_NAME, build_chunks
+from ingestion.embedder import embed_texts
+
+
+STORED = "stored"
+
+# Fewer labelled queries than this → a domain's ranking is mostly noise
+MIN_QUERIES = 15
+
+Search = Callable[[str, Optional[np.ndarray], int], List[dict]]
+
+
+def _rss_mb() -> float:
+    """Current resident set size (Linux), 0 where /proc isn't available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return 0.0
+
+
+# =====================================================
+# 📚 CORPORA
+# {"texts", "metadatas", "vectors" (n × dim float32 or None)}
+# =====================================================
+def stored_corpus(domain: str, workdir: str) -> Optional[dict]:
+    db_path = DOMAIN_DBS[domain]
+    if not os.path.exists(os.path.join(db_path, "chroma.sqlite3")):
+        print(f"⚠️ [{domain}] no Chroma DB at {db_path} (run ingest.py first)")
+        return None
+
+    # Chroma rewrites files it opens → read a copy, never the live DB
+    copy = os.path.join(workdir, "stored")
+    shutil.copytree(db_path, copy)
+    collection = chromadb.PersistentClient(path=copy).get_collection(COLLECTION_NAME)
+    stored = collection.get(include=["documents", "metadatas", "embeddings"])
+
+    return {
+        "texts": stored["documents"],
+        "metadatas": [m or {} for m in stored["metadatas"]],
+        "vectors": np.asarray(stored["embeddings"], dtype=np.float32),
+    }
+
+
+def chunked_corpus(domain: str, chunker: str, need_vectors: bool) -> dict:
+    chunks = list(build_chunks(domain, chunker).values())
+    texts = [chunk["text"] for chunk in chunks]
+
+    vectors = None
+    if need_vectors:
+        vectors, stats = embed_texts(texts, label=f"[{domain}/{chunker}]")
+        print(f"🔢 [{domain}/{chunker}] {len(texts)} chunks at {stats['chunks_per_sec']} chunks/s")
+
+    return {"texts": texts, "metadatas": [chunk["metadata"] for chunk in chunks], "vectors": vectors}
+
+
+# =====================================================
+# 🗂️ BACKENDS
+# =====================================================
+def build_chroma(corpus: dict, workdir: str) -> Tuple[Search, int]:
+    client = chromadb.PersistentClient(path=os.path.join(workdir, "chroma"))
+    collection = client.create_collection(COLLECTION_NAME)
+
+    vectors = corpus["vectors"]
+    for start in range(0, len(vectors), 1024):
+        end = start + 1024
+        collection.add(
+            ids=[str(i) for i in range(start, min(end, len(vectors)))],
+            embeddings=vectors[start:end],
+            # Scoring only needs the text (and Chroma rejects empty metadata dicts)
+            documents=corpus["texts"][start:end],
+        )
+
+    def search(query: str, vector: np.ndarray, k: int) -> List[dict]:
+        found = collection.query(query_embeddings=[vector.tolist()], n_results=k)
+        return [{"text": text} for text in found["documents"][0]]
+
+    return search, vectors.nbytes
+
+
+def build_exact(corpus: dict, workdir: str) -> Tuple[Search, int]:
+    vectors = corpus["vectors"]
+
+    def search(query: str, vector: np.ndarray, k: int) -> List[dict]:
+        scores = vectors @ vector
+        top = np.argsort(-scores, kind="stable")[:k]
+        return [{"text": corpus["texts"][i]} for i in top]
+
+    return search, vectors.nbytes
+
+
+def _flat_builder(dtype: str) -> Callable:
+    def build(corpus: dict, workdir: str) -> Tuple[Search, int]:
+        path = os.path.join(workdir, f"flat-{dtype}")
+        save_flat_index(path, corpus["vectors"], corpus["texts"], corpus["metadatas"], dtype)
+        index = FlatIndex(path)
+
+        def search(query: str, vector: np.ndarray, k: int) -> List[dict]:
+            return index.search(vector, k)
+
+        return search, index.nbytes()
+
+    return build
+
+
+def build_bm25(corpus: dict, workdir: str) -> Tuple[Search, int]:
+    path = os.path.join(workdir, "bm25")
+    save_bm25_index(path, corpus["texts"], corpus["metadatas"])
+    index = BM25Index(path)
+
+    def search(query: str, vector: Optional[np.ndarray], k: int) -> List[dict]:
+        return index.search(query, k)
+
+    nbytes = index.postings_doc.nbytes + index.postings_tf.nbytes + index.term_offsets.nbytes
+    return search, nbytes
+
+
+def build_hybrid(corpus: dict, workdir: str) -> Tuple[Search, int]:
+    # Same fusion as rag_retriever's "hybrid" mode, over the exact dense ranking
+    dense, dense_bytes = build_exact(corpus, workdir)
+    sparse, sparse_bytes = build_bm25(corpus, workdir)
+
+    def search(query: str, vector: np.ndarray, k: int) -> List[dict]:
+        candidates = max(k, HYBRID_CANDIDATES)
+        return rrf_fuse([dense(query, vector, candidates), sparse(query, None, candidates)], k)
+
+    return search, dense_bytes + sparse_bytes
+
+
+# name → (builder, needs vectors)
+BACKENDS: Dict[str, Tuple[Callable, bool]] = {
+    "chroma": (build_chroma, True),
+    "exact": (build_exact, True),
+    "flat-int8": (_flat_builder("int8"), True),
+    "flat-float16": (_flat_builder("float16"), True),
+    "bm25": (build_bm25, False),
+    "hybrid": (build_hybrid, True),
+}
+
+
+# =====================================================
+# 📏 MEASUREMENT
+# =====================================================
+def embed_queries(queries: List[dict]) -> Tuple[List[np.ndarray], List[float]]:
+    """Query vectors + per-query embedding time (uncached, model warmed first)"""
+    model = get_embedding()
+    model.embed_query("warm up")
+
+    vectors, timings = [], []
+    for item in queries:
+        started = time.perf_counter()
+        vector = model.embed_query(item["query"])
+        timings.append((time.perf_counter() - started) * 1000)
+        vectors.append(np.asarray(vector, dtype=np.float32))
+
+    return vectors, timings
+
+
+def run_config(domain: str, chunker: str, backend: str, corpus: dict, queries: List[dict],
+               query_vectors: List[Optional[np.ndarray]], ks: List[int]) -> List[dict]:
+    builder, _ = BACKENDS[backend]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        rss_before = _rss_mb()
+        started = time.perf_counter()
+        search, nbytes = builder(corpus, workdir)
+        build_s = time.perf_counter() - started
+        rss_delta = max(0.0, _rss_mb() - rss_before)
+
+        results = []
+        for k in ks:
+            ranks, latencies, context_chars = [], [], []
+            for item, vector in zip(queries, query_vectors):
+                started = time.perf_counter()
+                chunks = search(item["query"], vector, k)
+                latencies.append((time.perf_counter() - started) * 1000)
+
+                ranks.append(first_relevant_rank(chunks, item["relevant"]))
+                context_chars.append(sum(len(chunk["text"]) for chunk in chunks))
+
+            results.append({
+                "domain": domain,
+                "chunker": chunker,
+                "backend": backend,
+                "k": k,
+                "chunks": len(corpus["texts"]),
+                "queries": len(queries),
+                "recall": round(sum(1 for r in ranks if r) / len(ranks), 3),
+                "mrr": round(sum(1 / r for r in ranks if r) / len(ranks), 3),
+                "avg_context_chars": round(statistics.mean(context_chars)),
+                "search_p50_ms": round(percentile(latencies, 50), 3),
+                "search_p95_ms": round(percentile(latencies, 95), 3),
+                "index_mb": round(nbytes / 2**20, 2),
+                "rss_delta_mb": round(rss_delta, 1),
+                "build_s": round(build_s, 2),
+                "ranks": ranks,
+            })
+
+    return results
+
+
+def summarize(results: List[dict]) -> List[dict]:
+    """All domains pooled per (chunker, backend, k) → the number to decide on"""
+    groups: Dict[tuple, List[dict]] = {}
+    for result in results:
+        groups.setdefault((result["chunker"], result["backend"], result["k"]), []).append(result)
+
+    summary = []
+    for (chunker, backend, k), rows in groups.items():
+        ranks = [rank for row in rows for rank in row["ranks"]]
+        summary.append({
+            "chunker": chunker,
+            "backend": backend,
+            "k": k,
+            "queries": len(ranks),
+            "recall": round(sum(1 for r in ranks if r) / len(ranks), 3),
+            "mrr": round(sum(1 / r for r in ranks if r) / len(ranks), 3),
+            # Query-weighted mean of the per-domain medians
+            "search_p50_ms": round(sum(r["search_p50_ms"] * r["queries"] for r in rows) / len(ranks), 3),
+            "index_mb": round(sum(r["index_mb"] for r in rows), 2),
+        })
+
+    return sorted(summary, key=lambda row: (row["k"], -row["recall"], -row["mrr"], row["search_p50_ms"]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare chunker × backend × k retrieval configurations")
+    parser.add_argument("--queries", type=Path, default=QUERIES_PATH)
+    parser.add_argument("--domains", nargs="+", default=list(DOMAIN_DBS))
+    parser.add_argument("--chunkers", nargs="+", default=[STORED],
+                        help=f"'{STORED}' and/or names from ingestion.chunkers.CHUNKERS")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    parser.add_argument("--k", nargs="+", type=int, default=[4])
+    parser.add_argument("--json", type=Path, help="also write per-domain results + summary here")
+    args = parser.parse_args()
+
+    for label, chosen, known in (
+        ("domain", args.domains, DOMAIN_DBS),
+        ("chunker", args.chunkers, [STORED, *CHUNKERS]),
+        ("backend", args.backends, BACKENDS),
+    ):
+        unknown = [name for name in chosen if name not in known]
+        if unknown:
+            parser.error(f"unknown {label}(s): {', '.join(unknown)}")
+
+    all_queries = json.loads(args.queries.read_text(encoding="utf-8"))
+    need_vectors = any(BACKENDS[name][1] for name in args.backends)
+
+    results = []
+    for domain in args.domains:
+        queries = [item for item in all_queries if item["domain"] == domain]
+        if not queries:
+            print(f"\n⚠️ [{domain}] no labelled queries in {args.queries} → skipped")
+            continue
+        if len(queries) < MIN_QUERIES:
+            print(f"\n⚠️ [{domain}] only {len(queries)} labelled queries → treat its ranking as a rough hint")
+
+        query_vectors: List[Optional[np.ndarray]] = [None] * len(queries)
+        embed_ms = None
+        if need_vectors:
+            query_vectors, timings = embed_queries(queries)
+            embed_ms = round(percentile(timings, 50), 2)
+
+        print(f"\n[{domain}] {len(queries)} queries" + (f", embedding p50={embed_ms}ms" if need_vectors else ""))
+
+        for chunker in args.chunkers:
+            with tempfile.TemporaryDirectory() as workdir:
+                if chunker == STORED:
+                    corpus = stored_corpus(domain, workdir)
+                    if corpus is None:
+                        continue
+                else:
+                    corpus = chunked_corpus(domain, chunker, need_vectors)
+
+                for backend in args.backends:
+                    for result in run_config(domain, chunker, backend, corpus, queries, query_vectors, args.k):
+                        result["embed_p50_ms"] = embed_ms
+                        results.append(result)
+                        print(
+                            f"  {chunker:>9} {backend:>12} k={result['k']:<3} "
+                            f"recall={result['recall']:.3f} mrr={result['mrr']:.3f} "
+                            f"search p50={result['search_p50_ms']:.3f}ms p95={result['search_p95_ms']:.3f}ms "
+                            f"index={result['index_mb']} MB (+{result['rss_delta_mb']} MB RSS) "
+                            f"chunks={result['chunks']}"
+                        )
+
+    summary = summarize(results)
+    print("\n📊 All domains")
+    for row in summary:
+        print(
+            f"  {row['chunker']:>9} {row['backend']:>12} k={row['k']:<3} recall={row['recall']:.3f} "
+            f"mrr={row['mrr']:.3f} search p50={row['search_p50_ms']:.3f}ms index={row['index_mb']} MB "
+            f"({row['queries']} queries)"
+        )
+
+    if args.json:
+        for result in results:
+            result.pop("ranks")
+        args.json.write_text(json.dumps({"results": results, "summary": summary}, indent=1), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
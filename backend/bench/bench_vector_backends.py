@@ -0,0 +1,130 @@
+# 📊 Vector backend benchmark: Chroma HNSW vs quantized flat index (int8 / float16)
+#
+#   python -m bench.bench_vector_backends
+#   python -m bench.bench_vector_backends --domains press --k 4 10 --queries 500
+#
+# Ground truth = exact float32 cosine over the vectors stored in Chroma.
+# Query vectors are stored vectors + small noise (no embedding model needed),
+# so the numbers measure index error, not embedding quality.
+
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+import chromadb
+import numpy as np
+
+from app.services.flat_index import FlatIndex, save_index
+from app.services.vector_store import DOMAIN_DBS
+from bench.stats import percentile
+from ingestion.pipeline import COLLECTION_NAME
+
+
+def _query_vectors(vectors: np.ndarray, count: int, noise: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.integers(0, len(vectors), size=count)]
+    queries = picks + rng.normal(0, noise, size=picks.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def _measure(name: str, search: Callable, queries: np.ndarray, truth: List[set], k: int,
+             nbytes: int) -> dict:
+    latencies, recalls = [], []
+
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        found = search(query, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        recalls.append(len(set(found) & expected) / len(expected))
+
+    return {
+        "backend": name,
+        "k": k,
+        "recall": round(statistics.mean(recalls), 4),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "vector_mb": round(nbytes / 2**20, 2),
+    }
+
+
+def bench_domain(domain: str, ks: List[int], count: int, noise: float, seed: int) -> List[dict]:
+    db_path = DOMAIN_DBS[domain]
+    if not os.path.exists(os.path.join(db_path, "chroma.sqlite3")):
+        print(f"⚠️ [{domain}] no Chroma DB at {db_path} (run ingest.py first)")
+        return []
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # Chroma rewrites files it opens → benchmark a copy, never the live DB
+        chroma_path = os.path.join(tmp, "chroma")
+        shutil.copytree(db_path, chroma_path)
+
+        collection = chromadb.PersistentClient(path=chroma_path).get_collection(COLLECTION_NAME)
+        stored = collection.get(include=["documents", "metadatas", "embeddings"])
+        ids = stored["ids"]
+        vectors = np.asarray(stored["embeddings"], dtype=np.float32)
+        if len(vectors) < 2:
+            print(f"⚠️ [{domain}] only {len(vectors)} vector(s), skipped")
+            return []
+
+        queries = _query_vectors(vectors, count, noise, seed)
+        exact = queries @ vectors.T
+        print(f"\n[{domain}] {len(vectors)} vectors × {vectors.shape[1]} dims, {count} queries")
+
+        flat = {}
+        for dtype in ("int8", "float16"):
+            path = os.path.join(tmp, dtype)
+            save_index(path, vectors, stored["documents"], [m or {} for m in stored["metadatas"]], dtype)
+            flat[dtype] = FlatIndex(path)
+
+        for k in ks:
+            k = min(k, len(vectors))
+            truth_rows = np.argsort(-exact, axis=1)[:, :k]
+            truth = [set(row.tolist()) for row in truth_rows]
+            truth_ids = [{ids[i] for i in row} for row in truth_rows]
+
+            def chroma_search(query, k):
+                return collection.query(query_embeddings=[query.tolist()], n_results=k)["ids"][0]
+
+            def flat_search(index):
+                def search(query, k):
+                    scores = index.scores(query)
+                    return np.argpartition(-scores, k - 1)[:k].tolist()
+                return search
+
+            runs = [
+                _measure("chroma-hnsw", chroma_search, queries, truth_ids, k, vectors.nbytes),
+                _measure("flat-int8", flat_search(flat["int8"]), queries, truth, k, flat["int8"].nbytes()),
+                _measure("flat-float16", flat_search(flat["float16"]), queries, truth, k, flat["float16"].nbytes()),
+            ]
+            for run in runs:
+                print(f"  {run['backend']:>13} k={k:<3} recall={run['recall']:.4f} "
+                      f"p50={run['p50_ms']:.3f}ms p95={run['p95_ms']:.3f}ms vectors={run['vector_mb']} MB")
+            results.extend({"domain": domain, **run} for run in runs)
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare Chroma HNSW with the quantized flat index")
+    parser.add_argument("--domains", nargs="+", default=list(DOMAIN_DBS))
+    parser.add_argument("--k", nargs="+", type=int, default=[4, 10])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    unknown = [domain for domain in args.domains if domain not in DOMAIN_DBS]
+    if unknown:
+        parser.error(f"unknown domain(s): {', '.join(unknown)}")
+
+    for domain in args.domains:
+        bench_domain(domain, args.k, args.queries, args.noise, args.seed)
+
+
+if __name__ == "__main__":
+    main()
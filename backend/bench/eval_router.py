@@ -0,0 +1,112 @@
+# 🚦 Offline evaluation of the intent router on a labelled query set
+#
+#   python -m bench.eval_router
+#   python -m bench.eval_router --queries my_queries.json --errors
+#
+# Compares the old substring rules, the word-boundary keyword rules, pure
+# embedding argmax and the full router (embedding + low-margin fallback),
+# and times the routing step itself (query vectors already computed).
+
+import argparse
+import json
+import statistics
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from app.agents.decide_agent import (
+    DEFAULT_AGENT,
+    INTENT_EXEMPLARS,
+    classify_vector,
+    keyword_agent,
+    warm_up_router,
+)
+from app.services.rag_retriever import embed_query
+
+
+QUERIES_PATH = Path(__file__).with_name("router_queries.json")
+
+
+def legacy_agent(message: str) -> str:
+    """The original substring rules (baseline)"""
+    msg = message.lower()
+    if any(word in msg for word in ["news", "article", "press", "media", "headline", "journalist", "report"]):
+        return "PRESS"
+    if any(word in msg for word in ["fir", "complaint", "investigation", "arrest", "accused", "police"]):
+        return "POLICE"
+    return "LAW"
+
+
+def evaluate(name: str, predict: Callable[[dict], str], queries: List[dict], show_errors: bool) -> dict:
+    predictions = [predict(item) for item in queries]
+    correct = [p == item["agent"] for p, item in zip(predictions, queries)]
+    confusion = Counter((item["agent"], p) for p, item in zip(predictions, queries))
+
+    per_agent = {}
+    for agent in INTENT_EXEMPLARS:
+        total = sum(1 for item in queries if item["agent"] == agent)
+        per_agent[agent] = round(confusion[(agent, agent)] / total, 3) if total else None
+
+    print(f"{name:>18}: accuracy {sum(correct) / len(queries):.3f}  per-agent {per_agent}")
+    if show_errors:
+        for ok, p, item in zip(correct, predictions, queries):
+            if not ok:
+                print(f"{'':>20}✗ {item['agent']:>6} → {p:<6} {item['query']}")
+
+    return {"method": name, "accuracy": round(sum(correct) / len(queries), 3), "per_agent": per_agent}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Evaluate the intent router")
+    parser.add_argument("--queries", type=Path, default=QUERIES_PATH)
+    parser.add_argument("--errors", action="store_true", help="print misrouted queries")
+    parser.add_argument("--json", type=Path, help="also write the results here")
+    args = parser.parse_args()
+
+    queries = json.loads(args.queries.read_text(encoding="utf-8"))
+    print(f"{len(queries)} labelled queries\n")
+
+    results = [
+        evaluate("substring (old)", lambda item: legacy_agent(item["query"]), queries, args.errors),
+        evaluate("keywords", lambda item: keyword_agent(item["query"]) or DEFAULT_AGENT, queries, args.errors),
+    ]
+
+    if not warm_up_router():
+        print("\n⚠️ Embedding model unavailable → only keyword methods evaluated")
+    else:
+        vectors: Dict[str, tuple] = {item["query"]: embed_query(item["query"]) for item in queries}
+
+        def embedding_only(item: dict) -> str:
+            scores = classify_vector(item["query"], vectors[item["query"]])["scores"]
+            return max(scores, key=scores.get)
+
+        results.append(evaluate("embedding", embedding_only, queries, args.errors))
+        results.append(evaluate(
+            "router",
+            lambda item: classify_vector(item["query"], vectors[item["query"]])["agent"],
+            queries,
+            args.errors
+        ))
+
+        # ⏱️ Routing step only (vector comes from the shared embedding cache)
+        latencies = []
+        for _ in range(20):
+            for item in queries:
+                started = time.perf_counter()
+                classify_vector(item["query"], vectors[item["query"]])
+                latencies.append((time.perf_counter() - started) * 1e6)
+        latencies.sort()
+        timing = {
+            "p50_us": round(statistics.median(latencies), 1),
+            "p99_us": round(latencies[int(len(latencies) * 0.99) - 1], 1),
+        }
+        print(f"\nrouting step: p50 {timing['p50_us']} µs, p99 {timing['p99_us']} µs")
+        results.append({"method": "router_latency", **timing})
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=1), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# 🧪 Local OpenAI-compatible stand-in for benchmarks (stdlib only, no network)
+#
+#   python -m bench.fake_openai --port 8089 --latency-ms 300 --tokens-per-s 60
+#   OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=fake uvicorn app.main:app
+#
+# Serves POST /v1/chat/completions (plain + stream=True SSE). Latency is time
+# to first token, then completion tokens arrive at --tokens-per-s. Judge and
+# reflection prompts get the STRICT JSON they ask for, so the whole pipeline
+# runs as it would against the real API. Fault injection: --error-rate (500s),
+# --rate-limit-rate (429 + Retry-After), --slow-rate / --slow-ms (tail latency).
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+DEFAULT_PORT = 8089
+
+_ANSWER_WORDS = (
+    "Under the applicable provisions the offence is cognizable and the police "
+    "must register an FIR. You may approach the magistrate if they refuse. "
+    "This is general legal information, not legal advice."
+).split()
+
+
+class FakeConfig:
+    def __init__(self, latency_ms: float = 100.0, tokens_per_s: float = 200.0,
+                 reply_tokens: int = 60, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 retry_after_s: float = 1.0, slow_rate: float = 0.0, slow_ms: float = 2000.0,
+                 seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.tokens_per_s = tokens_per_s
+        self.reply_tokens = reply_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after_s = retry_after_s
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "errors": 0, "rate_limited": 0, "slow": 0}
+
+    def draw(self) -> str:
+        """This request's fate: ok, slow, error or rate_limited"""
+        with self.lock:
+            self.counts["requests"] += 1
+            roll = self.random.random()
+            if roll < self.error_rate:
+                fate = "error"
+            elif roll < self.error_rate + self.rate_limit_rate:
+                fate = "rate_limited"
+            elif self.random.random() < self.slow_rate:
+                fate = "slow"
+            else:
+                return "ok"
+            self.counts[{"error": "errors"}.get(fate, fate)] += 1
+        return fate
+
+
+def _reply_for(messages: list, reply_tokens: int) -> str:
+    system = messages[0]["content"] if messages else ""
+
+    if "AI judge" in system:
+        return json.dumps({"winner": "law_agent", "confidence": 80, "reason": "Most complete answer"})
+    if "quality reviewer" in system:
+        return json.dumps({"confidence": 75, "notes": "Generic but safe"})
+
+    words = [_ANSWER_WORDS[i % len(_ANSWER_WORDS)] for i in range(reply_tokens)]
+    return " ".join(words)
+
+
+def _prompt_tokens(messages: list) -> int:
+    # ~4 characters per token, same estimate as prompt_builder
+    return sum(len(m.get("content") or "") for m in messages) // 4 + 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    config: FakeConfig
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, body: dict, headers: Optional[dict] = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self) -> None:
+        try:
+            self._complete()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client gave up (timeout / cancelled hedge) → nothing to answer
+            self.close_connection = True
+
+    def _complete(self) -> None:
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        messages = payload.get("messages", [])
+        config = self.config
+
+        fate = config.draw()
+        time.sleep((config.latency_ms + (config.slow_ms if fate == "slow" else 0)) / 1000)
+
+        if fate == "error":
+            self._send_json(500, {"error": {"message": "Injected failure", "type": "server_error"}})
+            return
+        if fate == "rate_limited":
+            self._send_json(
+                429,
+                {"error": {"message": "Injected rate limit", "type": "rate_limit_exceeded"}},
+                headers={"Retry-After": f"{config.retry_after_s:g}"}
+            )
+            return
+
+        reply = _reply_for(messages, config.reply_tokens)
+        # Keep the spaces with the words → joined deltas == reply
+        tokens = [word + " " for word in reply.split(" ")]
+        tokens[-1] = tokens[-1].rstrip()
+        usage = {
+            "prompt_tokens": _prompt_tokens(messages),
+            "completion_tokens": len(tokens),
+            "total_tokens": _prompt_tokens(messages) + len(tokens),
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = payload.get("model", "fake")
+
+        if payload.get("stream"):
+            self._stream(completion_id, model, tokens, usage, payload.get("stream_options") or {})
+            return
+
+        time.sleep(len(tokens) / config.tokens_per_s)
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": reply},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    def _stream(self, completion_id: str, model: str, tokens: list, usage: dict, options: dict) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def send(chunk: dict) -> None:
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        base = {"id": completion_id, "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": model}
+        delay = 1.0 / self.config.tokens_per_s
+
+        for i, token in enumerate(tokens):
+            delta = {"role": "assistant", "content": token} if i == 0 else {"content": token}
+            send({**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+            time.sleep(delay)
+
+        send({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if options.get("include_usage"):
+            send({**base, "choices": [], "usage": usage})
+
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_server(config: FakeConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serve in a daemon thread; port 0 → any free port (server.server_port)"""
+    handler = type("FakeOpenAIHandler", (_Handler,), {"config": config})
+    # Default listen backlog (5) drops bursts of connects → 1 s SYN retries
+    server_class = type("FakeOpenAIServer", (ThreadingHTTPServer,), {"request_queue_size": 256})
+    server = server_class((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-openai", daemon=True).start()
+    return server
+
+
+def base_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/v1"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="time to first token")
+    parser.add_argument("--tokens-per-s", type=float, default=200.0, help="completion token rate")
+    parser.add_argument("--reply-tokens", type=int, default=60, help="tokens per answer")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls that return 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of calls that return 429")
+    parser.add_argument("--retry-after-s", type=float, default=1.0, help="Retry-After sent with each 429")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of calls with extra latency")
+    parser.add_argument("--slow-ms", type=float, default=2000.0, help="extra latency of a slow call")
+
+
+def config_from_args(args, seed: Optional[int] = None) -> FakeConfig:
+    return FakeConfig(
+        latency_ms=args.latency_ms,
+        tokens_per_s=args.tokens_per_s,
+        reply_tokens=args.reply_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_s=args.retry_after_s,
+        slow_rate=args.slow_rate,
+        slow_ms=args.slow_ms,
+        seed=seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_server(config_from_args(args), args.host, args.port)
+    print(f"🧪 Fake OpenAI on {base_url(server)} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+# 🏋️ Load test for /chat against a local fake OpenAI server
+#
+#   python -m bench.load_test                          → in-process app, offline
+#   python -m bench.load_test --concurrency 1 8 32 --mode voting
+#   python -m bench.load_test --mode stream --latency-ms 400 --tokens-per-s 40
+#   python -m bench.load_test --save-baseline bench/baselines/load_offline.json
+#   python -m bench.load_test --baseline bench/baselines/load_offline.json   → exit 1 on regression
+#   python -m bench.load_test --url http://127.0.0.1:8000   → running server (start it with
+#                                                            OPENAI_BASE_URL + DEBUG_TIMINGS=1)
+#
+# Replays the router + retrieval query sets (law / police / press) in a
+# seeded order at each concurrency level and reports throughput, latency
+# percentiles and the per-stage breakdown from the DEBUG_TIMINGS block.
+#
+# Default (offline) run needs no model download: keyword routing, BM25
+# retrieval, no answer cache. The committed DBs ship without BM25 indexes, so
+# the harness builds them in a temp dir from the stored Chroma chunks (or the
+# re-chunked sources where a DB has no chroma.sqlite3) and points the app
+# there. --full uses the configured MiniLM pipeline.
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from bench import fake_openai
+from bench.stats import percentile
+
+
+BENCH_DIR = Path(__file__).parent
+QUERY_SETS = [BENCH_DIR / "router_queries.json", BENCH_DIR / "retrieval_queries.json"]
+
+# Env for a CPU-only, no-download run (set before the app is imported)
+OFFLINE_ENV = {
+    "INTENT_ROUTER": "keywords",
+    "RETRIEVAL_MODE": "bm25",
+    "SEMANTIC_CACHE_ENABLED": "0",
+    "RERANK_ENABLED": "0",
+}
+
+# Relative slack before a metric counts as a regression vs the baseline
+DEFAULT_TOLERANCE = 0.25
+
+
+def load_queries(seed: int) -> List[str]:
+    """Distinct queries from the labelled sets, shuffled reproducibly"""
+    queries = []
+    for path in QUERY_SETS:
+        for item in json.loads(path.read_text(encoding="utf-8")):
+            if item["query"] not in queries:
+                queries.append(item["query"])
+
+    random.Random(seed).shuffle(queries)
+    return queries
+
+
+def _parse_sse(text: str) -> List[tuple]:
+    events = []
+    for block in text.split("\n\n"):
+        event, data = None, None
+        for line in block.splitlines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+        if event:
+            events.append((event, data))
+    return events
+
+
+async def _one_request(client: httpx.AsyncClient, chat_id: str, message: str, mode: str) -> dict:
+    """{"ms", "ok", "stages", "ttft_ms"} for one chat request"""
+    started = time.perf_counter()
+
+    if mode == "stream":
+        ttft = None
+        done = None
+        async with client.stream("POST", "/chat/stream", json={"chat_id": chat_id, "message": message}) as response:
+            ok = response.status_code == 200
+            buffer = ""
+            async for text in response.aiter_text():
+                buffer += text
+                if ttft is None and "event: token" in buffer:
+                    ttft = (time.perf_counter() - started) * 1000
+            for event, data in _parse_sse(buffer):
+                if event == "done":
+                    done = data
+                elif event == "error":
+                    ok = False
+
+        return {
+            "ms": (time.perf_counter() - started) * 1000,
+            # degraded → HTTP 200, but no model answer
+            "ok": ok and done is not None and not done.get("degraded"),
+            "stages": ((done or {}).get("timings") or {}).get("stages", []),
+            "ttft_ms": ttft,
+        }
+
+    payload = {"chat_id": chat_id, "message": message}
+    if mode == "voting":
+        payload["mode"] = "voting"
+
+    response = await client.post("/chat", json=payload)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    body = response.json() if response.status_code == 200 else {}
+    return {
+        "ms": elapsed,
+        "ok": response.status_code == 200 and not body.get("degraded"),
+        "stages": (body.get("timings") or {}).get("stages", []),
+        "ttft_ms": None,
+    }
+
+
+async def run_level(client: httpx.AsyncClient, queries: List[str], concurrency: int,
+                    requests: int, mode: str) -> dict:
+    """requests calls with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(i: int) -> dict:
+        async with semaphore:
+            # Fresh chat per request → memory size doesn't drift during the run
+            try:
+                return await _one_request(client, f"bench-{concurrency}-{i}", queries[i % len(queries)], mode)
+            except httpx.HTTPError as e:
+                print(f"🔥 request {i} failed: {e}")
+                return {"ms": 0.0, "ok": False, "stages": [], "ttft_ms": None}
+
+    started = time.perf_counter()
+    samples = await asyncio.gather(*[worker(i) for i in range(requests)])
+    wall_s = time.perf_counter() - started
+
+    latencies = [s["ms"] for s in samples if s["ok"]] or [0.0]
+
+    # Per-request stage totals (llm runs more than once per request)
+    per_stage: Dict[str, List[float]] = {}
+    for sample in samples:
+        totals: Dict[str, float] = {}
+        for entry in sample["stages"]:
+            totals[entry["stage"]] = totals.get(entry["stage"], 0.0) + entry["ms"]
+        for name, ms in totals.items():
+            per_stage.setdefault(name, []).append(ms)
+
+    result = {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": sum(1 for s in samples if not s["ok"]),
+        "throughput_rps": round(requests / wall_s, 2),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "mean_ms": round(statistics.mean(latencies), 1),
+        "stages": {
+            name: {"p50_ms": round(percentile(values, 50), 2), "p95_ms": round(percentile(values, 95), 2)}
+            for name, values in sorted(per_stage.items())
+        },
+    }
+
+    ttfts = [s["ttft_ms"] for s in samples if s["ttft_ms"] is not None]
+    if ttfts:
+        result["ttft_p50_ms"] = round(percentile(ttfts, 50), 1)
+        result["ttft_p95_ms"] = round(percentile(ttfts, 95), 1)
+
+    return result
+
+
+def compare(results: List[dict], baseline: List[dict], tolerance: float) -> List[str]:
+    """Human-readable regressions vs a stored run (same mode + concurrency)"""
+    previous = {(item["mode"], item["concurrency"]): item for item in baseline}
+    regressions = []
+
+    for result in results:
+        base = previous.get((result["mode"], result["concurrency"]))
+        if base is None:
+            continue
+
+        label = f"{result['mode']} c={result['concurrency']}"
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if result[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{label}: {metric} {base[metric]} → {result[metric]}")
+        if result["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{label}: throughput {base['throughput_rps']} → {result['throughput_rps']} req/s"
+            )
+        if result["errors"] > base["errors"]:
+            regressions.append(f"{label}: errors {base['errors']} → {result['errors']}")
+
+    return regressions
+
+
+def build_offline_indexes(workdir: str) -> None:
+    """BM25 index per domain in workdir; DOMAIN_DBS is repointed there
+
+    Must run before app.main is imported (agents read DOMAIN_DBS at import).
+    """
+    from app.services.bm25_index import get_index, save_index
+    from app.services.vector_store import DOMAIN_DBS
+    from bench.bench_retrieval_configs import chunked_corpus, stored_corpus
+    from ingestion.pipeline import DOMAIN_SOURCES
+
+    for domain in list(DOMAIN_DBS):
+        corpus, origin = stored_corpus(domain, os.path.join(workdir, "stored", domain)), "stored chunks"
+        if corpus is None:
+            chunker = DOMAIN_SOURCES[domain]["chunker"]
+            corpus, origin = chunked_corpus(domain, chunker, need_vectors=False), f"{chunker} chunker"
+
+        db_path = os.path.join(workdir, f"{domain}_db")
+        save_index(db_path, corpus["texts"], corpus["metadatas"])
+        if get_index(db_path) is None:
+            sys.exit(f"❌ [{domain}] BM25 index wasn't built → offline retrieval would be empty")
+
+        DOMAIN_DBS[domain] = db_path
+        print(f"📚 [{domain}] BM25 over {len(corpus['texts'])} chunks ({origin})")
+
+
+def _in_process_client(offline: bool, workdir: str) -> httpx.AsyncClient:
+    if offline:
+        build_offline_indexes(workdir)
+
+    # Module-level config is read at import → app imported only now
+    from app.main import app
+    from app.services.section_index import load_index
+
+    if not offline:
+        from app.agents.decide_agent import warm_up_router
+        from app.services.vector_store import warm_up
+        warm_up()
+        warm_up_router()
+    load_index()
+
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://bench",
+        timeout=120.0
+    )
+
+
+async def run(args, workdir: str) -> List[dict]:
+    queries = load_queries(args.seed)
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=120.0)
+    else:
+        client = _in_process_client(not args.full, workdir)
+
+    results = []
+    async with client:
+        # 🔥 Warm-up: imports, pools and caches out of the measured runs
+        await run_level(client, queries, 1, min(4, len(queries)), args.mode)
+
+        for concurrency in args.concurrency:
+            result = await run_level(client, queries, concurrency, args.requests, args.mode)
+            results.append(result)
+            print(
+                f"{result['mode']:>7} c={concurrency:<4} {result['throughput_rps']:>7.2f} req/s  "
+                f"p50={result['p50_ms']:.0f}ms p95={result['p95_ms']:.0f}ms p99={result['p99_ms']:.0f}ms  "
+                f"errors={result['errors']}"
+            )
+            for name, stage in result["stages"].items():
+                print(f"{'':>14}{name:<18} p50={stage['p50_ms']:>9.2f}ms p95={stage['p95_ms']:>9.2f}ms")
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test /chat with a fake OpenAI backend")
+    parser.add_argument("--mode", choices=["single", "voting", "stream"], default="single")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=32, help="requests per concurrency level")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--full", action="store_true", help="embedding router + configured retrieval")
+    parser.add_argument("--json", type=Path, help="also write the results here")
+    parser.add_argument("--baseline", type=Path, help="compare against a stored run")
+    parser.add_argument("--save-baseline", type=Path, help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    fake_openai.add_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    if not args.url:
+        server = fake_openai.start_server(fake_openai.config_from_args(args, seed=args.seed))
+        os.environ["OPENAI_BASE_URL"] = fake_openai.base_url(server)
+        os.environ["OPENAI_API_KEY"] = "fake"
+        os.environ["DEBUG_TIMINGS"] = "1"
+        if not args.full:
+            for name, value in OFFLINE_ENV.items():
+                os.environ.setdefault(name, value)
+
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            results = asyncio.run(run(args, workdir))
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    for path in filter(None, [args.json, args.save_baseline]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(results, indent=1), encoding="utf-8")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        for line in regressions:
+            print(f"❌ {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ Within {args.tolerance:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,23 @@
-import pdfplumber
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from multiprocessing import Pool
 from pathlib import Path
 
+import pdfplumber
+
 # Input folders
 DATA_DIR = Path("data")
 TEXT_DIR = Path("text")
 
-TEXT_DIR.mkdir(exist_ok=True)
+# Per-page text cache, keyed by PDF content hash
+CACHE_DIR = TEXT_DIR / ".page_cache"
+CACHE_MANIFEST = CACHE_DIR / "manifest.json"
+
+# Pages handed to a worker at a time (one pdfplumber open per task)
+PAGES_PER_TASK = 16
 
 PDF_FILES = {
     "law_ipc.txt": DATA_DIR / "law" / "ipc.pdf",
@@ -15,23 +27,141 @@ PDF_FILES = {
     "police_scenarios.txt": DATA_DIR / "police" / "delhi_police_scenarios_bns_bnss_bsa.pdf",
 }
 
-def extract_pdf_text(pdf_path: Path) -> str:
-    text = []
+
+def pdf_sha256(pdf_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _page_cache_file(pdf_hash: str, page_num: int) -> Path:
+    return CACHE_DIR / pdf_hash / f"{page_num:05d}.txt"
+
+
+def _extract_pages(task: tuple) -> list:
+    """Worker: extract one page range → [(page_num, text), ...]"""
+    pdf_path, pdf_hash, first, last = task
+    results = []
+
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num in range(first, last + 1):
+            cache_file = _page_cache_file(pdf_hash, page_num)
+
+            if cache_file.exists():
+                page_text = cache_file.read_text(encoding="utf-8")
+            else:
+                page_text = pdf.pages[page_num - 1].extract_text() or ""
+                tmp = cache_file.with_suffix(".tmp")
+                tmp.write_text(page_text, encoding="utf-8")
+                os.replace(tmp, cache_file)
+
+            results.append((page_num, page_text))
+
+    return results
+
+
+def extract_pdf_text(pdf_path: Path, output_path: Path, pool: Pool, fresh: bool = False) -> str:
+    """Extract pages in parallel, stream them to output_path in page order"""
+    pdf_hash = pdf_sha256(pdf_path)
+
+    if fresh:
+        shutil.rmtree(CACHE_DIR / pdf_hash, ignore_errors=True)
+    (CACHE_DIR / pdf_hash).mkdir(parents=True, exist_ok=True)
+
     with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, start=1):
-            page_text = page.extract_text()
-            if page_text:
-                text.append(f"\n--- Page {page_num} ---\n")
-                text.append(page_text)
-    return "\n".join(text)
+        page_count = len(pdf.pages)
+
+    tasks = [
+        (str(pdf_path), pdf_hash, first, min(first + PAGES_PER_TASK - 1, page_count))
+        for first in range(1, page_count + 1, PAGES_PER_TASK)
+    ]
+
+    tmp_path = output_path.with_suffix(".tmp")
+    written = 0
+
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        # imap → results come back in task order while workers run ahead
+        for pages in pool.imap(_extract_pages, tasks):
+            for page_num, page_text in pages:
+                if not page_text:
+                    continue
+                if written:
+                    out.write("\n")
+                out.write(f"\n--- Page {page_num} ---\n\n{page_text}")
+                written += 1
+
+    os.replace(tmp_path, output_path)
+    return pdf_hash
+
+
+def _load_manifest() -> dict:
+    if CACHE_MANIFEST.exists():
+        return json.loads(CACHE_MANIFEST.read_text(encoding="utf-8"))
+    return {}
+
+
+def _save_manifest(manifest: dict) -> None:
+    CACHE_MANIFEST.parent.mkdir(parents=True, exist_ok=True)
+    CACHE_MANIFEST.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Extract statute / press PDFs to text")
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        metavar="OUTPUT",
+        help=f"re-extract only these outputs: {', '.join(PDF_FILES)}"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="re-extract even if the PDF hasn't changed (drops its page cache)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="extraction processes (default: all cores)"
+    )
+    args = parser.parse_args()
+
+    selected = args.only or list(PDF_FILES)
+    unknown = [name for name in selected if name not in PDF_FILES]
+    if unknown:
+        parser.error(f"unknown output(s): {', '.join(unknown)}")
+
+    TEXT_DIR.mkdir(exist_ok=True)
+    manifest = _load_manifest()
+
+    with Pool(processes=args.workers) as pool:
+        for output_file in selected:
+            pdf_path = PDF_FILES[output_file]
+            output_path = TEXT_DIR / output_file
+
+            if not pdf_path.exists():
+                print(f"⚠️ Missing: {pdf_path} (skipped)")
+                continue
+
+            # ⚡ Same PDF as last time and output still there → skip
+            if (
+                not args.force
+                and output_path.exists()
+                and manifest.get(output_file) == pdf_sha256(pdf_path)
+            ):
+                print(f"Unchanged: {pdf_path}")
+                continue
+
+            print(f"Extracting: {pdf_path}")
+            manifest[output_file] = extract_pdf_text(pdf_path, output_path, pool, fresh=args.force)
+            _save_manifest(manifest)
 
-for output_file, pdf_path in PDF_FILES.items():
-    print(f"Extracting: {pdf_path}")
-    extracted_text = extract_pdf_text(pdf_path)
+            print(f"Saved → {output_path}")
 
-    output_path = TEXT_DIR / output_file
-    output_path.write_text(extracted_text, encoding="utf-8")
+    print("\n✅ All PDFs converted to text successfully.")
 
-    print(f"Saved → {output_path}")
 
-print("\n✅ All PDFs converted to text successfully.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# 📦 One ingestion CLI for all domain vector DBs
+#
+#   python ingest.py                 → sync law, police and press
+#   python ingest.py law press       → only these domains
+#   python ingest.py law --rebuild   → ignore the manifest, re-embed everything
+#   python ingest.py --workers 8 --batch-size 128
+
+import argparse
+
+from ingestion.embedder import EMBED_BATCH_SIZE, EMBED_WORKERS
+from ingestion.pipeline import DOMAIN_SOURCES, ingest_domain
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Incremental vector DB ingestion")
+    parser.add_argument(
+        "domains",
+        nargs="*",
+        help=f"domains to ingest: {', '.join(DOMAIN_SOURCES)} (default: all)"
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="drop the collection and re-embed every chunk"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=EMBED_BATCH_SIZE,
+        help="chunks per embedding batch"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=EMBED_WORKERS,
+        help="embedding processes (default: all cores)"
+    )
+    args = parser.parse_args()
+
+    unknown = [domain for domain in args.domains if domain not in DOMAIN_SOURCES]
+    if unknown:
+        parser.error(f"unknown domain(s): {', '.join(unknown)}")
+
+    for domain in args.domains or list(DOMAIN_SOURCES):
+        ingest_domain(
+            domain,
+            rebuild=args.rebuild,
+            batch_size=args.batch_size,
+            workers=args.workers
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# Chunkers used by the ingestion pipeline
+# Each chunker returns [{"text": ..., "metadata": {...}}, ...] for one source file
+
+import re
+from pathlib import Path
+from typing import Iterator, List
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 100
+
+# Statute sections longer than this are split further (part 1/n, 2/n, ...)
+STATUTE_MAX_CHARS = 2000
+STATUTE_PART_SIZE = 1500
+STATUTE_PART_OVERLAP = 150
+
+ACT_NAMES = {
+    "law_ipc.txt": "IPC",
+    "law_crpc.txt": "CrPC",
+}
+
+_PAGE_MARKER = re.compile(r"^--- Page (\d+) ---$")
+_PAGE_NUMBER = re.compile(r"^\d{1,4}$")
+_CHAPTER = re.compile(r"^CHAPTER\s+([IVXLC]+[A-Z]?)$")
+_SCHEDULE = re.compile(r"^THE ([A-Z]+) SCHEDULE$")
+_APPENDIX = re.compile(r"^APPENDIX$")
+
+# "302. Punishment for murder.--Whoever" / "8*[4. Extension ...--" / "1[24. Public Prosecutors.—(1)"
+# A title's sentence break is only followed by a quoted term ('10. "Man". "Woman".--') or
+# a capitalised word ('70. ... imprisonment. Death not to ...--'), never a sub-heading
+# letter ("D.—") or an upper-case heading ("CHAPTER IV", "SECTIONS")
+_SECTION = re.compile(
+    r'^(?:\d+\**\[)?(\d+[A-Z]{0,3})\.\s+(\S(?:(?!\.\s(?!"|[A-Z][a-z])).){0,300}?)(?:[.;]?\s?(?:--|—|–)|\.-)'
+)
+_SECTION_CANDIDATE = re.compile(r"^(?:\d+\**\[)?\d+[A-Z]{0,3}\.\s+\S")
+
+# IPC repeats every title as "302.\nPunishment for murder." right above the section
+_BARE_NUMBER = re.compile(r"^(?:\d+\**\[)?\d+[A-Z]{0,3}\.$")
+
+# Amendment footnotes at the bottom of a page: "4. Subs. by Act 45 of 1978, s. 6, ..."
+_FOOTNOTE = re.compile(
+    r"^\d+\.\s+(?:Subs|Ins|Added|Omitted|Rep|Renumbered|Certain words|The words?|The brackets)\b"
+)
+
+# "ARRANGEMENT OF SECTIONS" entries ("154. Information in cognizable cases.")
+_TOC_LINE = re.compile(r"^(?:\d+[A-Z]{0,3}\.\s.*|[A-Z]\.[–—-].*|SECTIONS|ARRANGEMENT OF SECTIONS)$")
+
+
+def recursive_chunks(text: str, source: str) -> List[dict]:
+    """Plain character splitter (police / press corpora)"""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP
+    )
+
+    return [
+        {"text": chunk, "metadata": {"source": source}}
+        for chunk in splitter.split_text(text)
+    ]
+
+
+def act_name(source: str) -> str:
+    name = Path(source).name
+    return ACT_NAMES.get(name, Path(source).stem)
+
+
+def _clean_lines(text: str) -> List[tuple]:
+    """(page, line) pairs without page markers, page numbers and footnotes"""
+    page = 1
+    lines = []
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        marker = _PAGE_MARKER.match(line)
+
+        if marker:
+            page = int(marker.group(1))
+            continue
+        if not line or _PAGE_NUMBER.match(line) or _FOOTNOTE.match(line):
+            continue
+
+        lines.append((page, line))
+
+    return lines
+
+
+def _section_start(lines: List[tuple], i: int):
+    """Match a section heading at line i (titles may wrap onto the next lines)"""
+    if not _SECTION_CANDIDATE.match(lines[i][1]):
+        return None
+    joined = " ".join(line for _, line in lines[i:i + 3])
+    return _SECTION.match(joined)
+
+
+def parse_sections(text: str, act: str) -> Iterator[dict]:
+    """Yield one dict per statute section, in document order
+
+    {"act", "section", "title", "chapter", "chapter_title", "page", "text"}.
+    Text before the first section (the preamble), the schedules and the
+    appendix come out with section "". The principal Act's sections end at
+    the first schedule: numbered paragraphs after it belong to state or
+    amending Acts ("1. This Act may be called ... (Amendment) Act") and
+    aren't sections of `act`.
+    """
+    lines = _clean_lines(text)
+    chapter, chapter_title = "", ""
+    principal = True
+    current = {"act": act, "section": "", "title": "", "chapter": "",
+               "chapter_title": "", "page": 1, "lines": []}
+
+    def finish(section: dict) -> dict:
+        body = section.pop("lines")
+        if not section["section"] and not section["title"]:
+            body = [line for line in body if not _TOC_LINE.match(line)]
+        section["text"] = "\n".join(body)
+        return section
+
+    i = 0
+    while i < len(lines):
+        page, line = lines[i]
+
+        heading = _CHAPTER.match(line)
+        if heading:
+            chapter = heading.group(1)
+            chapter_title = ""
+            if i + 1 < len(lines) and lines[i + 1][1].isupper():
+                chapter_title = lines[i + 1][1]
+                i += 1
+            i += 1
+            continue
+
+        schedule = _SCHEDULE.match(line)
+        if schedule or _APPENDIX.match(line):
+            # Schedules (offence tables, forms) and the appendix aren't part of the last section
+            yield finish(current)
+            principal = False
+            chapter, chapter_title = "", ""
+            title = f"{schedule.group(1).title()} Schedule" if schedule else "Appendix"
+            current = {"act": act, "section": "", "title": title,
+                       "chapter": "", "chapter_title": "", "page": page, "lines": []}
+            i += 1
+            continue
+
+        if not principal:
+            current["lines"].append(line)
+            i += 1
+            continue
+
+        if _BARE_NUMBER.match(line):
+            # Skip the duplicated "N.\nTitle." block when a real section follows
+            ahead = next(
+                (j for j in range(i + 1, min(i + 6, len(lines))) if _section_start(lines, j)),
+                None
+            )
+            if ahead is not None:
+                i = ahead
+                continue
+
+        start = _section_start(lines, i)
+        if start:
+            if current["section"] or current["lines"]:
+                yield finish(current)
+            current = {
+                "act": act,
+                "section": start.group(1),
+                "title": " ".join(start.group(2).split()),
+                "chapter": chapter,
+                "chapter_title": chapter_title,
+                "page": page,
+                "lines": [],
+            }
+
+        current["lines"].append(line)
+        i += 1
+
+    if current["section"] or current["lines"]:
+        yield finish(current)
+
+
+def statute_chunks(text: str, source: str) -> List[dict]:
+    """One chunk per IPC / CrPC section (law corpus), long sections split into parts"""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=STATUTE_PART_SIZE,
+        chunk_overlap=STATUTE_PART_OVERLAP
+    )
+    chunks = []
+
+    for section in parse_sections(text, act_name(source)):
+        body = section["text"]
+        if not body:
+            continue
+
+        if section["section"]:
+            header = f"{section['act']} Section {section['section']}"
+            if section["chapter"]:
+                header += f" (Chapter {section['chapter']}"
+                header += f": {section['chapter_title']})" if section["chapter_title"] else ")"
+        else:
+            header = f"{section['act']} {section['title'] or 'preamble'}"
+
+        parts = [body] if len(body) <= STATUTE_MAX_CHARS else splitter.split_text(body)
+
+        for index, part in enumerate(parts, start=1):
+            label = header if len(parts) == 1 else f"{header} [part {index}/{len(parts)}]"
+            chunks.append({
+                "text": f"{label}\n{part}",
+                "metadata": {
+                    # Chroma metadata values must be str / int / float
+                    "source": source,
+                    "act": section["act"],
+                    "section": section["section"],
+                    "title": section["title"],
+                    "chapter": section["chapter"],
+                    "page": section["page"],
+                    "part": index,
+                },
+            })
+
+    return chunks
+
+
+# Bump a chunker's version whenever its output changes → forces full re-embed
+CHUNKERS = {
+    "recursive": (recursive_chunks, f"recursive-{CHUNK_SIZE}-{CHUNK_OVERLAP}"),
+    "statute": (statute_chunks, f"statute-2-{STATUTE_MAX_CHARS}-{STATUTE_PART_SIZE}"),
+}
@@ -0,0 +1,119 @@
+# Batched, multi-process embedding stage for ingestion
+# Batches are spread over a process pool (one MiniLM copy per core) and the
+# vectors land in one preallocated float32 NumPy matrix, in input order.
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+import numpy as np
+
+from app.services.vector_store import EMBEDDING_MODEL_NAME
+
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", str(os.cpu_count() or 1)))
+
+# Print a progress line every N batches
+PROGRESS_EVERY = 10
+
+_WORKER_MODEL = None
+
+
+def _init_worker(model_name: str, threads: int) -> None:
+    """Load the model once per worker process"""
+    global _WORKER_MODEL
+
+    # N workers × all-cores torch threads would oversubscribe the CPU
+    import torch
+    torch.set_num_threads(threads)
+
+    from sentence_transformers import SentenceTransformer
+    _WORKER_MODEL = SentenceTransformer(model_name, device="cpu")
+
+
+def _embed_batch(texts: List[str]) -> np.ndarray:
+    return _WORKER_MODEL.encode(
+        texts,
+        batch_size=len(texts),
+        convert_to_numpy=True,
+        show_progress_bar=False
+    ).astype(np.float32, copy=False)
+
+
+def _peak_rss_mb() -> dict:
+    # resource is Unix-only → no RSS figures on Windows
+    try:
+        import resource
+    except ImportError:
+        return {"main": None, "workers": None}
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "main": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "workers": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+def embed_texts(
+    texts: List[str],
+    batch_size: int = EMBED_BATCH_SIZE,
+    workers: int = EMBED_WORKERS,
+    label: str = ""
+) -> Tuple[np.ndarray, dict]:
+    """Embed texts → (n × dim float32 matrix, throughput stats)"""
+    started = time.perf_counter()
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+
+    # Small deltas aren't worth spawning processes (model load ≈ seconds)
+    workers = max(1, min(workers, len(batches)))
+
+    vectors = None
+    done = 0
+
+    def collect(index: int, batch_vectors: np.ndarray) -> None:
+        nonlocal vectors, done
+        if vectors is None:
+            vectors = np.empty((len(texts), batch_vectors.shape[1]), dtype=np.float32)
+
+        start = index * batch_size
+        vectors[start:start + len(batch_vectors)] = batch_vectors
+        done += len(batch_vectors)
+
+        if (index + 1) % PROGRESS_EVERY == 0 or done == len(texts):
+            rate = done / max(time.perf_counter() - started, 1e-9)
+            print(f"⏳ {label} {done}/{len(texts)} chunks ({rate:.0f}/s)")
+
+    if not batches:
+        return np.empty((0, 0), dtype=np.float32), {"chunks": 0}
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    if workers == 1:
+        _init_worker(EMBEDDING_MODEL_NAME, threads)
+        for index, batch in enumerate(batches):
+            collect(index, _embed_batch(batch))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(EMBEDDING_MODEL_NAME, threads)
+        ) as pool:
+            # map() keeps input order while batches run in parallel
+            for index, batch_vectors in enumerate(pool.map(_embed_batch, batches)):
+                collect(index, batch_vectors)
+
+    seconds = time.perf_counter() - started
+
+    return vectors, {
+        "chunks": len(texts),
+        "batches": len(batches),
+        "batch_size": batch_size,
+        "workers": workers,
+        "seconds": round(seconds, 2),
+        "chunks_per_sec": round(len(texts) / seconds, 1) if seconds else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
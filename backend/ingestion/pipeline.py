@@ -0,0 +1,268 @@
+# Incremental, content-hashed ingestion into the domain vector DBs
+#
+# Every chunk gets a stable id = sha256(source + text). A manifest per
+# collection remembers which ids are stored, so a re-run only embeds new /
+# changed chunks and deletes the ones that disappeared.
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import chromadb
+
+from app.services.bm25_index import BM25_FILE, save_index as save_bm25_index
+from app.services.flat_index import FLAT_VECTORS_FILE, save_index as save_flat_index
+from app.services.section_index import SECTION_INDEX_PATH
+from app.services.vector_store import DOMAIN_DBS, EMBEDDING_MODEL_NAME
+from ingestion.chunkers import CHUNKERS, act_name, parse_sections
+from ingestion.embedder import EMBED_BATCH_SIZE, EMBED_WORKERS, embed_texts
+
+
+# Same collection name LangChain's Chroma wrapper reads at query time
+COLLECTION_NAME = "langchain"
+
+MANIFEST_NAME = "ingest_manifest.json"
+MANIFEST_VERSION = 1
+
+# Chroma write batch size (well under Chroma's max batch)
+WRITE_BATCH_SIZE = 1024
+
+DOMAIN_SOURCES = {
+    "law": {
+        "files": ["text/law_ipc.txt", "text/law_crpc.txt"],
+        "chunker": "statute",
+        # Exact section-number lookup (app/services/section_index.py)
+        "section_index": SECTION_INDEX_PATH,
+    },
+    "police": {
+        "files": ["text/police_scenarios.txt"],
+        "chunker": "recursive",
+    },
+    "press": {
+        "files": ["text/press_pci.txt", "text/press_pib.txt"],
+        "chunker": "recursive",
+    },
+}
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(source: str, text: str) -> str:
+    return hashlib.sha256(f"{source}\n{text}".encode("utf-8")).hexdigest()[:32]
+
+
+def manifest_path(db_path: str) -> Path:
+    return Path(db_path) / MANIFEST_NAME
+
+
+def load_manifest(db_path: str) -> Optional[dict]:
+    path = manifest_path(db_path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_manifest(db_path: str, manifest: dict) -> None:
+    # Write-then-rename so a crash never leaves half a manifest
+    path = manifest_path(db_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def build_chunks(domain: str, chunker_name: Optional[str] = None) -> Dict[str, dict]:
+    """id → {"text", "metadata"} for every chunk of a domain's sources
+
+    chunker_name overrides the domain's configured chunker (benchmarks).
+    """
+    config = DOMAIN_SOURCES[domain]
+    chunker, _ = CHUNKERS[chunker_name or config["chunker"]]
+
+    chunks: Dict[str, dict] = {}
+    for source in config["files"]:
+        text = Path(source).read_text(encoding="utf-8")
+        for chunk in chunker(text, source):
+            # Identical chunks (repeated headers etc.) are stored once
+            chunks.setdefault(chunk_id(source, chunk["text"]), chunk)
+
+    return chunks
+
+
+def build_section_index(sources: List[str]) -> dict:
+    """act → section number → {title, chapter, chapter_title, page, source, text}"""
+    acts: Dict[str, dict] = {}
+
+    for source in sources:
+        text = Path(source).read_text(encoding="utf-8")
+        for section in parse_sections(text, act_name(source)):
+            if not section["section"]:
+                continue
+            # First occurrence wins (the source repeats a number where it misprints one)
+            acts.setdefault(section["act"], {}).setdefault(section["section"], {
+                "title": section["title"],
+                "chapter": section["chapter"],
+                "chapter_title": section["chapter_title"],
+                "page": section["page"],
+                "source": source,
+                "text": section["text"],
+            })
+
+    return acts
+
+
+def sync_section_index(domain: str, source_hashes: Dict[str, str]) -> None:
+    """Rebuild the domain's section index when its sources or parser changed (or it's missing)"""
+    config = DOMAIN_SOURCES[domain]
+    index_path = config.get("section_index")
+    if not index_path:
+        return
+
+    # parse_sections is the statute chunker's parser → same version string
+    _, parser_version = CHUNKERS[config["chunker"]]
+
+    path = Path(index_path)
+    if path.exists():
+        current = json.loads(path.read_text(encoding="utf-8"))
+        if current.get("sources") == source_hashes and current.get("parser") == parser_version:
+            return
+
+    acts = build_section_index(list(source_hashes))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"sources": source_hashes, "parser": parser_version, "acts": acts}, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+    counts = ", ".join(f"{act} {len(sections)}" for act, sections in acts.items())
+    print(f"📑 [{domain}] section index → {path} ({counts})")
+
+
+def sync_sidecar_indexes(db_path: str, collection) -> int:
+    """Rebuild the BM25 + quantized flat indexes from what the collection stores"""
+    stored = collection.get(include=["documents", "metadatas", "embeddings"])
+    metadatas = [m or {} for m in stored["metadatas"]]
+
+    save_bm25_index(db_path, stored["documents"], metadatas)
+    save_flat_index(db_path, stored["embeddings"], stored["documents"], metadatas)
+    return len(stored["documents"])
+
+
+def _sidecars_missing(db_path: str) -> bool:
+    return any(not (Path(db_path) / name).exists() for name in (BM25_FILE, FLAT_VECTORS_FILE))
+
+
+def _batches(items: List, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def ingest_domain(
+    domain: str,
+    rebuild: bool = False,
+    batch_size: int = EMBED_BATCH_SIZE,
+    workers: int = EMBED_WORKERS
+) -> dict:
+    """Sync one domain's vector DB with its text sources; returns a summary"""
+    started = time.perf_counter()
+    config = DOMAIN_SOURCES[domain]
+    db_path = DOMAIN_DBS[domain]
+    _, chunker_version = CHUNKERS[config["chunker"]]
+
+    source_hashes = {source: file_sha256(Path(source)) for source in config["files"]}
+
+    # 📑 Exact section lookup is independent of the vectors → kept in sync even when skipping
+    sync_section_index(domain, source_hashes)
+
+    manifest = None if rebuild else load_manifest(db_path)
+
+    # Chunking / model change → old vectors aren't comparable, start over
+    if manifest is not None and (
+        manifest.get("version") != MANIFEST_VERSION
+        or manifest.get("embedding_model") != EMBEDDING_MODEL_NAME
+        or manifest.get("chunker") != chunker_version
+    ):
+        print(f"♻️ [{domain}] chunker / model changed → full rebuild")
+        manifest = None
+
+    # ⚡ Nothing changed on disk → nothing to do
+    if manifest is not None and manifest.get("sources") == source_hashes:
+        if _sidecars_missing(db_path):
+            collection = chromadb.PersistentClient(path=db_path).get_collection(COLLECTION_NAME)
+            print(f"🔤 [{domain}] BM25 + flat indexes built ({sync_sidecar_indexes(db_path, collection)} chunks)")
+        print(f"✅ [{domain}] up to date ({len(manifest['chunks'])} chunks)")
+        return {"domain": domain, "added": 0, "deleted": 0,
+                "total": len(manifest["chunks"]), "skipped": True}
+
+    client = chromadb.PersistentClient(path=db_path)
+
+    if manifest is None:
+        # No manifest → collection may hold legacy random-id duplicates
+        if COLLECTION_NAME in [c.name for c in client.list_collections()]:
+            client.delete_collection(COLLECTION_NAME)
+        stored_ids = set()
+    else:
+        stored_ids = set(manifest["chunks"])
+
+    collection = client.get_or_create_collection(COLLECTION_NAME)
+
+    chunks = build_chunks(domain)
+    new_ids = [cid for cid in chunks if cid not in stored_ids]
+    gone_ids = [cid for cid in stored_ids if cid not in chunks]
+
+    print(f"📄 [{domain}] {len(chunks)} chunks → +{len(new_ids)} new, -{len(gone_ids)} removed")
+
+    for batch in _batches(gone_ids, WRITE_BATCH_SIZE):
+        collection.delete(ids=batch)
+
+    # 🔢 Embed only the new chunks (batched, across cores)
+    embed_stats = {"chunks": 0}
+    if new_ids:
+        vectors, embed_stats = embed_texts(
+            [chunks[cid]["text"] for cid in new_ids],
+            batch_size=batch_size,
+            workers=workers,
+            label=f"[{domain}]"
+        )
+        print(f"🔢 [{domain}] {embed_stats['chunks_per_sec']} chunks/s, "
+              f"peak RSS {embed_stats['peak_rss_mb']} MB")
+
+        # 📦 Bulk write (upsert → safe to re-run after a crash mid-way)
+        for start in range(0, len(new_ids), WRITE_BATCH_SIZE):
+            batch = new_ids[start:start + WRITE_BATCH_SIZE]
+            collection.upsert(
+                ids=batch,
+                embeddings=vectors[start:start + len(batch)],
+                documents=[chunks[cid]["text"] for cid in batch],
+                metadatas=[chunks[cid]["metadata"] for cid in batch]
+            )
+
+    # 🔤 Sparse index (hybrid retrieval) + 🗜️ quantized mmap vectors (flat backend)
+    sync_sidecar_indexes(db_path, collection)
+
+    save_manifest(db_path, {
+        "version": MANIFEST_VERSION,
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "chunker": chunker_version,
+        "sources": source_hashes,
+        "chunks": {
+            cid: {"source": chunk["metadata"].get("source"), "chars": len(chunk["text"])}
+            for cid, chunk in chunks.items()
+        },
+    })
+
+    seconds = round(time.perf_counter() - started, 2)
+    print(f"✅ [{domain}] vector DB synced in {seconds}s")
+
+    return {"domain": domain, "added": len(new_ids), "deleted": len(gone_ids),
+            "total": len(chunks), "skipped": False, "seconds": seconds,
+            "embedding": embed_stats}
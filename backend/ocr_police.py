@@ -0,0 +1,126 @@
+# 🚓 OCR for scanned police PDFs
+#
+# Pages are rendered + OCR'd one at a time inside a worker pool, so memory
+# stays flat however long the PDF is. Each page's text is checkpointed to
+# disk; a crashed / interrupted run resumes from the pages still missing.
+#
+#   python ocr_police.py
+#   python ocr_police.py --workers 4 --dpi 300
+#   POPPLER_PATH=C:\poppler\Library\bin python ocr_police.py   (Windows only)
+
+import argparse
+import hashlib
+import os
+from multiprocessing import Pool
+from pathlib import Path
+
+PDF_PATH = Path("data/police/delhi_police_scenarios_bns_bnss_bsa.pdf")
+OUTPUT_TXT = Path("text/police_scenarios.txt")
+
+CHECKPOINT_DIR = Path("text/.ocr_checkpoints")
+
+# Linux / macOS: poppler on PATH → None. Windows: point at poppler's bin dir.
+POPPLER_PATH = os.getenv("POPPLER_PATH") or None
+
+
+def pdf_sha256(pdf_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _checkpoint_file(checkpoint_dir: Path, page_num: int) -> Path:
+    return checkpoint_dir / f"page_{page_num:05d}.txt"
+
+
+def _init_worker() -> None:
+    # One tesseract thread per worker; the pool provides the parallelism
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def _ocr_page(task: tuple) -> int:
+    """Worker: render ONE page, OCR it, checkpoint the text"""
+    from pdf2image import convert_from_path
+    import pytesseract
+
+    pdf_path, page_num, dpi, lang, checkpoint_dir = task
+    checkpoint = _checkpoint_file(Path(checkpoint_dir), page_num)
+
+    if checkpoint.exists():
+        return page_num
+
+    images = convert_from_path(
+        pdf_path,
+        dpi=dpi,
+        first_page=page_num,
+        last_page=page_num,
+        poppler_path=POPPLER_PATH
+    )
+    try:
+        text = pytesseract.image_to_string(images[0], lang=lang)
+    finally:
+        for image in images:
+            image.close()
+
+    tmp = checkpoint.with_suffix(".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, checkpoint)
+
+    return page_num
+
+
+def ocr_pdf(pdf_path: Path, output_path: Path, dpi: int, workers: int, lang: str) -> None:
+    from pdf2image import pdfinfo_from_path
+
+    page_count = pdfinfo_from_path(str(pdf_path), poppler_path=POPPLER_PATH)["Pages"]
+    checkpoint_dir = CHECKPOINT_DIR / pdf_sha256(pdf_path)
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+    todo = [
+        page_num for page_num in range(1, page_count + 1)
+        if not _checkpoint_file(checkpoint_dir, page_num).exists()
+    ]
+    print(f"Total pages: {page_count} ({page_count - len(todo)} already done)")
+
+    tasks = [(str(pdf_path), page_num, dpi, lang, str(checkpoint_dir)) for page_num in todo]
+
+    # maxtasksperchild → recycle workers so poppler / PIL leaks can't pile up
+    with Pool(processes=workers, initializer=_init_worker, maxtasksperchild=50) as pool:
+        for done, page_num in enumerate(pool.imap_unordered(_ocr_page, tasks), start=1):
+            print(f"OCR page {page_num} ({done}/{len(todo)})")
+
+    # 📄 Stitch checkpoints in page order, streaming to the output file
+    output_path.parent.mkdir(exist_ok=True)
+    tmp_path = output_path.with_suffix(".tmp")
+
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        for page_num in range(1, page_count + 1):
+            if page_num > 1:
+                out.write("\n")
+            out.write(_checkpoint_file(checkpoint_dir, page_num).read_text(encoding="utf-8"))
+
+    os.replace(tmp_path, output_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OCR scanned police PDFs to text")
+    parser.add_argument("--pdf", type=Path, default=PDF_PATH)
+    parser.add_argument("--output", type=Path, default=OUTPUT_TXT)
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--lang", default="eng")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="OCR processes (default: all cores)"
+    )
+    args = parser.parse_args()
+
+    ocr_pdf(args.pdf, args.output, args.dpi, args.workers, args.lang)
+    print("✅ OCR completed successfully!")
+
+
+if __name__ == "__main__":
+    main()
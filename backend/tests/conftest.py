@@ -0,0 +1,5 @@
+# Tests run against the backend package (python -m pytest from backend/ or the repo root)
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
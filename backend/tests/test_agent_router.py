@@ -0,0 +1,44 @@
+# Per-request stage timings (DEBUG_TIMINGS) never outlive the request
+import asyncio
+
+import pytest
+
+from app.agents import agent_router
+from app.services.metrics import current_timings, record_stage
+
+
+@pytest.fixture(autouse=True)
+def debug_timings(monkeypatch):
+    monkeypatch.setattr(agent_router, "DEBUG_TIMINGS", True)
+
+
+def test_timings_reset_when_the_agent_raises(monkeypatch):
+    async def failing_agent(chat_id, message):
+        record_stage("search", 0.01)
+        raise RuntimeError("agent failed")
+
+    monkeypatch.setattr(agent_router, "run_single_agent_async", failing_agent)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await agent_router.run_agent_async("timings-test", "section 302 IPC")
+        return current_timings()
+
+    assert asyncio.run(run()) is None
+
+
+def test_timings_reported_and_reset_on_success(monkeypatch):
+    async def agent(chat_id, message):
+        record_stage("search", 0.01)
+        return {"reply": "ok"}
+
+    monkeypatch.setattr(agent_router, "run_single_agent_async", agent)
+
+    async def run():
+        response = await agent_router.run_agent_async("timings-test", "section 302 IPC")
+        return response, current_timings()
+
+    response, left = asyncio.run(run())
+
+    assert [stage["stage"] for stage in response["timings"]["stages"]] == ["search", "run_agent"]
+    assert left is None
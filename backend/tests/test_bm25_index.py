@@ -0,0 +1,70 @@
+# BM25 CSR index (build → save → load → search) and reciprocal rank fusion
+import math
+
+import pytest
+
+from app.services.bm25_index import BM25_B, BM25_K1, BM25Index, bm25_search, save_index, tokenize
+from app.services.rag_retriever import RRF_K, rrf_fuse
+
+CORPUS = [
+    "Section 302. Punishment for murder. Whoever commits murder shall be punished with death.",
+    "Section 420. Cheating and dishonestly inducing delivery of property.",
+    "Section 154. Information in cognizable cases given to an officer in charge of a police station.",
+    "Section 379. Punishment for theft. Whoever commits theft shall be punished.",
+]
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    save_index(str(tmp_path), CORPUS, [{"section": text.split(".")[0][8:]} for text in CORPUS])
+    return str(tmp_path)
+
+
+def _reference_score(query, doc_id):
+    """Plain BM25 over the tokenized corpus, to check the CSR arithmetic"""
+    docs = [tokenize(text) for text in CORPUS]
+    avgdl = sum(map(len, docs)) / len(docs)
+    score = 0.0
+    for term in set(tokenize(query)):
+        df = sum(term in doc for doc in docs)
+        tf = docs[doc_id].count(term)
+        if not tf:
+            continue
+        idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+        score += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * len(docs[doc_id]) / avgdl))
+    return score
+
+
+def test_round_trip_known_top_hit(index_dir):
+    hits = BM25Index(index_dir).search("FIR information cognizable police", k=2)
+
+    assert hits[0]["text"] == CORPUS[2]
+    assert hits[0]["metadata"] == {"section": "154"}
+    assert hits[0]["score"] == pytest.approx(_reference_score("FIR information cognizable police", 2), abs=1e-3)
+    # Only documents sharing a term come back
+    assert len(hits) == 1
+
+
+def test_scores_match_reference_bm25(index_dir):
+    hits = bm25_search("punishment for theft", index_dir, k=4)
+
+    assert [hit["text"] for hit in hits][0] == CORPUS[3]
+    for hit in hits:
+        doc_id = CORPUS.index(hit["text"])
+        assert hit["score"] == pytest.approx(_reference_score("punishment for theft", doc_id), abs=1e-3)
+
+
+def test_no_matching_term_returns_nothing(index_dir):
+    assert bm25_search("quantum chromodynamics", index_dir) == []
+
+
+def test_rrf_puts_the_chunk_found_by_both_rankings_first():
+    dense = [{"text": "a"}, {"text": "shared"}, {"text": "b"}]
+    sparse = [{"text": "c"}, {"text": "d"}, {"text": "shared"}]
+
+    fused = rrf_fuse([dense, sparse], k=3)
+
+    assert fused[0]["text"] == "shared"
+    assert fused[0]["score"] == pytest.approx(1 / (RRF_K + 2) + 1 / (RRF_K + 3), abs=1e-5)
+    # Ties between single-ranking chunks keep the first ranking's order
+    assert [chunk["text"] for chunk in fused[1:]] == ["a", "c"]
@@ -0,0 +1,113 @@
+# /chat/stream SSE: event order, a degraded done on LLMError mid-reply,
+# an error event on anything else, and the LLM stream closed with the response
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.agents import agent_router
+from app.api.chat import router
+from app.services.llm_client import LLMUnavailableError
+
+
+class StubStream:
+    """ask_openai_stream stand-in: yields tokens, then optionally raises"""
+
+    def __init__(self, tokens, error=None):
+        self.tokens = tokens
+        self.error = error
+        self.closed = False
+
+    async def __call__(self, system_prompt, user_message, memory=None, route="reply"):
+        try:
+            for token in self.tokens:
+                yield token
+            if self.error is not None:
+                raise self.error
+        finally:
+            self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def stubbed_agent(monkeypatch):
+    async def classify(message):
+        return {"agent": "LAW", "confidence": 0.9, "method": "keyword"}
+
+    async def build(message, memory=None, chunks=None):
+        return {"system_prompt": "system", "memory": memory or [], "token_report": {"total": 1}}
+
+    async def no_cache(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(agent_router, "classify_intent_async", classify)
+    monkeypatch.setitem(agent_router.PROMPT_BUILDERS, "LAW", build)
+    monkeypatch.setattr(agent_router, "lookup_answer", no_cache)
+    monkeypatch.setattr(agent_router, "remember_answer", no_cache)
+    monkeypatch.setattr(agent_router, "should_reflect", lambda: False)
+
+
+def _events(stream, monkeypatch, chat_id="stream-test"):
+    monkeypatch.setattr(agent_router, "ask_openai_stream", stream)
+    app = FastAPI()
+    app.include_router(router)
+
+    with TestClient(app) as client:
+        response = client.post("/chat/stream", json={"chat_id": chat_id, "message": "section 302 IPC"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_tokens_then_done(monkeypatch):
+    stream = StubStream(["Section ", "302 ", "is murder."])
+    events = _events(stream, monkeypatch)
+
+    assert [event for event, _ in events] == ["meta", "token", "token", "token", "done"]
+    assert "".join(data["text"] for event, data in events if event == "token") == "Section 302 is murder."
+    done = events[-1][1]
+    assert done["reply"] == "Section 302 is murder."
+    assert done["message_id"] == events[0][1]["message_id"]
+    assert stream.closed
+
+
+def test_llm_error_mid_stream_ends_with_degraded_done(monkeypatch):
+    stream = StubStream(["Section "], error=LLMUnavailableError("upstream 503"))
+    events = _events(stream, monkeypatch)
+
+    assert [event for event, _ in events] == ["meta", "token", "token", "done"]
+    done = events[-1][1]
+    assert done["degraded"] is True
+    assert done["error"]["kind"] == "unavailable"
+    assert done["reply"].startswith("Section ")
+    assert stream.closed
+
+
+def test_unexpected_error_sends_error_event(monkeypatch):
+    stream = StubStream(["Section "], error=RuntimeError("boom"))
+    events = _events(stream, monkeypatch)
+
+    assert [event for event, _ in events] == ["meta", "token", "error"]
+    assert events[-1][1] == {"detail": "boom"}
+    assert stream.closed
+
+
+def test_closing_the_stream_closes_the_llm_call_right_away(monkeypatch):
+    stream = StubStream(["a", "b", "c"])
+    monkeypatch.setattr(agent_router, "ask_openai_stream", stream)
+
+    async def run():
+        items = agent_router.run_single_agent_stream("stream-close-test", "section 302 IPC")
+        async for item in items:
+            if item["event"] == "token":
+                break
+        # Client gone after the first token → aclosing closes the LLM stream now, not at GC
+        await items.aclose()
+        return stream.closed
+
+    assert asyncio.run(run()) is True
@@ -0,0 +1,35 @@
+# Statute parser on the real law corpus: titles with a sentence break,
+# and numbered paragraphs of amending Acts after the principal Act
+from pathlib import Path
+
+import pytest
+
+from ingestion.chunkers import parse_sections
+
+TEXT = Path(__file__).resolve().parents[1] / "text"
+
+
+def _sections(name, act):
+    return list(parse_sections((TEXT / name).read_text(encoding="utf-8"), act))
+
+
+def test_title_with_sentence_break_starts_its_own_section():
+    sections = {s["section"]: s for s in _sections("law_ipc.txt", "IPC") if s["section"]}
+
+    assert sections["70"]["title"].startswith("Fine leviable within six years")
+    assert "Death not to discharge property" in sections["70"]["title"]
+    assert "Fine leviable" not in sections["69"]["text"]
+
+
+@pytest.mark.parametrize("number", ["1", "2", "16", "28", "38", "42", "44"])
+def test_amending_act_paragraphs_are_not_crpc_sections(number):
+    matches = [s for s in _sections("law_crpc.txt", "CrPC") if s["section"] == number]
+
+    assert len(matches) == 1
+    assert "Amendment" not in matches[0]["title"]
+
+
+def test_schedules_and_appendix_are_unnumbered_blocks():
+    titles = [s["title"] for s in _sections("law_crpc.txt", "CrPC") if not s["section"]]
+
+    assert titles[-3:] == ["First Schedule", "Second Schedule", "Appendix"]
@@ -0,0 +1,28 @@
+# Quantized flat index: save → mmap load → search, including an empty corpus
+import numpy as np
+import pytest
+
+from app.services.flat_index import FlatIndex, save_index
+
+
+@pytest.mark.parametrize("dtype", ["int8", "float16"])
+def test_round_trip_finds_the_nearest_vector(tmp_path, dtype):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((50, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    texts = [f"chunk {i} – ü" for i in range(50)]
+
+    save_index(str(tmp_path), vectors, texts, [{"i": i} for i in range(50)], dtype=dtype)
+    hits = FlatIndex(str(tmp_path)).search(vectors[7], k=3)
+
+    assert hits[0]["text"] == "chunk 7 – ü"
+    assert hits[0]["metadata"] == {"i": 7}
+    assert len(hits) == 3
+
+
+def test_empty_corpus_writes_an_empty_index(tmp_path):
+    save_index(str(tmp_path), [], [], [])
+    index = FlatIndex(str(tmp_path))
+
+    assert len(index) == 0
+    assert index.search(np.ones(16, dtype=np.float32)) == []
@@ -0,0 +1,97 @@
+# Circuit breaker against bench/fake_openai.py: a probe that never gets an
+# outcome (cancelled by an outer timeout) must not wedge the breaker
+import asyncio
+import os
+
+from bench import fake_openai
+
+_CONFIG = fake_openai.FakeConfig(latency_ms=10, reply_tokens=5, tokens_per_s=1000, seed=1)
+_SERVER = fake_openai.start_server(_CONFIG)
+
+# openai_client reads these at import
+os.environ["OPENAI_BASE_URL"] = fake_openai.base_url(_SERVER)
+os.environ["OPENAI_API_KEY"] = "fake"
+os.environ["LLM_MAX_RETRIES"] = "0"
+
+import pytest  # noqa: E402
+
+from app.services import llm_client  # noqa: E402
+from app.services.llm_client import CircuitBreaker, LLMCircuitOpenError, LLMError  # noqa: E402
+from app.services.openai_client import ask_openai_async  # noqa: E402
+
+COOLDOWN_S = 0.2
+
+
+@pytest.fixture(autouse=True)
+def breaker(monkeypatch):
+    breaker = CircuitBreaker(failures=1, cooldown_s=COOLDOWN_S, probe_timeout_s=5)
+    monkeypatch.setattr(llm_client, "_BREAKER", breaker)
+    monkeypatch.setattr(_CONFIG, "error_rate", 0.0)
+    monkeypatch.setattr(_CONFIG, "latency_ms", 10)
+    return breaker
+
+
+async def _open(breaker):
+    _CONFIG.error_rate = 1.0
+    with pytest.raises(LLMError):
+        await ask_openai_async("system", "question")
+    assert breaker.state == "open"
+    _CONFIG.error_rate = 0.0
+    await asyncio.sleep(COOLDOWN_S)
+
+
+def test_cancelled_probe_reopens_breaker(breaker):
+    async def scenario():
+        await _open(breaker)
+
+        # Probe outlives the caller's patience → cancelled, no outcome
+        _CONFIG.latency_ms = 2000
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(ask_openai_async("system", "question"), 0.2)
+        assert breaker.state == "open"
+        assert not breaker.probing
+
+        # Next probe after the cooldown closes it again
+        _CONFIG.latency_ms = 10
+        with pytest.raises(LLMCircuitOpenError):
+            await ask_openai_async("system", "question")
+        await asyncio.sleep(COOLDOWN_S)
+        assert await ask_openai_async("system", "question")
+        assert breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_closed_stream_releases_probe(breaker):
+    from app.services.openai_client import ask_openai_stream
+
+    async def scenario():
+        await _open(breaker)
+
+        # Client disconnects after the first token → generator closed mid-call
+        tokens = ask_openai_stream("system", "question")
+        assert await tokens.__anext__()
+        await tokens.aclose()
+        assert breaker.state == "open"
+        assert not breaker.probing
+
+    asyncio.run(scenario())
+
+
+def test_stale_probe_is_given_up():
+    breaker = CircuitBreaker(failures=1, cooldown_s=0, probe_timeout_s=0.05)
+    breaker.record_failure()
+
+    first = breaker.allow()
+    assert first
+    assert breaker.allow() is None
+
+    # The first probe never reported back → a new one may try
+    import time
+    time.sleep(0.06)
+    second = breaker.allow()
+    assert second and second != first
+
+    # The lost probe's late cancellation doesn't release the new probe
+    breaker.abandon(first)
+    assert breaker.probing
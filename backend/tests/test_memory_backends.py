@@ -0,0 +1,98 @@
+# Memory backends: compaction must not lose messages appended meanwhile,
+# and the hand-written RESP2 client must speak to a real Redis-protocol server
+import threading
+
+import pytest
+
+from app.services.memory_backends import InMemoryBackend, RedisBackend, SQLiteBackend
+from app.services.memory_manager import summarize
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture(scope="module")
+def redis_url():
+    server = fakeredis.TcpFakeServer(("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    yield f"redis://{host}:{port}/0"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path, redis_url):
+    if request.param == "memory":
+        yield InMemoryBackend(ttl=60, max_chats=10)
+    elif request.param == "sqlite":
+        yield SQLiteBackend(str(tmp_path / "memory.sqlite3"), ttl=60)
+    else:
+        backend = RedisBackend(redis_url, ttl=60, prefix=f"test:{tmp_path.name}")
+        yield backend
+        backend._client.close()
+
+
+def _message(i):
+    return {"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i} – ünïcode"}
+
+
+def test_append_load_delete(backend):
+    for i in range(3):
+        assert backend.append("chat", _message(i)) == i + 1
+
+    assert backend.load("chat") == ("", [_message(i) for i in range(3)])
+
+    backend.delete("chat")
+    assert backend.load("chat") == ("", [])
+
+
+def test_compact_keeps_recent(backend):
+    for i in range(5):
+        backend.append("chat", _message(i))
+
+    backend.compact("chat", 2, summarize)
+
+    summary, messages = backend.load("chat")
+    assert messages == [_message(3), _message(4)]
+    assert "message 0" in summary and "message 2" in summary
+    assert "message 3" not in summary
+
+
+def test_compact_keep_recent_zero_folds_everything(backend):
+    for i in range(3):
+        backend.append("chat", _message(i))
+
+    backend.compact("chat", 0, summarize)
+
+    summary, messages = backend.load("chat")
+    assert messages == []
+    assert "message 2" in summary
+
+
+def test_redis_compact_retries_when_a_message_lands_mid_fold(redis_url):
+    backend = RedisBackend(redis_url, ttl=60, prefix="test:race")
+    # Second connection → another worker appending to the same chat
+    other = RedisBackend(redis_url, ttl=60, prefix="test:race")
+    for i in range(4):
+        backend.append("chat", _message(i))
+
+    folds = []
+
+    def fold(summary, overflow):
+        if not folds:
+            other.append("chat", _message(4))
+        folds.append(len(overflow))
+        return summarize(summary, overflow)
+
+    backend.compact("chat", 1, fold)
+
+    # WATCH saw the append → EXEC aborted, the second pass folded 4 of 5
+    assert folds == [3, 4]
+    summary, messages = backend.load("chat")
+    assert messages == [_message(4)]
+    for i in range(4):
+        assert f"message {i}" in summary
+
+    backend._client.close()
+    other._client.close()
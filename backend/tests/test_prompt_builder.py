@@ -0,0 +1,59 @@
+# Token budgeting with the chars/4 fallback (the path that runs without tiktoken)
+import pytest
+
+from app.services import prompt_builder
+from app.services.prompt_builder import build_prompt, count_tokens, trim_to_tokens
+
+
+@pytest.fixture(autouse=True)
+def approx_tokenizer(monkeypatch):
+    monkeypatch.setattr(prompt_builder, "_ENCODING", None)
+    monkeypatch.setattr(prompt_builder, "PROMPT_MEMORY_SHARE", 0.3)
+
+
+def _chunks(count, tokens=100):
+    return [{"text": str(i) * (tokens * 4)} for i in range(count)]
+
+
+def test_fallback_counts_four_chars_per_token():
+    assert count_tokens("") == 0
+    assert count_tokens("abcd") == 1
+    assert count_tokens("abcde") == 2
+    assert trim_to_tokens("x" * 100, 10) == "x" * 40
+    assert trim_to_tokens("x" * 100, 0) == ""
+
+
+def test_chunks_fill_the_budget_in_rank_order_last_one_trimmed():
+    # budget 300 − system 4 − user 5 → 291 tokens of context (no memory)
+    plan = build_prompt("{context}", _chunks(4), "q", budget=300)
+    report = plan["token_report"]
+
+    assert report["tokenizer"] == "approx"
+    assert (report["chunks_used"], report["chunks_trimmed"], report["chunks_dropped"]) == (3, 1, 1)
+    assert report["context"] == 291
+    assert report["total"] == 300
+    assert plan["system_prompt"].startswith("0" * 400 + "\n\n" + "1" * 400 + "\n\n2")
+    assert "3" not in plan["system_prompt"]
+
+
+def test_memory_share_reserved_and_oldest_turns_dropped_first():
+    memory = [{"role": "user", "content": f"{i:02d}" * 20} for i in range(10)]  # 14 tokens each
+
+    plan = build_prompt("{context}", _chunks(4), "q", memory=memory, budget=300)
+    report = plan["token_report"]
+
+    # 30% of 291 held back → only two chunks fit, the third can't be trimmed to 64+
+    assert report["chunks_used"] == 2
+    assert report["context"] == 201
+    # The 90 tokens left → the 6 newest turns, in their original order
+    assert plan["memory"] == memory[4:]
+    assert report["memory"] == 84
+    assert report["memory_messages_dropped"] == 4
+    assert report["total"] <= report["budget"]
+
+
+def test_default_budget_is_3000():
+    report = build_prompt("{context}", _chunks(50), "q")["token_report"]
+
+    assert report["budget"] == prompt_builder.PROMPT_TOKEN_BUDGET == 3000
+    assert report["total"] <= 3000
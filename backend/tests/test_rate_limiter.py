@@ -0,0 +1,115 @@
+# Rate limiter with a fake clock: priority order, TPM waits, settle refunds
+import asyncio
+import types
+
+import pytest
+
+from app.services import rate_limiter
+from app.services.rate_limiter import Budget, Scheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    # Only the limiter's clock: the event loop keeps real time
+    monkeypatch.setattr(rate_limiter, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(rate_limiter, "LLM_QUEUE_MAX_WAIT_S", {"reply": 60, "judge": 60, "reflect": 60})
+    return clock
+
+
+async def _settle():
+    # Let queued acquire() calls and the pump run
+    for _ in range(5):
+        await asyncio.sleep(0.01)
+
+
+def test_reply_is_admitted_before_queued_judge_and_reflect(clock):
+    async def run():
+        budget = Budget(rpm=60, tpm=0)  # one request per second
+        budget.requests.level = 0
+        scheduler = Scheduler(budget)
+        granted = []
+
+        async def call(route):
+            assert await scheduler.acquire(route, 10)
+            granted.append(route)
+
+        tasks = [asyncio.ensure_future(call("reflect")), asyncio.ensure_future(call("judge"))]
+        await _settle()
+        tasks.append(asyncio.ensure_future(call("reply")))
+        await _settle()
+        assert granted == []
+
+        for _ in range(3):
+            clock.advance(1.0)
+            scheduler._wake()
+            await _settle()
+
+        await asyncio.gather(*tasks)
+        return granted
+
+    assert asyncio.run(run()) == ["reply", "judge", "reflect"]
+
+
+def test_over_tpm_budget_waits_for_refill(clock):
+    async def run():
+        scheduler = Scheduler(Budget(rpm=0, tpm=600))  # 10 tokens / s, 600 bucket
+        assert await scheduler.acquire("reply", 500)
+
+        second = asyncio.ensure_future(scheduler.acquire("reply", 500))
+        await _settle()
+        waiting = not second.done()
+
+        clock.advance(20.0)  # 100 + 200 tokens → still short
+        scheduler._wake()
+        await _settle()
+        still_waiting = not second.done()
+
+        clock.advance(20.0)  # 500 available
+        scheduler._wake()
+        await _settle()
+        return waiting, still_waiting, second.done() and second.result()
+
+    assert asyncio.run(run()) == (True, True, True)
+
+
+def test_low_priority_is_shed_when_the_wait_is_too_long(clock, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "LLM_QUEUE_MAX_WAIT_S", {"reply": 60, "reflect": 2})
+
+    async def run():
+        scheduler = Scheduler(Budget(rpm=0, tpm=600))
+        assert await scheduler.acquire("reply", 600)
+        # 100 tokens at 10 / s → 10 s projected, over reflect's 2 s
+        return await scheduler.acquire("reflect", 100)
+
+    assert asyncio.run(run()) is False
+
+
+def test_settle_refunds_estimate_minus_actual(clock, monkeypatch):
+    budget = Budget(rpm=0, tpm=600)
+    monkeypatch.setattr(rate_limiter, "_BUDGET", budget)
+
+    assert budget.try_take(500) == 0.0
+    assert budget.tokens.level == pytest.approx(100)
+
+    rate_limiter.settle(500, 200)
+    assert budget.tokens.level == pytest.approx(400)
+
+    # Used more than estimated → the difference is charged
+    rate_limiter.settle(100, 300)
+    assert budget.tokens.level == pytest.approx(200)
+
+    # Unknown usage → the estimate stands
+    rate_limiter.settle(500, None)
+    assert budget.tokens.level == pytest.approx(200)
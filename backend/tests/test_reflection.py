@@ -0,0 +1,103 @@
+# Deferred reflection: /chat answers before the reflection finishes, the
+# result is fetched afterwards from /chat/reflection/{message_id}
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.agents import agent_router
+from app.api.chat import router
+from app.services import reflection
+
+REFLECTION_DELAY_S = 0.3
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def classify(message):
+        return {"agent": "LAW", "confidence": 0.9, "method": "keyword"}
+
+    async def build(message, memory=None, chunks=None):
+        return {"system_prompt": "system", "memory": [], "token_report": {"total": 1}}
+
+    async def no_cache(*args, **kwargs):
+        return None
+
+    async def answer(system_prompt, user_message, memory=None, route="reply"):
+        return "Section 302 is punishment for murder."
+
+    async def review(system_prompt, user_message, memory=None, route="reply"):
+        assert route == "reflect"
+        await asyncio.sleep(REFLECTION_DELAY_S)
+        return json.dumps({"confidence": 88, "notes": "matches the statute"})
+
+    monkeypatch.setattr(agent_router, "classify_intent_async", classify)
+    monkeypatch.setitem(agent_router.PROMPT_BUILDERS, "LAW", build)
+    monkeypatch.setattr(agent_router, "lookup_answer", no_cache)
+    monkeypatch.setattr(agent_router, "remember_answer", no_cache)
+    monkeypatch.setattr(agent_router, "ask_openai_async", answer)
+    monkeypatch.setattr(reflection, "ask_openai_async", review)
+    monkeypatch.setattr(agent_router, "REFLECTION_MODE", "deferred")
+    monkeypatch.setattr(reflection, "REFLECTION_SAMPLE_RATE", 1.0)
+
+    app = FastAPI()
+    app.include_router(router)
+    # One client → one event loop, so the background reflection keeps running between requests
+    with TestClient(app) as client:
+        yield client
+
+
+def _chat(client):
+    response = client.post("/chat", json={"chat_id": "reflection-test", "message": "section 302 IPC"})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_reply_returns_first_reflection_fetched_afterwards(client):
+    started = time.perf_counter()
+    body = _chat(client)
+
+    assert time.perf_counter() - started < REFLECTION_DELAY_S
+    assert body["reply"] == "Section 302 is punishment for murder."
+    assert (body["reflection_status"], body["confidence"]) == ("pending", None)
+
+    url = f"/chat/reflection/{body['message_id']}"
+    assert client.get(url).json()["status"] == "pending"
+
+    deadline = time.perf_counter() + 5
+    while (result := client.get(url).json())["status"] == "pending":
+        assert time.perf_counter() < deadline
+        time.sleep(0.05)
+
+    assert result == {"message_id": body["message_id"], "status": "done",
+                      "confidence": 88, "notes": "matches the statute"}
+
+
+def test_sampled_out_reply_has_no_reflection(client, monkeypatch):
+    monkeypatch.setattr(reflection, "REFLECTION_SAMPLE_RATE", 0.0)
+    body = _chat(client)
+
+    assert body["reflection_status"] == "skipped"
+    assert client.get(f"/chat/reflection/{body['message_id']}").status_code == 404
+
+
+def test_finished_results_are_bounded(monkeypatch):
+    monkeypatch.setattr(reflection, "REFLECTION_RESULTS_MAX", 2)
+    monkeypatch.setattr(reflection, "_RESULTS", type(reflection._RESULTS)())
+
+    async def review(system_prompt, user_message, memory=None, route="reply"):
+        return json.dumps({"confidence": 70, "notes": user_message})
+
+    monkeypatch.setattr(reflection, "ask_openai_async", review)
+
+    async def run():
+        await asyncio.gather(*[reflection.schedule_reflection(f"m{i}", f"answer {i}", []) for i in range(3)])
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+    assert reflection.get_reflection("m0") is None
+    assert reflection.get_reflection("m2") == {"status": "done", "confidence": 70, "notes": "answer 2"}
@@ -0,0 +1,82 @@
+# Reranker latency budget: skip when the predicted cost doesn't fit,
+# probe now and then so a cheaper model run turns reranking back on
+import types
+
+import pytest
+
+from app.services import reranker
+from app.services.lru_cache import LRUCache
+from app.services.reranker import rerank_chunks
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubCrossEncoder:
+    """Scores by chunk length (longest first); costs ms_per_pair on the fake clock"""
+
+    def __init__(self, clock, ms_per_pair):
+        self.clock = clock
+        self.ms_per_pair = ms_per_pair
+        self.calls = 0
+
+    def predict(self, pairs, batch_size=None, show_progress_bar=False):
+        self.calls += 1
+        self.clock.now += self.ms_per_pair * len(pairs) / 1000
+        return [float(len(text)) for _, text in pairs]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(reranker, "time", types.SimpleNamespace(perf_counter=clock, monotonic=clock))
+    monkeypatch.setattr(reranker, "_SCORE_CACHE", LRUCache(maxsize=100))
+    monkeypatch.setattr(reranker, "_STATS", dict.fromkeys(reranker._STATS, 0))
+    monkeypatch.setattr(reranker, "RERANK_PROBE_INTERVAL_S", 30.0)
+    monkeypatch.setattr(reranker, "_WARMED", True)
+    # Last batch was slow: 100 ms / pair, measured just now
+    monkeypatch.setattr(reranker, "_MS_PER_PAIR", 100.0)
+    monkeypatch.setattr(reranker, "_LAST_RUN", clock.now)
+    return clock
+
+
+@pytest.fixture
+def model(monkeypatch, clock):
+    model = StubCrossEncoder(clock, ms_per_pair=1.0)
+    monkeypatch.setattr(reranker, "_MODEL", model)
+    return model
+
+
+CHUNKS = [{"text": "a" * n} for n in (1, 5, 3, 4, 2)]
+
+
+def test_over_budget_returns_candidates_in_original_order(model):
+    result = rerank_chunks("query one", CHUNKS, top_k=3, budget_ms=150)
+
+    assert result == CHUNKS[:3]
+    assert model.calls == 0
+    assert reranker._STATS["skipped_budget"] == 1
+
+
+def test_probe_re_enables_reranking(model, clock):
+    rerank_chunks("query one", CHUNKS, top_k=3, budget_ms=150)
+
+    clock.now += 31  # probe interval passed → one over-budget call runs the model
+    probed = rerank_chunks("query two", CHUNKS, top_k=3, budget_ms=150)
+
+    assert model.calls == 1
+    assert reranker._STATS["probes"] == 1
+    assert [len(chunk["text"]) for chunk in probed] == [5, 4, 3]
+    assert reranker._MS_PER_PAIR == pytest.approx(1.0)
+
+    # Fresh estimate fits the budget → the next query reranks without a probe
+    again = rerank_chunks("query three", CHUNKS, top_k=3, budget_ms=150)
+
+    assert model.calls == 2
+    assert reranker._STATS["probes"] == 1
+    assert [len(chunk["text"]) for chunk in again] == [5, 4, 3]
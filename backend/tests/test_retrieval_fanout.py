@@ -0,0 +1,74 @@
+# Fan-out retrieval abandoned by a timeout or a failing domain: the
+# leftover searches are cancelled or their errors consumed, never leaked
+# as "Task exception was never retrieved"
+import asyncio
+import gc
+
+import pytest
+
+from app.agents import agent_router
+from app.services import rag_retriever
+
+
+def _run(coro):
+    errors = []
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        result = await coro
+        # Let abandoned work finish, then collect whatever nobody looked at
+        await asyncio.sleep(0.2)
+        gc.collect()
+        await asyncio.sleep(0)
+        return result
+
+    result = asyncio.run(main())
+    gc.collect()
+    return result, errors
+
+
+def test_failing_domain_cancels_the_other_searches(monkeypatch):
+    started, cancelled = [], []
+
+    async def search(query, db_path, k=4, mode=None, rerank=None):
+        started.append(db_path)
+        if db_path == rag_retriever.DOMAIN_DBS["law"]:
+            raise RuntimeError("law DB unavailable")
+        try:
+            await asyncio.sleep(0.1)
+        except asyncio.CancelledError:
+            cancelled.append(db_path)
+            raise
+        raise RuntimeError("too late")
+
+    monkeypatch.setattr(rag_retriever, "retrieve_chunks_async", search)
+
+    async def call():
+        with pytest.raises(RuntimeError, match="law DB unavailable"):
+            await rag_retriever.retrieve_multi_async("q", ["law", "police", "press"], mode="bm25")
+
+    _, errors = _run(call())
+
+    assert len(started) == 3
+    assert len(cancelled) == 2
+    assert errors == []
+
+
+def test_voting_timeout_leaves_no_unretrieved_retrieval_error(monkeypatch):
+    async def no_cache(domain, question, memory=None):
+        return None
+
+    async def slow_failing_retrieval(query, domains, k=4, mode=None):
+        await asyncio.sleep(0.05)
+        raise RuntimeError("retrieval failed after the agents gave up")
+
+    monkeypatch.setattr(agent_router, "lookup_answer", no_cache)
+    monkeypatch.setattr(agent_router, "retrieve_multi_async", slow_failing_retrieval)
+    monkeypatch.setattr(agent_router, "AGENT_TIMEOUT_S", 0.01)
+
+    result, errors = _run(agent_router.run_agent_with_voting_async("fanout-test", "what is bail?"))
+
+    assert result["winner"] is None
+    assert all(timing["status"] == "timeout" for name, timing in result["timings"].items()
+               if name in agent_router.VOTING_AGENTS)
+    assert errors == []
@@ -0,0 +1,75 @@
+# Section references → exact statute text, skipping vector search when the act is named
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.agents import agent_law
+from app.services import section_index
+from app.services.section_index import find_section_refs, lookup_sections
+
+
+@pytest.fixture(autouse=True)
+def index_path(monkeypatch):
+    # The default path is relative to backend/ → pin it for runs from the repo root
+    path = Path(__file__).resolve().parents[1] / "vectordb" / "law_sections.json"
+    monkeypatch.setattr(section_index, "SECTION_INDEX_PATH", str(path))
+
+
+@pytest.mark.parametrize("message, refs", [
+    ("section 302 IPC", [("IPC", "302")]),
+    ("section 498-A ipc", [("IPC", "498A")]),
+    ("498A ipc lo punishment enti", [("IPC", "498A")]),
+    ("sec 41-A CrPC", [("CrPC", "41A")]),
+    ("IPC sections 323, 324 and 325", [("IPC", "323"), ("IPC", "324"), ("IPC", "325")]),
+    ("section 154", [("IPC", "154"), ("CrPC", "154")]),
+    ("bail under section 437", [("CrPC", "437")]),
+    ("section 3 of IT act", []),
+    ("section 66 of the Information Technology Act", []),
+    ("sec 9 CPC", []),
+    ("IPC 420 vs section 66 of IT act", [("IPC", "420")]),
+    ("punishment is 7 years under IPC", []),
+])
+def test_find_section_refs(message, refs):
+    assert find_section_refs(message) == refs
+
+
+@pytest.mark.parametrize("message, complete", [
+    ("section 302 IPC", True),
+    ("section 154", False),              # IPC or CrPC → vector search decides
+    ("bail under section 437", False),   # act only guessed
+    ("section 3 of IT act", False),      # not an IPC / CrPC section
+])
+def test_lookup_sections_complete(message, complete):
+    assert lookup_sections(message)[1] is complete
+
+
+def _no_retrieval(monkeypatch):
+    calls = []
+
+    async def retrieve(**kwargs):
+        calls.append(kwargs)
+        return [{"text": "vector hit", "score": 0.5, "metadata": {"act": "IPC", "section": "300"}}]
+
+    monkeypatch.setattr(agent_law, "retrieve_chunks_async", retrieve)
+    return calls
+
+
+def test_named_act_skips_vector_search(monkeypatch):
+    calls = _no_retrieval(monkeypatch)
+
+    plan = asyncio.run(agent_law.build_law_prompt("section 302 IPC"))
+
+    assert calls == []
+    assert "IPC Section 302" in plan["system_prompt"]
+    assert "vector hit" not in plan["system_prompt"]
+
+
+def test_ambiguous_section_merges_with_vector_search(monkeypatch):
+    calls = _no_retrieval(monkeypatch)
+
+    plan = asyncio.run(agent_law.build_law_prompt("section 154 enti?"))
+
+    assert len(calls) == 1
+    prompt = plan["system_prompt"]
+    assert prompt.index("CrPC Section 154") < prompt.index("vector hit")
@@ -0,0 +1,61 @@
+# Answer cache in a chat that already has memory: standalone questions hit,
+# follow-ups that lean on earlier turns are bypassed
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services import semantic_cache
+from app.services.semantic_cache import depends_on_memory, lookup_answer, remember_answer
+
+MEMORY = [
+    {"role": "user", "content": "section 302 IPC enti?"},
+    {"role": "assistant", "content": "Section 302 is punishment for murder ..."},
+]
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    async def embed(question):
+        # Deterministic stand-in for the sentence embedding
+        rng = np.random.default_rng(abs(hash(" ".join(question.lower().split()))) % 2**32)
+        return tuple(rng.standard_normal(8))
+
+    monkeypatch.setattr(semantic_cache, "embed_query_async", embed)
+    monkeypatch.setattr(semantic_cache, "collection_version", lambda db_path: 0)
+    monkeypatch.setattr(semantic_cache, "SEMANTIC_CACHE_ENABLED", True)
+    monkeypatch.setattr(semantic_cache, "_CACHES", {})
+
+
+@pytest.mark.parametrize("question, follow_up", [
+    ("what is the punishment for cheating under the penal code?", False),
+    ("section 420 IPC enti?", False),
+    ("is it bailable?", True),
+    ("what about that case?", True),
+    ("adhi bailable aa", True),
+])
+def test_depends_on_memory(question, follow_up):
+    assert depends_on_memory(question, MEMORY) is follow_up
+    assert depends_on_memory(question, []) is False
+
+
+def test_repeated_standalone_question_hits_in_chat_with_memory():
+    async def run():
+        question = "section 420 IPC punishment enti?"
+        await remember_answer("law", question, "Seven years + fine", memory=MEMORY)
+        return await lookup_answer("law", question, MEMORY)
+
+    hit = asyncio.run(run())
+
+    assert hit is not None
+    assert hit["reply"] == "Seven years + fine"
+
+
+def test_follow_up_is_neither_stored_nor_served():
+    async def run():
+        await remember_answer("law", "is it bailable?", "No", memory=MEMORY)
+        stored = await lookup_answer("law", "is it bailable?")
+        served = await lookup_answer("law", "is it bailable?", MEMORY)
+        return stored, served
+
+    assert asyncio.run(run()) == (None, None)
@@ -2,7 +2,7 @@ import React, { useState } from "react";
 import Sidebar from "./components/Sidebar";
 import ChatArea from "./components/ChatArea";
 import Disclaimer from "./components/Disclaimer";
-import { handleMessage } from "./utils/handleMessage";
+import { streamMessage } from "./utils/handleMessage";
 
 export default function App() {
   // 🔐 Disclaimer
@@ -76,45 +76,66 @@ export default function App() {
     setInputText("");
     setIsTyping(true);
 
-    try {
-      // 🤖 BACKEND CALL
-      const reply = await handleMessage(content);
+    // 🤖 Empty assistant bubble → filled token by token
+    const replyId = Date.now() + 1;
 
+    const updateReply = (updater) =>
       setChats((prev) =>
         prev.map((chat) =>
           chat.id === chatId
             ? {
                 ...chat,
-                messages: [
-                  ...chat.messages,
-                  {
-                    id: Date.now(),
-                    role: "assistant",
-                    content: reply,
-                  },
-                ],
+                messages: chat.messages.map((msg) =>
+                  msg.id === replyId
+                    ? { ...msg, content: updater(msg.content) }
+                    : msg
+                ),
               }
             : chat
         )
       );
+
+    setChats((prev) =>
+      prev.map((chat) =>
+        chat.id === chatId
+          ? {
+              ...chat,
+              messages: [
+                ...chat.messages,
+                {
+                  id: replyId,
+                  role: "assistant",
+                  content: { reply: "", streaming: true },
+                },
+              ],
+            }
+          : chat
+      )
+    );
+
+    try {
+      // 📡 BACKEND CALL (streaming)
+      const result = await streamMessage(content, {
+        onToken: (token) =>
+          updateReply((prevContent) => ({
+            ...prevContent,
+            reply: prevContent.reply + token,
+          })),
+        onDone: (reply) => {
+          updateReply(() => ({ ...reply, streaming: false }));
+          // ✅ Reply is complete → don't wait for the reflection to unlock the input
+          setIsTyping(false);
+        },
+        onReflection: ({ confidence, notes }) =>
+          updateReply((prevContent) => ({ ...prevContent, confidence, notes })),
+      });
+
+      // Stream closed without a "done" event → stop the cursor anyway
+      if (!result) {
+        updateReply((prevContent) => ({ ...prevContent, streaming: false }));
+      }
     } catch (error) {
-      setChats((prev) =>
-        prev.map((chat) =>
-          chat.id === chatId
-            ? {
-                ...chat,
-                messages: [
-                  ...chat.messages,
-                  {
-                    id: Date.now(),
-                    role: "assistant",
-                    content: "❌ Backend connect avvaledhu",
-                  },
-                ],
-              }
-            : chat
-        )
-      );
+      updateReply(() => "❌ Backend connect avvaledhu");
     }
 
     setIsTyping(false);
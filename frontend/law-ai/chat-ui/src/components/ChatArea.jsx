@@ -12,9 +12,16 @@ export default function ChatArea({
 }) {
   const messagesEndRef = useRef(null);
 
+  // 📡 Last bubble still receiving tokens?
+  const lastMessage = messages[messages.length - 1];
+  const isStreaming = Boolean(lastMessage?.content?.streaming);
+
   useEffect(() => {
-    messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
-  }, [messages]);
+    // Smooth scroll per token lags behind the stream → jump instead
+    messagesEndRef.current?.scrollIntoView({
+      behavior: isStreaming ? "auto" : "smooth",
+    });
+  }, [messages, isStreaming]);
 
   return (
     <div className="flex-1 flex flex-col bg-slate-50">
@@ -8,9 +8,13 @@ export default function MessageBubble({ message }) {
     if (typeof message.content === "object" && message.content !== null) {
       return (
         <div className="space-y-2">
-          {message.content.reply && (
+          {(message.content.reply || message.content.streaming) && (
             <p className="whitespace-pre-line">
               {message.content.reply}
+              {/* ✍️ Typing cursor while tokens stream in */}
+              {message.content.streaming && (
+                <span className="inline-block w-2 h-4 ml-0.5 align-middle bg-slate-400 animate-pulse" />
+              )}
             </p>
           )}
 
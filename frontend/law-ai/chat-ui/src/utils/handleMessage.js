@@ -17,3 +17,72 @@ export async function handleMessage(message) {
   const data = await res.json();
   return data;
 }
+
+// 📡 Streaming version → /chat/stream (Server-Sent Events over POST)
+// handlers: { onMeta, onToken, onDone, onReflection }
+export async function streamMessage(
+  message,
+  { onMeta, onToken, onDone, onReflection } = {}
+) {
+  const res = await fetch("http://127.0.0.1:8000/chat/stream", {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({
+      chat_id: "test_chat",
+      message: message,
+    }),
+  });
+
+  if (!res.ok || !res.body) {
+    throw new Error("Backend error");
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let result = null;
+
+  const handleEvent = (rawEvent) => {
+    let event = "message";
+    let data = "";
+
+    rawEvent.split("\n").forEach((line) => {
+      if (line.startsWith("event:")) event = line.slice(6).trim();
+      else if (line.startsWith("data:")) data += line.slice(5).trim();
+    });
+
+    if (!data) return;
+    const payload = JSON.parse(data);
+
+    if (event === "meta") onMeta?.(payload);
+    else if (event === "token") onToken?.(payload.text);
+    else if (event === "done") {
+      result = payload;
+      onDone?.(payload);
+    } else if (event === "reflection") {
+      // 🪞 Confidence arrives after the reply is complete
+      onReflection?.(payload);
+    } else if (event === "error") {
+      throw new Error(payload.detail || "Backend error");
+    }
+  };
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+
+    // SSE events are separated by a blank line
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      handleEvent(buffer.slice(0, boundary));
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf("\n\n");
+    }
+  }
+
+  return result;
+}